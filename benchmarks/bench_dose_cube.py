@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Q.Dose page load: eight separate queries vs the GROUPING SETS cube
+Run from the repository root:
+
+    python -m benchmarks.bench_dose_cube --backend duckdb --runs 5
+    python -m benchmarks.bench_dose_cube --backend snowflake
+
+Both strategies run sequentially with no result caching, so the totals measure warehouse
+work rather than concurrency. On Snowflake each strategy is tagged with a QUERY_TAG and
+bytes scanned / execution time are read back from QUERY_HISTORY_BY_SESSION. Every run
+also checks that the split cube frames match the separate query results.
+"""
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.query_benchmark import make_backend
+from utils.backends import QueryBackend
+from utils.dose_cube import CUBE_QUERY_NAMES, DOSE_CUBE_QUERY, split_dose_cube
+from utils.queries import get_query, list_queries
+
+HISTORY_QUERY = """
+    SELECT
+        COUNT(*) as QUERIES,
+        SUM(BYTES_SCANNED) as BYTES_SCANNED,
+        SUM(EXECUTION_TIME) / 1000 as EXECUTION_SECONDS
+    FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 1000))
+    WHERE QUERY_TAG = %(tag)s
+"""
+
+def run_separate(backend: QueryBackend) -> Dict:
+    """Today's page load: every DOSE query on its own"""
+    return {name: backend.execute(get_query('dose', name)) for name in list_queries('dose')}
+
+def run_cube(backend: QueryBackend) -> Dict:
+    """Cube page load: one GROUPING SETS scan plus the two queries it does not cover"""
+    results = split_dose_cube(backend.execute(DOSE_CUBE_QUERY))
+    for name in list_queries('dose'):
+        if name not in CUBE_QUERY_NAMES:
+            results[name] = backend.execute(get_query('dose', name))
+    return results
+
+# Queries with ORDER BY ... LIMIT: rows tied at the cut-off may legitimately differ,
+# so only the ranking column is compared
+LIMITED_QUERIES = {'provider_patterns': ['TOTAL_PRESCRIPTIONS']}
+
+def check_equivalent(separate: Dict, cube: Dict) -> list:
+    """Names of queries whose cube frames differ in columns, row count or totals"""
+    mismatches = []
+    for name in CUBE_QUERY_NAMES:
+        a, b = separate[name], cube[name]
+        numeric = LIMITED_QUERIES.get(name, a.select_dtypes('number').columns)
+        if (list(a.columns) != list(b.columns) or len(a) != len(b)
+                or not np.allclose(a[numeric].sum(), b[numeric].sum(), rtol=1e-6, equal_nan=True)):
+            mismatches.append(name)
+    return mismatches
+
+def warehouse_work(backend: QueryBackend, tag: str) -> Dict:
+    """Bytes scanned and execution time of the tagged queries (Snowflake only)"""
+    df = backend.execute(HISTORY_QUERY, {'tag': tag})
+    return df.iloc[0].to_dict() if not df.empty else {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Q.Dose GROUPING SETS cube")
+    parser.add_argument('--backend', choices=['snowflake', 'duckdb'], default='snowflake')
+    parser.add_argument('--data-dir', help="Parquet directory for the duckdb backend")
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    backend = make_backend(args.backend, args.data_dir)
+    backend.execute_command("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+
+    strategies = {'separate': run_separate, 'cube': run_cube}
+    scans = {'separate': len(list_queries('dose')), 'cube': len(list_queries('dose')) - len(CUBE_QUERY_NAMES) + 1}
+    seconds = {name: [] for name in strategies}
+    outputs = {}
+    run_tag = f"bench_dose_cube_{int(time.time())}"
+
+    for _ in range(args.runs):
+        for name, strategy in strategies.items():
+            backend.execute_command(f"ALTER SESSION SET QUERY_TAG = '{run_tag}_{name}'")
+            start_time = time.time()
+            outputs[name] = strategy(backend)
+            seconds[name].append(time.time() - start_time)
+    backend.execute_command("ALTER SESSION UNSET QUERY_TAG")
+
+    print(f"{'strategy':<10}{'table scans':>13}{'p50 s':>9}{'max s':>9}")
+    for name in strategies:
+        print(f"{name:<10}{scans[name]:>13}{np.median(seconds[name]):>9.3f}{max(seconds[name]):>9.3f}")
+
+    speedup = np.median(seconds['separate']) / max(np.median(seconds['cube']), 1e-9)
+    print(f"\nCube mode: {scans['separate'] - scans['cube']} fewer PHARMACEUTICAL_CLAIMS scans, "
+          f"sequential page load {speedup:.2f}x the speed of separate queries")
+
+    if backend.name == 'snowflake':
+        for name in strategies:
+            work = warehouse_work(backend, f"{run_tag}_{name}")
+            print(f"{name:<10} warehouse: {float(work.get('BYTES_SCANNED') or 0) / 1e6:,.1f} MB scanned, "
+                  f"{float(work.get('EXECUTION_SECONDS') or 0):.2f}s execution over {args.runs} run(s)")
+
+    mismatches = check_equivalent(outputs['separate'], outputs['cube'])
+    print("Split cube results match the separate queries" if not mismatches
+          else f"MISMATCH in: {', '.join(mismatches)}")
+
+if __name__ == '__main__':
+    main()
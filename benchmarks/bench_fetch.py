@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Fetch-path benchmark: legacy row materialization vs Arrow result batches
+Run from the repository root:  python -m benchmarks.bench_fetch [--rows 1000000] [--snowpark]
+
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_QUERY = """
+    SELECT
+        SEQ4() AS ID,
+        UNIFORM(1, 100000, RANDOM()) AS INT_VAL,
+        UNIFORM(0::FLOAT, 50000::FLOAT, RANDOM()) AS AMOUNT,
+        RANDSTR(16, RANDOM()) AS PRODUCT_NAME,
+        DATEADD(day, UNIFORM(0, 1095, RANDOM()), '2017-01-01'::DATE) AS DATE_KEY
+    FROM TABLE(GENERATOR(ROWCOUNT => {rows}))
+"""
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_single(mode: str, rows: int, snowpark: bool) -> dict:
+    """Execute the benchmark query once with the given fetch mode and report timings"""
+    from utils.snowflake_conn import load_local_connection_params, _run_query
+
+    params = load_local_connection_params()
+    if snowpark:
+        from snowflake.snowpark import Session
+        conn = Session.builder.configs(params).create()
+    else:
+        import snowflake.connector
+        conn = snowflake.connector.connect(**params)
+
+    baseline_rss = _peak_rss_mb()
+    start_time = time.time()
+    df = _run_query(conn, BENCH_QUERY.format(rows=rows), fetch_mode=mode)
+    elapsed = time.time() - start_time
+
+    result = {
+        'mode': mode,
+        'path': 'snowpark' if snowpark else 'connector',
+        'rows': len(df),
+        'seconds': round(elapsed, 3),
+        'frame_mb': round(df.memory_usage(deep=True).sum() / (1024 * 1024), 1),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - baseline_rss, 1)
+    }
+    conn.close()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare row vs Arrow result fetching")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--snowpark', action='store_true', help="Benchmark the Snowpark session path")
+    parser.add_argument('--mode', choices=['rows', 'arrow'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: run one mode and emit JSON for the parent
+        print(json.dumps(run_single(args.mode, args.rows, args.snowpark)))
+        return
+
+    results = []
+    for mode in ('rows', 'arrow'):
+        cmd = [sys.executable, '-m', 'benchmarks.bench_fetch', '--mode', mode, '--rows', str(args.rows)]
+        if args.snowpark:
+            cmd.append('--snowpark')
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<8}{'path':<11}{'rows':>10}{'seconds':>10}{'frame MB':>10}{'peak RSS +MB':>14}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['path']:<11}{r['rows']:>10,}{r['seconds']:>10.2f}"
+              f"{r['frame_mb']:>10.1f}{r['peak_rss_delta_mb']:>14.1f}")
+
+    speedup = results[0]['seconds'] / max(results[1]['seconds'], 1e-9)
+    print(f"\n⚡ Arrow fetch is {speedup:.1f}x faster than row fetch")
+
+if __name__ == "__main__":
+    main()
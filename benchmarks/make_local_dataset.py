@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Build the local Parquet dataset used by the DuckDB backend (QHEALTH_BACKEND=duckdb)
+Run from the repository root:
+
+    python -m benchmarks.make_local_dataset                    # synthetic, ~2.3M fact rows
+    python -m benchmarks.make_local_dataset --scale 0.1        # smaller synthetic dataset
+    python -m benchmarks.make_local_dataset --from-snowflake   # export the real tables
+
+Synthetic data mirrors the schemas in sql/01_database_setup.sql and the value domains of
+sql/02-03, and the sql/03 rollup tables are built from it with their own SQL. Healthcare
+claim dates are generated relative to today so the rolling 12/24-month windows in
+utils/queries.py always have data.
+"""
+
+import argparse
+import os
+
+import duckdb
+
+from utils.aggregate_router import rollup_statements
+from utils.duckdb_backend import LOCAL_DATA_DIR
+from utils.reference_data import reference_values
+
+PROVINCES = ['Gauteng', 'Western Cape', 'KwaZulu-Natal', 'Eastern Cape', 'Limpopo',
+             'Mpumalanga', 'North West', 'Free State', 'Northern Cape']
+
+# CATEGORY_DESCR of the claims is the provider's PROVIDER_CATEGORY (sql/03)
+PROVIDER_CATEGORIES = reference_values('DIM_PROVIDERS', 'PROVIDER_CATEGORY')
+DEVICE_LEVEL_1 = ['Wound Management', 'Sutures', 'Syringes', 'Diagnostics', 'Surgical Instruments', 'Orthopedics']
+ATC_LEVEL_1 = ['Nervous System', 'Cardiovascular System', 'Alimentary Tract And Metabolism',
+               'Anti-Infectives For Systemic Use', 'Respiratory System', 'Antineoplastic And Immunomodulating Agents']
+ATC_LEVEL_3 = ['Immunostimulants', 'Multiple Sclerosis Agents', 'Beta Blocking Agents', 'Antidepressants',
+               'Lipid Modifying Agents', 'Antibacterials', 'Insulins And Analogues', 'Adrenergics']
+PRODUCTS = ['Copaxone 20mg', 'Interferon Beta-1a', 'Lipitor 20mg', 'Panado 500mg', 'Augmentin 875mg',
+            'Lantus Solostar', 'Concor 5mg', 'Cipralex 10mg', 'Ventolin Inhaler', 'Tecfidera 240mg']
+MANUFACTURERS = ['Teva', 'Merck', 'Pfizer', 'Adcock Ingram', 'GSK', 'Sanofi', 'Aspen', 'Lundbeck', 'Biogen']
+PROVIDER_TYPES = ['General Practitioner', 'Specialist', 'Pharmacy', 'Hospital']
+AGE_BUCKETS = ['0-17', '18-29', '30-39', '40-49', '50-59', '60-69', '70+']
+GENDERS = ['M', 'F']
+
+def _pick(values) -> str:
+    """SQL expression choosing uniformly at random from a Python list"""
+    items = ', '.join("'" + v.replace("'", "''") + "'" for v in values)
+    return f"[{items}][1 + floor(random() * {len(values)})::INT]"
+
+def _pick_by(values, index_expr: str) -> str:
+    """SQL expression choosing deterministically from a Python list by an integer expression"""
+    items = ', '.join("'" + v.replace("'", "''") + "'" for v in values)
+    return f"[{items}][1 + (({index_expr}) % {len(values)})::INT]"
+
+def generate_synthetic(con, out_dir: str, scale: float):
+    """Write synthetic fact and dimension tables as Parquet"""
+    n_claims = int(1_100_000 * scale)
+    n_pharma = int(1_200_000 * scale)
+    n_patients = max(int(100_000 * scale), 1000)
+
+    con.execute(f"""
+        COPY (
+            SELECT
+                'P' || lpad(i::VARCHAR, 7, '0') AS ENTITY_NO,
+                {_pick(AGE_BUCKETS)} AS AGE_BUCKET,
+                {_pick(AGE_BUCKETS)} AS AGE_GROUPS,
+                {_pick(GENDERS)} AS GENDER,
+                {_pick(PROVINCES)} AS PROVINCE,
+                'Region ' || (i % 25)::VARCHAR AS REGION_OF_RESIDENCE,
+                now() AS CREATED_DATE
+            FROM range({n_patients}) t(i)
+        ) TO '{out_dir}/DIM_PATIENTS.parquet' (FORMAT PARQUET, COMPRESSION ZSTD)
+    """)
+
+    con.execute(f"""
+        COPY (
+            SELECT
+                i + 1 AS PROVIDER_ID,
+                'Provider ' || lpad(i::VARCHAR, 3, '0') AS PROVIDER_NAME,
+                'Group ' || (i % 6)::VARCHAR AS PROVIDER_GROUP,
+                {_pick_by(PROVIDER_CATEGORIES, 'i')} AS PROVIDER_CATEGORY,
+                {_pick(PROVIDER_TYPES)} AS PROVIDER_TYPE,
+                {_pick(PROVINCES)} AS PROVINCE,
+                'Region ' || (i % 25)::VARCHAR AS REGION,
+                now() AS CREATED_DATE
+            FROM range(26) t(i)
+        ) TO '{out_dir}/DIM_PROVIDERS.parquet' (FORMAT PARQUET, COMPRESSION ZSTD)
+    """)
+
+    # Healthcare claims: the provider dimension drives practice, category and province together
+    con.execute(f"""
+        COPY (
+            WITH base AS (
+                SELECT
+                    i AS CLAIM_ID,
+                    (current_date - (floor(random() * 730))::INT) AS DATE_KEY,
+                    (i % 26) AS PROVIDER_IDX,
+                    {_pick(DEVICE_LEVEL_1)} AS HIGH_LEVEL_1,
+                    (1 + floor(random() * 10))::INT AS UNITS,
+                    20 + random() * 480 AS COST_BASE,
+                    [1, 3, 5, 8, 10][1 + floor(random() * 5)::INT] AS WF
+                FROM range({n_claims}) t(i)
+            )
+            SELECT
+                b.CLAIM_ID,
+                year(b.DATE_KEY) AS YEAR,
+                month(b.DATE_KEY)::FLOAT AS MONTH_NO,
+                b.DATE_KEY,
+                100000 + (b.CLAIM_ID % 18) AS NAPPI9,
+                'Manufacturer ' || (b.CLAIM_ID % 18)::VARCHAR AS MANUFACTURER,
+                p.PROVIDER_NAME AS PRACTICE_NO_DESCR,
+                p.PROVIDER_CATEGORY AS CATEGORY_DESCR,
+                p.PROVIDER_GROUP,
+                p.PROVINCE AS P_PROVINCE,
+                p.PROVINCE AS PROVINCE_DESCR,
+                b.HIGH_LEVEL_1,
+                b.HIGH_LEVEL_1 || ' - Class ' || (b.CLAIM_ID % 3)::VARCHAR AS HIGH_LEVEL_2,
+                b.HIGH_LEVEL_1 || ' - Group ' || (b.CLAIM_ID % 5)::VARCHAR AS HIGH_LEVEL_3,
+                b.HIGH_LEVEL_1 || ' - Item ' || (b.CLAIM_ID % 7)::VARCHAR AS HIGH_LEVEL_4,
+                b.HIGH_LEVEL_1 AS TR_LEVEL_1,
+                NULL::VARCHAR AS LEVELS_CONCAT_TILL_2,
+                NULL::VARCHAR AS ALL_LEVELS_CONCAT,
+                NULL::VARCHAR AS ALL_LEVELS_CONCAT_4,
+                round(b.COST_BASE * b.UNITS * b.WF * 1.5, 2) AS AMT_CLAIMED_TY,
+                round(b.COST_BASE * b.UNITS * b.WF * 1.5 * (0.8 + random() * 0.4), 2) AS AMT_CLAIMED_LY,
+                round(b.COST_BASE * b.UNITS * b.WF * 1.5 * (0.88 + random() * 0.08), 2) AS AMT_PAID_TY,
+                round(b.COST_BASE * b.UNITS * b.WF * 1.5 * (0.85 + random() * 0.1), 2) AS AMT_PAID_LY,
+                b.UNITS::FLOAT AS UNITS_TY,
+                round(b.UNITS * (0.6 + random() * 0.8))::FLOAT AS UNITS_LY,
+                b.WF,
+                now() AS CREATED_DATE,
+                now() AS UPDATED_DATE
+            FROM base b
+            JOIN read_parquet('{out_dir}/DIM_PROVIDERS.parquet') p ON p.PROVIDER_ID = b.PROVIDER_IDX + 1
+            ORDER BY YEAR, P_PROVINCE, CATEGORY_DESCR
+        ) TO '{out_dir}/HEALTHCARE_CLAIMS.parquet' (FORMAT PARQUET, COMPRESSION ZSTD)
+    """)
+
+    # Pharmaceutical claims 2017-2019, joined to patients for consistent demographics
+    con.execute(f"""
+        COPY (
+            WITH base AS (
+                SELECT
+                    i AS CLAIM_ID,
+                    'P' || lpad((floor(random() * {n_patients}))::INT::VARCHAR, 7, '0') AS ENTITY_NO,
+                    (DATE '2017-01-01' + (floor(random() * 1095))::INT) AS DATE_KEY,
+                    floor(random() * {len(PRODUCTS)})::INT AS PRODUCT_IDX,
+                    floor(random() * 500)::INT AS PROVIDER_IDX,
+                    {_pick(ATC_LEVEL_1)} AS ATC_LEVEL_DESC_1,
+                    {_pick(ATC_LEVEL_3)} AS ATC_LEVEL_DESC_3,
+                    round(50 + random() * random() * 20000, 2) AS AMT_CLAIMED
+                FROM range({n_pharma}) t(i)
+            )
+            SELECT
+                b.CLAIM_ID,
+                b.ENTITY_NO,
+                b.DATE_KEY,
+                year(b.DATE_KEY) AS YEAR,
+                (year(b.DATE_KEY) * 100 + month(b.DATE_KEY))::INT AS MONTH_KEY,
+                200000 + b.PRODUCT_IDX AS NAPPI9,
+                {_pick_by(PRODUCTS, 'b.PRODUCT_IDX')} AS PRODUCT_NAME,
+                {_pick_by(MANUFACTURERS, 'b.PRODUCT_IDX')} AS NAPPI_MANUFACTURER,
+                p.AGE_BUCKET,
+                p.AGE_GROUPS,
+                p.GENDER,
+                p.PROVINCE,
+                p.REGION_OF_RESIDENCE,
+                'Plan Group ' || (b.CLAIM_ID % 5)::VARCHAR AS PLAN_GRP,
+                'Scheme ' || (b.CLAIM_ID % 12)::VARCHAR AS PLAN_SCHEME,
+                NULL::VARCHAR AS DEG_DESCR,
+                (b.CLAIM_ID % 2)::INT AS IN_OUT_HOSPITAL_IND,
+                'Dr ' || (b.CLAIM_ID % 400)::VARCHAR AS TREATING_DR,
+                '10mg' AS STRENGTH,
+                3 AS SCHEDULE,
+                30 AS PACK_SIZE,
+                'TAB' AS DOSAGE_FORM,
+                b.ATC_LEVEL_DESC_3 AS ATC_DESCRIPTION,
+                b.ATC_LEVEL_DESC_1,
+                b.ATC_LEVEL_DESC_1 || ' - Subgroup' AS ATC_LEVEL_DESC_2,
+                b.ATC_LEVEL_DESC_3,
+                b.ATC_LEVEL_DESC_3 || ' - Chemical' AS ATC_LEVEL_DESC_4,
+                b.ATC_LEVEL_DESC_3 || ' - Substance' AS ATC_LEVEL_DESC_5,
+                {_pick_by(PROVIDER_TYPES, 'b.PROVIDER_IDX')} AS PROVIDER_TYPE,
+                'Group ' || (b.PROVIDER_IDX % 6)::VARCHAR AS PROVIDER_GROUP,
+                'Provider ' || lpad(b.PROVIDER_IDX::VARCHAR, 3, '0') AS PROVIDER,
+                'Region ' || (b.PROVIDER_IDX % 25)::VARCHAR AS PROVIDER_REGION,
+                {_pick_by(PROVINCES, 'b.PROVIDER_IDX // 4')} AS PROVIDER_PROVINCE,
+                'Chronic' AS BUCKET,
+                NULL::VARCHAR AS TR_PROCEDURE_CODE_DESCRIPTION,
+                round(b.AMT_CLAIMED * 0.02, 2) AS AMT_PAID_ATB,
+                round(b.AMT_CLAIMED * 0.01, 2) AS AMT_PAID_CEB,
+                round(b.AMT_CLAIMED * 0.40, 2) AS AMT_PAID_GPN,
+                round(b.AMT_CLAIMED * 0.01, 2) AS AMT_PAID_HCC,
+                0.0 AS AMT_PAID_HCC_ADMIN,
+                round(b.AMT_CLAIMED * 0.10 * (1 + (year(b.DATE_KEY) - 2017) * 0.12), 2) AS AMT_PAID_MEM,
+                round(b.AMT_CLAIMED * 0.01, 2) AS AMT_PAID_MOB,
+                round(b.AMT_CLAIMED * 0.03, 2) AS AMT_PAID_MSA,
+                0.0 AS AMT_PAID_PFR,
+                round(b.AMT_CLAIMED * 0.05, 2) AS AMT_PAID_PMB,
+                0.0 AS AMT_PAID_PMB_CHRONIC,
+                round(b.AMT_CLAIMED * 0.06, 2) AS AMT_PAID_PROV,
+                round(b.AMT_CLAIMED * 0.01, 2) AS AMT_PAID_TP,
+                round(b.AMT_CLAIMED * 0.85, 2) AS AMT_PAID,
+                b.AMT_CLAIMED,
+                (1 + floor(random() * 3))::FLOAT AS QTY,
+                1 AS CLAIMS,
+                now() AS CREATED_DATE,
+                now() AS UPDATED_DATE
+            FROM base b
+            JOIN read_parquet('{out_dir}/DIM_PATIENTS.parquet') p USING (ENTITY_NO)
+            ORDER BY YEAR, PROVINCE, PROVIDER_TYPE
+        ) TO '{out_dir}/PHARMACEUTICAL_CLAIMS.parquet' (FORMAT PARQUET, COMPRESSION ZSTD)
+    """)
+
+def build_rollups(con, out_dir: str):
+    """Build the sql/03 rollup tables (PATIENT_COST_CATEGORIES, HIGH_VALUE_CLAIMS_RISK) from the fact files"""
+    for table in ['HEALTHCARE_CLAIMS', 'PHARMACEUTICAL_CLAIMS']:
+        con.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet('{out_dir}/{table}.parquet')")
+    for rollup, select in rollup_statements().items():
+        con.execute(f"COPY ({select}) TO '{out_dir}/{rollup}.parquet' (FORMAT PARQUET, COMPRESSION ZSTD)")
+
+def export_from_snowflake(out_dir: str):
+    """Copy the dashboard tables from the configured Snowflake account into Parquet"""
+    import pyarrow.parquet as pq
+    import snowflake.connector
+
+    from utils.snowflake_conn import load_local_connection_params
+
+    tables = ['HEALTHCARE_CLAIMS', 'PHARMACEUTICAL_CLAIMS', 'DIM_PATIENTS', 'DIM_PROVIDERS',
+              'PATIENT_COST_CATEGORIES', 'HIGH_VALUE_CLAIMS_RISK']
+    conn = snowflake.connector.connect(**load_local_connection_params())
+    try:
+        for table in tables:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT * FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.{table}")
+            writer = None
+            for batch in cursor.fetch_arrow_batches():
+                if writer is None:
+                    writer = pq.ParquetWriter(os.path.join(out_dir, f"{table}.parquet"), batch.schema,
+                                              compression='zstd')
+                writer.write_table(batch)
+            if writer is not None:
+                writer.close()
+            cursor.close()
+            print(f"✅ Exported {table}")
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local Parquet dataset for the DuckDB backend")
+    parser.add_argument('--out', default=LOCAL_DATA_DIR, help=f"Output directory (default: {LOCAL_DATA_DIR})")
+    parser.add_argument('--scale', type=float, default=1.0, help="Synthetic row-count multiplier")
+    parser.add_argument('--from-snowflake', action='store_true', help="Export real tables instead of generating")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.from_snowflake:
+        export_from_snowflake(args.out)
+    else:
+        con = duckdb.connect()
+        generate_synthetic(con, args.out, args.scale)
+        build_rollups(con, args.out)
+    print(f"📦 Local dataset ready in {args.out} - run with QHEALTH_BACKEND=duckdb")
+
+if __name__ == "__main__":
+    main()
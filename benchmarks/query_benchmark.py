@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for every registered dashboard query
+Run from the repository root:
+
+    python -m benchmarks.query_benchmark --backend duckdb --runs 10 --save baseline.json
+    python -m benchmarks.query_benchmark --backend snowflake --compare baseline.json
+
+Every query from list_queries() is run N times in two modes:
+- cold: straight to the backend with the result cache bypassed (and Snowflake's
+  warehouse result cache disabled), i.e. what a first visitor pays
+- warm: through the persistent result cache after one priming run, i.e. what a
+  repeat visitor or a restarted app pays
+
+Results can be saved as a JSON baseline; --compare flags queries whose p95 regressed.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.backends import QueryBackend, SnowflakeBackend
+from utils.queries import get_query, list_queries
+from utils.result_cache import ResultCache
+
+PRODUCTS = ['checkup_lite', 'dose', 'performance']
+MODES = ['cold', 'warm']
+LATENCY_TARGET = 3.0  # seconds - the dashboard's page load target
+
+def make_backend(name: str, data_dir: Optional[str] = None) -> QueryBackend:
+    """Create a standalone backend (no Streamlit caching involved)"""
+    if name == 'duckdb':
+        from utils.duckdb_backend import DuckDBBackend, LOCAL_DATA_DIR
+        return DuckDBBackend(data_dir or LOCAL_DATA_DIR)
+
+    import snowflake.connector
+    from utils.snowflake_conn import load_local_connection_params
+    return SnowflakeBackend(snowflake.connector.connect(**load_local_connection_params()))
+
+def _summarize(samples: List[Dict[str, float]], rows: int, size: int) -> Dict[str, Any]:
+    """Latency percentiles plus the execute/fetch split (medians) for one query and mode"""
+    totals = np.array([s['seconds'] for s in samples])
+    return {
+        'runs': len(samples),
+        'p50': round(float(np.percentile(totals, 50)), 4),
+        'p95': round(float(np.percentile(totals, 95)), 4),
+        'max': round(float(totals.max()), 4),
+        'execute_p50': round(float(np.median([s['execute_seconds'] for s in samples])), 4),
+        'fetch_p50': round(float(np.median([s['fetch_seconds'] for s in samples])), 4),
+        'rows': rows,
+        'bytes': size
+    }
+
+def _run_cold(backend: QueryBackend, query: str) -> tuple:
+    timings = {}
+    start_time = time.time()
+    df = backend.execute(query, timings=timings)
+    timings['seconds'] = time.time() - start_time
+    return df, timings
+
+def _run_warm(backend: QueryBackend, cache: ResultCache, query: str) -> tuple:
+    start_time = time.time()
+    df = cache.get(query)
+    if df is None:
+        df, timings = _run_cold(backend, query)
+        cache.put(query, None, df, ttl=-1)
+        return df, timings
+    # Served from disk: all of the time is spent reading the result back
+    elapsed = time.time() - start_time
+    return df, {'seconds': elapsed, 'execute_seconds': 0.0, 'fetch_seconds': elapsed}
+
+def run_benchmark(backend: QueryBackend, products: List[str], runs: int, modes: List[str]) -> Dict[str, Any]:
+    """Benchmark every query of the given products; failed queries are recorded, not fatal"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='qhealth_bench_') as cache_dir:
+        cache = ResultCache(directory=cache_dir, enabled=True)
+
+        for product in products:
+            for query_name in list_queries(product):
+                query = get_query(product, query_name)
+                key = f"{product}.{query_name}"
+                results[key] = {}
+
+                for mode in modes:
+                    try:
+                        if mode == 'cold':
+                            backend.execute_command("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+                            samples = [_run_cold(backend, query) for _ in range(runs)]
+                        else:
+                            backend.execute_command("ALTER SESSION SET USE_CACHED_RESULT = TRUE")
+                            _run_warm(backend, cache, query)  # priming run, not measured
+                            samples = [_run_warm(backend, cache, query) for _ in range(runs)]
+                    except Exception as e:
+                        results[key][mode] = {'error': str(e).splitlines()[0]}
+                        print(f"  {key:<40}{mode:<6} FAILED: {results[key][mode]['error']}", file=sys.stderr)
+                        continue
+
+                    df = samples[-1][0]
+                    results[key][mode] = _summarize([t for _, t in samples], len(df),
+                                                    int(df.memory_usage(deep=True).sum()))
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta: float) -> List[str]:
+    """
+    List regressions against a baseline: a query/mode whose p95 grew by more than
+    `threshold` (relative) and `min_delta` seconds (absolute, filters out noise on fast queries)
+    """
+    regressions = []
+    for key, modes in current['results'].items():
+        for mode, stats in modes.items():
+            before = baseline['results'].get(key, {}).get(mode)
+            if not before or 'p95' not in before or 'p95' not in stats:
+                continue
+            delta = stats['p95'] - before['p95']
+            if delta > min_delta and stats['p95'] > before['p95'] * (1 + threshold):
+                regressions.append(f"{key} [{mode}] p95 {before['p95']:.3f}s -> {stats['p95']:.3f}s "
+                                   f"(+{delta / max(before['p95'], 1e-9):.0%})")
+    return regressions
+
+def print_report(results: Dict[str, Any]):
+    header = (f"{'query':<40}{'mode':<6}{'p50 s':>8}{'p95 s':>8}{'max s':>8}"
+              f"{'exec s':>8}{'fetch s':>8}{'rows':>9}{'KB':>10}")
+    print(header)
+    print('-' * len(header))
+    for key, modes in results.items():
+        for mode, s in modes.items():
+            if 'error' in s:
+                print(f"{key:<40}{mode:<6}  error: {s['error'][:60]}")
+                continue
+            flag = '  !' if s['p95'] > LATENCY_TARGET else ''
+            print(f"{key:<40}{mode:<6}{s['p50']:>8.3f}{s['p95']:>8.3f}{s['max']:>8.3f}"
+                  f"{s['execute_p50']:>8.3f}{s['fetch_p50']:>8.3f}{s['rows']:>9}{s['bytes'] / 1024:>10.1f}{flag}")
+    print(f"\n! = p95 above the {LATENCY_TARGET:.0f}s page load target")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every registered dashboard query")
+    parser.add_argument('--backend', choices=['snowflake', 'duckdb'], default='snowflake')
+    parser.add_argument('--data-dir', help="Parquet directory for the duckdb backend")
+    parser.add_argument('--runs', type=int, default=5, help="Measured runs per query and mode")
+    parser.add_argument('--products', nargs='+', choices=PRODUCTS, default=PRODUCTS)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--save', help="Write results to this JSON baseline file")
+    parser.add_argument('--compare', help="Diff results against this JSON baseline file")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Relative p95 increase that counts as a regression")
+    parser.add_argument('--min-delta', type=float, default=0.05, help="Ignore p95 increases smaller than this (seconds)")
+    args = parser.parse_args()
+
+    backend = make_backend(args.backend, args.data_dir)
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'backend': backend.name,
+        'runs': args.runs,
+        'results': run_benchmark(backend, args.products, args.runs, args.modes)
+    }
+    print_report(report['results'])
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('backend') != report['backend']:
+            print(f"Warning: baseline was recorded on {baseline.get('backend')}, this run used {report['backend']}")
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,24 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
+import pandas as pd
 from datetime import datetime
 import time
 
 # Import custom modules
-from utils.snowflake_conn import get_snowflake_connection, test_connection, execute_query, execute_cache_clear_query, clear_snowflake_cache_sis
+from utils.snowflake_conn import get_snowflake_connection, test_connection, get_database_info, execute_cache_clear_query, clear_snowflake_cache_sis
 from utils.viz_components import create_metric_card, create_performance_monitor
+from utils.connection_pool import ConnectionPool
+from utils.result_cache import get_result_cache
+from utils.single_flight import get_query_flights
+from utils.admission import PRIORITY_CLASSES, get_admission_controller
+from utils.dataset_store import get_dataset_store
+from utils.figure_cache import get_figure_cache
+from utils.backends import get_backend
+from utils.catalog import get_catalog_statistics
+from utils.data_versions import get_version_probe
+from utils.exports import get_export_cache
+from utils.profiling import profile_rerun
 
 # Page configuration
 st.set_page_config(
@@ -69,6 +81,7 @@ def initialize_session_state():
     if 'connection_status' not in st.session_state:
         st.session_state.connection_status = 'Not Connected'
 
+@profile_rerun('main')
 def main():
     # Initialize session state
     initialize_session_state()
@@ -105,6 +118,61 @@ def main():
             if st.session_state.connection_status != 'Connected ✅':
                 if st.button("🔄 Retry Connection", key="retry_conn"):
                     st.rerun()
+            
+            # Pool occupancy for sizing against concurrent dashboard users
+            if isinstance(st.session_state.snowflake_connection, ConnectionPool):
+                with st.expander("📊 Connection Pool"):
+                    pool_stats = st.session_state.snowflake_connection.metrics()
+                    st.metric("In Use", f"{pool_stats['in_use']}/{pool_stats['max_size']}",
+                              f"{pool_stats['idle']} idle")
+                    st.metric("Waiting Sessions", pool_stats['waiters'])
+                    st.metric("Avg Checkout Wait", f"{pool_stats['avg_wait_seconds'] * 1000:.0f}ms",
+                              f"max {pool_stats['max_wait_seconds'] * 1000:.0f}ms", delta_color="off")
+                    st.caption(f"Opened {pool_stats['created']} • replaced {pool_stats['replaced']} • "
+                               f"expired {pool_stats['expired']} • timeouts {pool_stats['timeouts']}")
+            
+            # Identical concurrent queries answered by one warehouse execution
+            with st.expander("🔀 Query Coalescing"):
+                flight_stats = get_query_flights().metrics()
+                st.metric("Warehouse Executions", flight_stats['executions'], f"{flight_stats['in_flight']} in flight",
+                          delta_color="off")
+                st.metric("Coalesced Requests", flight_stats['coalesced'],
+                          f"{flight_stats['coalesced_ratio']:.0%} of requests", delta_color="off")
+                st.caption(f"Avg shared wait {flight_stats['avg_wait_seconds'] * 1000:.0f}ms • "
+                           f"max {flight_stats['max_waiters']} waiters on one query • errors {flight_stats['errors']}")
+            
+            # Warehouse slots and admission waits by priority class
+            with st.expander("🚦 Admission Control"):
+                admission_stats = get_admission_controller().metrics()
+                st.metric("Running Queries", f"{admission_stats['running']}/{admission_stats['max_concurrent']}",
+                          f"{admission_stats['waiting']} waiting", delta_color="off")
+                for priority in PRIORITY_CLASSES:
+                    class_stats = admission_stats['classes'][priority]
+                    st.caption(f"**{priority}**: {class_stats['admitted']} admitted • {class_stats['waiting']} waiting • "
+                               f"avg wait {class_stats['avg_wait_seconds'] * 1000:.0f}ms • "
+                               f"max {class_stats['max_wait_seconds'] * 1000:.0f}ms • timeouts {class_stats['timeouts']}")
+            
+            # Dashboard datasets shared by all sessions
+            with st.expander("🗄️ Shared Datasets"):
+                store_stats = get_dataset_store().metrics()
+                st.metric("Stored Datasets", store_stats['entries'], f"{store_stats['sessions']} session references",
+                          delta_color="off")
+                st.metric("Memory", f"{store_stats['bytes'] / 1e6:,.1f} MB",
+                          f"of {store_stats['max_bytes'] / 1e6:,.0f} MB cap", delta_color="off")
+                st.caption(f"Hits {store_stats['hits']} • loads {store_stats['stored']} • "
+                           f"evictions {store_stats['evictions']}")
+                for dataset in store_stats['datasets']:
+                    st.caption(f"**{dataset['name']}**: {dataset['bytes'] / 1e6:,.1f} MB • "
+                               f"{dataset['sessions']} sessions • {dataset['hits']} hits • "
+                               f"{dataset['age_seconds'] / 60:.0f} min old")
+            
+            # Figures reused across reruns and sessions
+            with st.expander("🖼️ Figure Cache"):
+                figure_stats = get_figure_cache().metrics()
+                st.metric("Hit Rate", f"{figure_stats['hit_rate']:.0%}",
+                          f"{figure_stats['hits']} hits • {figure_stats['misses']} builds", delta_color="off")
+                st.caption(f"{figure_stats['entries']} figures • {figure_stats['bytes'] / 1e6:,.1f} MB of "
+                           f"{figure_stats['max_bytes'] / 1e6:,.0f} MB • evictions {figure_stats['evictions']}")
         
         st.markdown("---")
         
@@ -123,6 +191,10 @@ def main():
         if st.button("🎨 Visualisations Gallery", key="visualisations", help="Showcase of Advanced Visualizations"):
             st.switch_page("pages/visualisations.py")
 
+        # Query Performance
+        if st.button("⏱️ Query Performance", key="performance", help="Query latency telemetry vs the 3s target"):
+            st.switch_page("pages/performance.py")
+
         st.markdown("---")
         
         # Cache Management
@@ -181,6 +253,18 @@ def main():
                     st.cache_data.clear()
                     st.cache_resource.clear()
                     
+                    # Clear persisted query results so the next load hits the warehouse
+                    get_result_cache().clear()
+                    
+                    # Clear the process-wide dataset, figure, export, catalog and table version caches
+                    get_dataset_store().clear()
+                    get_figure_cache().clear()
+                    get_export_cache().clear()
+                    get_catalog_statistics().clear()
+                    get_version_probe().clear()
+                    for lease in ('dose_dataset', 'checkup_lite_dataset'):
+                        st.session_state.pop(lease, None)
+                    
                     # Clear specific connection cache by clearing session state
                     if 'snowflake_connection' in st.session_state:
                         st.session_state.snowflake_connection = None
@@ -292,15 +376,10 @@ def main():
             # Get real data from Snowflake
             conn = st.session_state.snowflake_connection
             
-            # Query for healthcare claims count
-            healthcare_query = "SELECT COUNT(*) as count FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS"
-            healthcare_df = execute_query(conn, healthcare_query)
-            healthcare_count = healthcare_df['COUNT'].iloc[0] if not healthcare_df.empty else 0
-            
-            # Query for pharmaceutical claims count  
-            pharma_query = "SELECT COUNT(*) as count FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.PHARMACEUTICAL_CLAIMS"
-            pharma_df = execute_query(conn, pharma_query)
-            pharma_count = pharma_df['COUNT'].iloc[0] if not pharma_df.empty else 0
+            # Row counts from table metadata - the home page never scans the fact tables
+            info = get_database_info(conn)
+            healthcare_count = info.get('checkup_lite_records', 0)
+            pharma_count = info.get('dose_records', 0)
             
             # Create visualization with real data
             fig = px.bar(
@@ -313,6 +392,14 @@ def main():
             fig.update_layout(height=400, showlegend=False)
             st.plotly_chart(fig, use_container_width=True)
             
+            # Date coverage and storage per product from the same cached catalog statistics
+            catalog = get_catalog_statistics().statistics(get_backend(conn)).set_index('TABLE_NAME')
+            for product, table in [('Q.CheckUp Lite', 'HEALTHCARE_CLAIMS'), ('Q.Dose', 'PHARMACEUTICAL_CLAIMS')]:
+                if table in catalog.index and pd.notna(catalog.loc[table, 'MIN_DATE']):
+                    row = catalog.loc[table]
+                    st.caption(f"{product}: {row['MIN_DATE']:%Y-%m-%d} to {row['MAX_DATE']:%Y-%m-%d} • "
+                               f"{row['BYTES'] / 1e6:,.0f} MB")
+            
         except Exception as e:
             st.error(f"Failed to load data: {str(e)}")
             # Fallback to basic message
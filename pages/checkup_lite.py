@@ -7,13 +7,24 @@ import time
 from datetime import datetime, timedelta
 
 # Import custom modules
-from utils.snowflake_conn import ensure_connection, execute_query
+from utils.snowflake_conn import ensure_connection, iter_query_results
 from utils.viz_components import (
     create_metric_card, create_kpi_dashboard, create_geographic_map,
     create_hierarchy_sunburst, create_provider_performance_chart,
-    create_trend_analysis, display_data_table, create_performance_monitor
+    create_trend_analysis, display_data_table, create_performance_monitor,
+    create_section_placeholders, render_ready_sections, show_chart
 )
-from utils.queries import get_query
+from utils.queries import (
+    build_checkup_lite_query, normalize_checkup_lite_filters, get_cache_ttl, get_query_priority,
+    CHECKUP_LITE_DATE_RANGES, CHECKUP_LITE_PROVINCES, CHECKUP_LITE_PROVIDER_TYPES, list_queries
+)
+from utils.backends import get_backend
+from utils.data_versions import dataset_version
+from utils.dataset_store import get_dataset_store
+from utils.figure_cache import build_figure
+from utils.olap_engine import OLAP_ENABLED, get_claims_cube_store
+from utils.tracing import trace_rerun, traced
+from utils.profiling import profile_rerun
 
 # Page configuration
 st.set_page_config(
@@ -54,48 +65,75 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_checkup_lite_data(conn):
-    """Load all Q.CheckUp Lite data with performance monitoring"""
+@traced(cat='loader')
+def load_checkup_lite_data(conn, filters=None, on_section_ready=None):
+    """
+    Load all Q.CheckUp Lite data for the normalized filters with performance monitoring.
+    on_section_ready(partial_data) is called whenever more section data is available.
+    'failed_sections' lists the queries that failed (their sections are empty).
+    """
     start_time = time.time()
     
     try:
         with st.spinner("🔄 Loading Q.CheckUp Lite analytics..."):
             
-            # Load overview KPIs
-            overview_df = execute_query(conn, get_query('checkup_lite', 'overview_kpis'))
-            
-            # Load province performance
-            province_df = execute_query(conn, get_query('checkup_lite', 'province_performance'))
-            
-            # Load provider analysis
-            provider_df = execute_query(conn, get_query('checkup_lite', 'provider_analysis'))
+            # Overview, province and trend sections come from the shared in-memory cube once it is
+            # built for the current data, so filter changes only re-query the sections it cannot answer
+            cube = get_claims_cube_store(conn).current() if OLAP_ENABLED else None
             
-            # Load product hierarchy
-            hierarchy_df = execute_query(conn, get_query('checkup_lite', 'product_hierarchy'))
-            
-            # Load monthly trends
-            trends_df = execute_query(conn, get_query('checkup_lite', 'monthly_trends'))
+            sections = {
+                'overview': 'overview_kpis',
+                'provinces': 'province_performance',
+                'providers': 'provider_analysis',
+                'hierarchy': 'product_hierarchy',
+                'trends': 'monthly_trends',
+                'high_value': 'high_value_claims'
+            }
+            queries = {name: build_checkup_lite_query(query_name, filters) for name, query_name in sections.items()}
+            priorities = {name: get_query_priority('checkup_lite', query_name) for name, query_name in sections.items()}
+            query_timings = {}
+            query_failures = {}
+            results = {}
+            first_content_time = None
+            if cube is not None:
+                for name, answer in [('overview', cube.overview), ('trends', cube.trends),
+                                     ('provinces', lambda f: cube.breakdown('province', f))]:
+                    cube_start = time.time()
+                    results[name] = answer(filters)
+                    query_timings[name] = time.time() - cube_start
+                    del queries[name]
+                # Cube sections are ready before any SQL returns
+                first_content_time = time.time() - start_time
+                if on_section_ready is not None:
+                    on_section_ready(results)
             
-            # Load high-value claims
-            high_value_df = execute_query(conn, get_query('checkup_lite', 'high_value_claims'))
+            # Submit the remaining section queries at once - each section renders as its result lands.
+            # Filters are pushed into the SQL as bind parameters, so they are part of every cache key.
+            for name, df in iter_query_results(conn, queries, timings=query_timings,
+                                               ttl=get_cache_ttl('checkup_lite'), priorities=priorities,
+                                               failures=query_failures):
+                results[name] = df
+                if first_content_time is None:
+                    first_content_time = time.time() - start_time
+                if on_section_ready is not None:
+                    on_section_ready(results)
             
             load_time = time.time() - start_time
             create_performance_monitor(load_time, target_time=3.0)
             
             return {
-                'overview': overview_df,
-                'provinces': province_df,
-                'providers': provider_df,
-                'hierarchy': hierarchy_df,
-                'trends': trends_df,
-                'high_value': high_value_df,
-                'load_time': load_time
+                **results,
+                'load_time': load_time,
+                'first_content_time': first_content_time,
+                'query_timings': query_timings,
+                'failed_sections': sorted(query_failures)
             }
     
     except Exception as e:
         st.error(f"Error loading Q.CheckUp Lite data: {str(e)}")
         return None
 
+@traced(cat='section')
 def create_overview_section(data):
     """Create overview KPI section"""
     st.markdown('<h2 class="section-header">📊 Overview Dashboard</h2>', unsafe_allow_html=True)
@@ -138,6 +176,7 @@ def create_overview_section(data):
             f"R{overview['TOTAL_PAID_AMOUNT']:,.0f} paid"
         )
 
+@traced(cat='section')
 def create_geographic_analysis(data):
     """Create geographic analysis section"""
     st.markdown('<h2 class="section-header">🗺️ Geographic Distribution</h2>', unsafe_allow_html=True)
@@ -160,7 +199,7 @@ def create_geographic_analysis(data):
             color_continuous_scale='Blues'
         )
         fig.update_layout(height=400, xaxis_tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Top provinces by volume
@@ -185,6 +224,7 @@ def create_geographic_analysis(data):
     </div>
     """, unsafe_allow_html=True)
 
+@traced(cat='section')
 def create_provider_analysis(data):
     """Create provider performance analysis"""
     st.markdown('<h2 class="section-header">🏥 Provider Performance</h2>', unsafe_allow_html=True)
@@ -198,7 +238,7 @@ def create_provider_analysis(data):
     
     with col1:
         # Claims by provider category
-        category_summary = data['providers'].groupby('PROVIDER_CATEGORY').agg({
+        category_summary = data['providers'].groupby('PROVIDER_CATEGORY', observed=True).agg({
             'TOTAL_CLAIMS': 'sum',
             'TOTAL_PAID': 'sum',
             'UNIQUE_PATIENTS': 'sum'
@@ -211,7 +251,7 @@ def create_provider_analysis(data):
             title="Claims Distribution by Provider Type"
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Approval rate by provider type
@@ -227,7 +267,7 @@ def create_provider_analysis(data):
             color_continuous_scale='RdYlGn'
         )
         fig.update_layout(height=400, xaxis_tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # Top performers table
     st.subheader("🌟 Top Performing Providers")
@@ -237,6 +277,7 @@ def create_provider_analysis(data):
     ]
     st.dataframe(top_providers, use_container_width=True)
 
+@traced(cat='section')
 def create_product_analysis(data):
     """Create product hierarchy analysis"""
     st.markdown('<h2 class="section-header">🧬 Product Analysis</h2>', unsafe_allow_html=True)
@@ -246,7 +287,7 @@ def create_product_analysis(data):
         return
     
     # Product category performance
-    level_1_summary = data['hierarchy'].groupby('LEVEL_1').agg({
+    level_1_summary = data['hierarchy'].groupby('LEVEL_1', observed=True).agg({
         'TOTAL_CLAIMS': 'sum',
         'TOTAL_CLAIMED': 'sum',
         'TOTAL_PAID': 'sum'
@@ -256,7 +297,8 @@ def create_product_analysis(data):
     
     with col1:
         # Claims by product category with improved Snowflake compatibility
-        fig = px.treemap(
+        fig = build_figure(
+            px.treemap,
             level_1_summary,
             path=['LEVEL_1'],
             values='TOTAL_CLAIMS',
@@ -278,7 +320,7 @@ def create_product_analysis(data):
             font=dict(size=10),
             margin=dict(t=50, l=25, r=25, b=25)
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Top product categories
@@ -304,6 +346,7 @@ def create_product_analysis(data):
     </div>
     """, unsafe_allow_html=True)
 
+@traced(cat='section')
 def create_trends_analysis(data):
     """Create trends and patterns analysis"""
     st.markdown('<h2 class="section-header">📈 Trends & Patterns</h2>', unsafe_allow_html=True)
@@ -319,7 +362,7 @@ def create_trends_analysis(data):
         'TOTAL_CLAIMS',
         title="Monthly Claims Volume Trend"
     )
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
     
     # Seasonal analysis
     col1, col2 = st.columns(2)
@@ -357,7 +400,7 @@ def create_trends_analysis(data):
             # If trend line fails, continue without it
             pass
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Average claim value trend
@@ -369,8 +412,9 @@ def create_trends_analysis(data):
             markers=True
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
 
+@traced(cat='section')
 def create_risk_analysis(data):
     """Create risk and fraud analysis"""
     st.markdown('<h2 class="section-header">⚠️ Risk Analysis</h2>', unsafe_allow_html=True)
@@ -398,11 +442,11 @@ def create_risk_analysis(data):
                 'Normal': '#28a745'
             }
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # High-value claims by province
-        province_risk = data['high_value'].groupby('PROVINCE_DESCR').agg({
+        province_risk = data['high_value'].groupby('PROVINCE_DESCR', observed=True).agg({
             'TOTAL_CLAIM_AMOUNT': ['count', 'sum', 'mean']
         }).round(2)
         province_risk.columns = ['High Value Claims', 'Total Amount', 'Avg Amount']
@@ -417,7 +461,7 @@ def create_risk_analysis(data):
             color_continuous_scale='Reds'
         )
         fig.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # Risk alerts table
     st.subheader("🚨 Risk Alerts - High-Value Claims")
@@ -427,6 +471,8 @@ def create_risk_analysis(data):
     ].head(20)
     st.dataframe(risk_table, use_container_width=True)
 
+@profile_rerun('checkup_lite')
+@trace_rerun('checkup_lite')
 def main():
     # Ensure Snowflake connection
     conn = ensure_connection()
@@ -450,49 +496,70 @@ def main():
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            date_range = st.selectbox("Date Range", ["Last 12 months", "Last 6 months", "Last 3 months"])
+            date_range = st.selectbox("Date Range", list(CHECKUP_LITE_DATE_RANGES))
         with col2:
-            province_filter = st.selectbox("Province", ["All", "Gauteng", "Western Cape", "KwaZulu-Natal"])
+            province_filter = st.selectbox("Province", CHECKUP_LITE_PROVINCES)
         with col3:
-            provider_type = st.selectbox("Provider Type", ["All", "Hospitals", "Pharmacies", "Specialists"])
+            provider_type = st.selectbox("Provider Type", CHECKUP_LITE_PROVIDER_TYPES)
         with col4:
             refresh_data = st.button("🔄 Refresh Data")
         
         st.markdown('</div>', unsafe_allow_html=True)
     
-    # Load data
-    if 'checkup_lite_data' not in st.session_state or refresh_data:
-        st.session_state.checkup_lite_data = load_checkup_lite_data(conn)
-    
-    data = st.session_state.checkup_lite_data
+    # Sections in page order with the data key each one needs. Placeholders are laid out
+    # first and filled as results arrive, so the KPIs show without waiting for the slowest query.
+    sections = [
+        (create_overview_section, 'overview'),
+        (create_geographic_analysis, 'provinces'),
+        (create_provider_analysis, 'providers'),
+        (create_product_analysis, 'hierarchy'),
+        (create_trends_analysis, 'trends'),
+        (create_risk_analysis, 'high_value')
+    ]
+    status = st.container()
+    placeholders = create_section_placeholders(len(sections))
+    rendered = set()
+    
+    # Load data - one shared copy per filter selection and data version serves every session;
+    # this session's lease keeps it counted until the filters or the data change
+    filters = normalize_checkup_lite_filters(date_range, province_filter, provider_type)
+    store = get_dataset_store()
+    name = f"checkup_lite{sorted(filters.items())}" if filters else 'checkup_lite'
+    version = dataset_version(get_backend(conn), [build_checkup_lite_query(query_name, filters)[0]
+                                                  for query_name in list_queries('checkup_lite')])
+    data = None if refresh_data else store.get(name, version)
+    if data is None:
+        with status:
+            data = load_checkup_lite_data(
+                conn, filters,
+                on_section_ready=lambda partial: render_ready_sections(sections, placeholders, partial, rendered)
+            )
+        if data is not None and data['failed_sections']:
+            # A partial dataset stays with this run only; the next run retries the failed queries
+            st.session_state.pop('checkup_lite_dataset', None)
+            st.warning(f"Incomplete data (failed: {', '.join(data['failed_sections'])}) - not shared, retried on the next run")
+        elif data is not None:
+            data = store.put(name, version, data)
+    shared = data is not None and not data['failed_sections']
+    if shared and getattr(st.session_state.get('checkup_lite_dataset'), 'key', None) != (name, version):
+        st.session_state.checkup_lite_dataset = store.lease(name, version)
     
     if data is None:
+        for placeholder in placeholders:
+            placeholder.empty()
         st.error("Failed to load Q.CheckUp Lite data")
         return
     
-    # Create dashboard sections
-    create_overview_section(data)
-    
-    st.markdown("---")
-    create_geographic_analysis(data)
-    
-    st.markdown("---")
-    create_provider_analysis(data)
-    
-    st.markdown("---")
-    create_product_analysis(data)
-    
-    st.markdown("---")
-    create_trends_analysis(data)
-    
-    st.markdown("---")
-    create_risk_analysis(data)
+    # Create dashboard sections (all at once when served from the dataset store)
+    render_ready_sections(sections, placeholders, data, rendered)
     
     # Footer with performance stats
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Dashboard Load Time", f"{data['load_time']:.1f}s", "Target: <3s")
+        if data.get('first_content_time') is not None:
+            st.caption(f"First section after {data['first_content_time']:.1f}s")
     with col2:
         st.metric("Total Records Analyzed", f"{data['overview'].iloc[0]['TOTAL_CLAIMS']:,.0f}" if not data['overview'].empty else "0")
     with col3:
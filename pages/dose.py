@@ -7,13 +7,22 @@ import time
 from datetime import datetime
 
 # Import custom modules
-from utils.snowflake_conn import ensure_connection, execute_query
+from utils.snowflake_conn import ensure_connection, iter_query_results
 from utils.viz_components import (
     create_metric_card, create_kpi_dashboard, create_hierarchy_sunburst,
     create_trend_analysis, create_financial_breakdown, create_anomaly_detection_chart,
-    display_data_table, create_performance_monitor
+    display_data_table, create_performance_monitor, create_section_placeholders, render_ready_sections,
+    show_chart
 )
-from utils.queries import get_query
+from utils.queries import get_query, get_cache_ttl, get_query_priority, list_queries
+from utils.backends import get_backend
+from utils.data_versions import dataset_version
+from utils.dataset_store import get_dataset_store
+from utils.figure_cache import build_figure, cached_figure
+from utils.dose_cube import DOSE_CUBE_MODE, DOSE_CUBE_QUERY, split_dose_cube
+from utils.aggregate_router import RoutingError, route_aggregate
+from utils.tracing import trace_rerun, traced
+from utils.profiling import profile_rerun
 
 # Page configuration
 st.set_page_config(
@@ -69,56 +78,101 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_dose_data(conn):
-    """Load all Q.Dose pharmaceutical data with performance monitoring"""
+# Patients and benefit paid per cost tier over every patient - only PATIENT_COST_CATEGORIES (sql/03)
+# classifies patients by cost, so the aggregate router answers it from that rollup
+COST_TIER_REQUEST = ('PHARMACEUTICAL_CLAIMS', ['patients', 'paid'], ['COST_CATEGORY'])
+
+def cost_tier_query(conn):
+    """Routed (sql, params) for the cost tier breakdown, or None when no available source has cost tiers"""
+    try:
+        sql, params, _, _ = route_aggregate(conn, *COST_TIER_REQUEST)
+    except RoutingError:
+        return None
+    return sql, params
+
+@traced(cat='loader')
+def load_dose_data(conn, on_section_ready=None):
+    """
+    Load all Q.Dose pharmaceutical data with performance monitoring.
+    on_section_ready(partial_data) is called whenever another query's result arrives.
+    'failed_sections' lists the queries that failed (their sections are empty).
+    """
     start_time = time.time()
     
     try:
         with st.spinner("💊 Loading Q.Dose pharmaceutical analytics..."):
             
-            # Load overview KPIs
-            overview_df = execute_query(conn, get_query('dose', 'overview_kpis'))
-            
-            # Load ATC hierarchy analysis
-            atc_df = execute_query(conn, get_query('dose', 'atc_hierarchy'))
-            
-            # Load Multiple Sclerosis specific analysis
-            ms_df = execute_query(conn, get_query('dose', 'ms_analysis'))
-            
-            # Load patient demographics
-            demographics_df = execute_query(conn, get_query('dose', 'patient_demographics'))
-            
-            # Load provider prescribing patterns
-            providers_df = execute_query(conn, get_query('dose', 'provider_patterns'))
+            # Submit every section query at once - sections render as their results land
+            query_timings = {}
+            query_failures = {}
+            if DOSE_CUBE_MODE:
+                # One GROUPING SETS scan answers six sections; split it back into their frames
+                # The cube carries the overview KPIs, so it is admitted at KPI priority
+                queries = {
+                    'cube': DOSE_CUBE_QUERY,
+                    'ms_analysis': get_query('dose', 'ms_analysis'),
+                    'high_cost': get_query('dose', 'high_cost_patients')
+                }
+                priorities = {
+                    'cube': get_query_priority('dose', 'overview_kpis'),
+                    'ms_analysis': get_query_priority('dose', 'ms_analysis'),
+                    'high_cost': get_query_priority('dose', 'high_cost_patients')
+                }
+            else:
+                sections = {
+                    'overview': 'overview_kpis',
+                    'atc': 'atc_hierarchy',
+                    'ms_analysis': 'ms_analysis',
+                    'demographics': 'patient_demographics',
+                    'providers': 'provider_patterns',
+                    'financial': 'financial_breakdown',
+                    'trends': 'yearly_trends',
+                    'high_cost': 'high_cost_patients'
+                }
+                queries = {name: get_query('dose', query_name) for name, query_name in sections.items()}
+                priorities = {name: get_query_priority('dose', query_name) for name, query_name in sections.items()}
+            cost_tiers = cost_tier_query(conn)
+            if cost_tiers is not None:
+                queries['cost_tiers'] = cost_tiers
+                priorities['cost_tiers'] = get_query_priority('dose', 'high_cost_patients')
             
-            # Load financial breakdown
-            financial_df = execute_query(conn, get_query('dose', 'financial_breakdown'))
-            
-            # Load yearly trends
-            trends_df = execute_query(conn, get_query('dose', 'yearly_trends'))
-            
-            # Load high-cost patients
-            high_cost_df = execute_query(conn, get_query('dose', 'high_cost_patients'))
+            results = {}
+            first_content_time = None
+            for name, df in iter_query_results(conn, queries, timings=query_timings, ttl=get_cache_ttl('dose'),
+                                               priorities=priorities, failures=query_failures):
+                if name == 'cube':
+                    cube = split_dose_cube(df)
+                    results.update({
+                        'overview': cube['overview_kpis'],
+                        'atc': cube['atc_hierarchy'],
+                        'demographics': cube['patient_demographics'],
+                        'providers': cube['provider_patterns'],
+                        'financial': cube['financial_breakdown'],
+                        'trends': cube['yearly_trends']
+                    })
+                else:
+                    results[name] = df
+                if first_content_time is None:
+                    first_content_time = time.time() - start_time
+                if on_section_ready is not None:
+                    on_section_ready(results)
             
             load_time = time.time() - start_time
             create_performance_monitor(load_time, target_time=3.0)
             
             return {
-                'overview': overview_df,
-                'atc': atc_df,
-                'ms_analysis': ms_df,
-                'demographics': demographics_df,
-                'providers': providers_df,
-                'financial': financial_df,
-                'trends': trends_df,
-                'high_cost': high_cost_df,
-                'load_time': load_time
+                **results,
+                'load_time': load_time,
+                'first_content_time': first_content_time,
+                'query_timings': query_timings,
+                'failed_sections': sorted(query_failures)
             }
     
     except Exception as e:
         st.error(f"Error loading Q.Dose data: {str(e)}")
         return None
 
+@traced(cat='section')
 def create_overview_section(data):
     """Create pharmaceutical overview KPI section"""
     st.markdown('<h2 class="section-header">💊 Pharmaceutical Overview (2017-2019)</h2>', unsafe_allow_html=True)
@@ -192,6 +246,7 @@ def create_overview_section(data):
             overview['UNIQUE_PATIENTS'] / overview['UNIQUE_PROVIDERS']
         ), unsafe_allow_html=True)
 
+@traced(cat='section')
 def create_ms_analysis_section(data):
     """Create Multiple Sclerosis focused analysis"""
     st.markdown('<h2 class="section-header">🧠 Multiple Sclerosis Drug Analysis</h2>', unsafe_allow_html=True)
@@ -224,11 +279,12 @@ def create_ms_analysis_section(data):
             color_continuous_scale='Reds'
         )
         fig.update_layout(height=500, yaxis={'categoryorder': 'total ascending'})
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # MS drugs by total cost
-        fig = px.treemap(
+        fig = build_figure(
+            px.treemap,
             data['ms_analysis'].head(15),
             path=['NAPPI_MANUFACTURER', 'PRODUCT_NAME'],
             values='TOTAL_BENEFIT_PAID',
@@ -237,11 +293,11 @@ def create_ms_analysis_section(data):
             color_continuous_scale='OrRd'
         )
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # MS geographic distribution
     st.subheader("🗺️ MS Treatment Geographic Distribution")
-    ms_geographic = data['ms_analysis'].groupby('PROVIDER_PROVINCE').agg({
+    ms_geographic = data['ms_analysis'].groupby('PROVIDER_PROVINCE', observed=True).agg({
         'PRESCRIPTION_COUNT': 'sum',
         'TOTAL_BENEFIT_PAID': 'sum',
         'UNIQUE_PATIENTS': 'sum'
@@ -261,7 +317,7 @@ def create_ms_analysis_section(data):
         }
     )
     fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
     
     # MS insights
     st.markdown("""
@@ -276,6 +332,7 @@ def create_ms_analysis_section(data):
     </div>
     """, unsafe_allow_html=True)
 
+@traced(cat='section')
 def create_atc_hierarchy_analysis(data):
     """Create ATC pharmaceutical hierarchy analysis"""
     st.markdown('<h2 class="section-header">🧬 ATC Drug Classification Analysis</h2>', unsafe_allow_html=True)
@@ -285,7 +342,7 @@ def create_atc_hierarchy_analysis(data):
         return
     
     # ATC Level 1 summary
-    level_1_summary = data['atc'].groupby(['ATC_LEVEL_1_CODE', 'ATC_LEVEL_DESC_1']).agg({
+    level_1_summary = data['atc'].groupby(['ATC_LEVEL_1_CODE', 'ATC_LEVEL_DESC_1'], observed=True).agg({
         'TOTAL_PRESCRIPTIONS': 'sum',
         'TOTAL_BENEFIT_PAID': 'sum',
         'UNIQUE_PATIENTS': 'sum'
@@ -302,7 +359,7 @@ def create_atc_hierarchy_analysis(data):
             title="Prescriptions by ATC Level 1 Category"
         )
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Cost vs Volume analysis
@@ -319,7 +376,7 @@ def create_atc_hierarchy_analysis(data):
             }
         )
         fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # Detailed ATC breakdown
     st.subheader("📊 Detailed ATC Breakdown")
@@ -328,6 +385,7 @@ def create_atc_hierarchy_analysis(data):
     atc_table.columns = ['ATC Code', 'Description', 'Prescriptions', 'Benefits Paid (R)', 'Patients']
     st.dataframe(atc_table, use_container_width=True)
 
+@traced(cat='section')
 def create_patient_demographics_analysis(data):
     """Create patient demographics analysis"""
     st.markdown('<h2 class="section-header">👥 Patient Demographics</h2>', unsafe_allow_html=True)
@@ -341,7 +399,7 @@ def create_patient_demographics_analysis(data):
     
     with col1:
         # Age distribution
-        age_summary = data['demographics'].groupby('AGE_BUCKET').agg({
+        age_summary = data['demographics'].groupby('AGE_BUCKET', observed=True).agg({
             'UNIQUE_PATIENTS': 'sum',
             'TOTAL_PRESCRIPTIONS': 'sum',
             'TOTAL_BENEFIT_PAID': 'sum'
@@ -356,11 +414,11 @@ def create_patient_demographics_analysis(data):
             color_continuous_scale='Blues'
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Gender analysis
-        gender_summary = data['demographics'].groupby('GENDER').agg({
+        gender_summary = data['demographics'].groupby('GENDER', observed=True).agg({
             'UNIQUE_PATIENTS': 'sum',
             'TOTAL_PRESCRIPTIONS': 'sum',
             'TOTAL_BENEFIT_PAID': 'sum'
@@ -373,11 +431,11 @@ def create_patient_demographics_analysis(data):
             title="Patient Distribution by Gender"
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # Provincial demographics
     st.subheader("🗺️ Demographics by Province")
-    province_demo = data['demographics'].groupby('PROVINCE').agg({
+    province_demo = data['demographics'].groupby('PROVINCE', observed=True).agg({
         'UNIQUE_PATIENTS': 'sum',
         'TOTAL_PRESCRIPTIONS': 'sum',
         'TOTAL_BENEFIT_PAID': 'sum',
@@ -403,8 +461,9 @@ def create_patient_demographics_analysis(data):
     
     fig.update_layout(height=400, showlegend=False)
     fig.update_xaxes(tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 
+@traced(cat='section')
 def create_provider_patterns_analysis(data):
     """Create provider prescribing patterns analysis"""
     st.markdown('<h2 class="section-header">🏥 Provider Prescribing Patterns</h2>', unsafe_allow_html=True)
@@ -414,7 +473,7 @@ def create_provider_patterns_analysis(data):
         return
     
     # Provider type analysis
-    provider_type_summary = data['providers'].groupby('PROVIDER_TYPE').agg({
+    provider_type_summary = data['providers'].groupby('PROVIDER_TYPE', observed=True).agg({
         'TOTAL_PRESCRIPTIONS': 'sum',
         'UNIQUE_PATIENTS': 'sum',
         'TOTAL_BENEFIT_PAID': 'sum',
@@ -434,7 +493,7 @@ def create_provider_patterns_analysis(data):
             color_continuous_scale='Viridis'
         )
         fig.update_layout(height=400, xaxis_tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Provider efficiency (patients per prescription)
@@ -450,7 +509,7 @@ def create_provider_patterns_analysis(data):
             title="Provider Efficiency: Volume vs Value"
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # Fraud detection analysis
     st.subheader("🚨 Potential Fraud Indicators")
@@ -464,9 +523,10 @@ def create_provider_patterns_analysis(data):
         fig = create_anomaly_detection_chart(
             data['providers'], 
             'AVG_PRESCRIPTION_VALUE',
-            threshold=2.0
+            threshold=3.5,
+            method='robust'
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
         
         st.subheader("⚠️ High-Risk Providers")
         risk_table = high_value_providers[
@@ -475,15 +535,10 @@ def create_provider_patterns_analysis(data):
         ]
         st.dataframe(risk_table, use_container_width=True)
 
-def create_financial_analysis(data):
-    """Create comprehensive financial analysis"""
-    st.markdown('<h2 class="section-header">💰 Financial Analysis (2017-2019)</h2>', unsafe_allow_html=True)
-    
-    if data['financial'].empty:
-        st.warning("No financial data available")
-        return
-    
-    # Yearly financial trends
+@traced(cat='chart')
+@cached_figure
+def create_financial_figure(financial: pd.DataFrame):
+    """2x2 grid of yearly benefits, cost components, copays and prescription volume"""
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=("Benefits Paid by Year", "Cost Components by Year", 
@@ -494,39 +549,52 @@ def create_financial_analysis(data):
     
     # Benefits paid trend
     fig.add_trace(
-        go.Bar(x=data['financial']['YEAR'], y=data['financial']['BENEFIT_PAID'], 
+        go.Bar(x=financial['YEAR'], y=financial['BENEFIT_PAID'], 
                name="Benefits Paid", marker_color='blue'),
         row=1, col=1
     )
     
     # Cost components
     fig.add_trace(
-        go.Scatter(x=data['financial']['YEAR'], y=data['financial']['GROSS_DRUG_COST'], 
+        go.Scatter(x=financial['YEAR'], y=financial['GROSS_DRUG_COST'], 
                   mode='lines+markers', name="Gross Drug Cost", line=dict(color='red')),
         row=1, col=2
     )
     fig.add_trace(
-        go.Scatter(x=data['financial']['YEAR'], y=data['financial']['INGREDIENT_COST'], 
+        go.Scatter(x=financial['YEAR'], y=financial['INGREDIENT_COST'], 
                   mode='lines+markers', name="Ingredient Cost", line=dict(color='orange')),
         row=1, col=2
     )
     
     # Patient copay
     fig.add_trace(
-        go.Bar(x=data['financial']['YEAR'], y=data['financial']['PATIENT_COPAY'], 
+        go.Bar(x=financial['YEAR'], y=financial['PATIENT_COPAY'], 
                name="Patient Copay", marker_color='green'),
         row=2, col=1
     )
     
     # Prescription volume
     fig.add_trace(
-        go.Bar(x=data['financial']['YEAR'], y=data['financial']['TOTAL_PRESCRIPTIONS'], 
+        go.Bar(x=financial['YEAR'], y=financial['TOTAL_PRESCRIPTIONS'], 
                name="Prescriptions", marker_color='purple'),
         row=2, col=2
     )
     
     fig.update_layout(height=800, showlegend=True, title_text="Financial Analysis Dashboard")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+@traced(cat='section')
+def create_financial_analysis(data):
+    """Create comprehensive financial analysis"""
+    st.markdown('<h2 class="section-header">💰 Financial Analysis (2017-2019)</h2>', unsafe_allow_html=True)
+    
+    if data['financial'].empty:
+        st.warning("No financial data available")
+        return
+    
+    # Yearly financial trends
+    fig = create_financial_figure(data['financial'])
+    show_chart(fig, use_container_width=True)
     
     # Financial insights
     st.markdown("""
@@ -541,6 +609,7 @@ def create_financial_analysis(data):
     </div>
     """, unsafe_allow_html=True)
 
+@traced(cat='section')
 def create_high_cost_patients_analysis(data):
     """Create high-cost patients analysis"""
     st.markdown('<h2 class="section-header">💎 High-Cost Patient Analysis</h2>', unsafe_allow_html=True)
@@ -567,11 +636,11 @@ def create_high_cost_patients_analysis(data):
                 'Medium Cost': '#ffc107'
             }
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     with col2:
         # Demographics of high-cost patients
-        age_cost = data['high_cost'].groupby('AGE_BUCKET').agg({
+        age_cost = data['high_cost'].groupby('AGE_BUCKET', observed=True).agg({
             'TOTAL_BENEFIT_PAID': ['count', 'sum', 'mean']
         }).round(2)
         age_cost.columns = ['Patient Count', 'Total Cost', 'Avg Cost per Patient']
@@ -585,7 +654,7 @@ def create_high_cost_patients_analysis(data):
             color='Avg Cost per Patient',
             color_continuous_scale='Reds'
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, use_container_width=True)
     
     # Top high-cost patients table
     st.subheader("🔍 Top High-Cost Patients")
@@ -597,6 +666,52 @@ def create_high_cost_patients_analysis(data):
                               'Total Benefit (R)', 'Avg per Prescription (R)', 'Category']
     st.dataframe(high_cost_table, use_container_width=True)
 
+@traced(cat='section')
+def create_cost_tier_analysis(data):
+    """Create the cost tier breakdown over all patients"""
+    st.subheader("📊 All Patients by Cost Tier")
+
+    if data['cost_tiers'].empty:
+        st.warning("No cost tier data available")
+        return
+
+    cost_tiers = data['cost_tiers'].rename(columns={
+        'COST_CATEGORY': 'Cost Category', 'PATIENTS': 'Patient Count', 'PAID': 'Total Benefit (R)'
+    })
+    colors = {
+        'Very High Cost': '#dc3545',
+        'High Cost': '#fd7e14',
+        'Medium Cost': '#ffc107',
+        'Low Cost': '#20c997',
+        'Very Low Cost': '#28a745'
+    }
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig = px.pie(
+            cost_tiers,
+            values='Patient Count',
+            names='Cost Category',
+            title="Patients by Cost Tier",
+            color='Cost Category',
+            color_discrete_map=colors
+        )
+        show_chart(fig, use_container_width=True)
+
+    with col2:
+        fig = px.bar(
+            cost_tiers,
+            x='Cost Category',
+            y='Total Benefit (R)',
+            title="Benefit Paid by Cost Tier",
+            color='Cost Category',
+            color_discrete_map=colors
+        )
+        show_chart(fig, use_container_width=True)
+
+@profile_rerun('dose')
+@trace_rerun('dose')
 def main():
     # Ensure Snowflake connection
     conn = ensure_connection()
@@ -616,42 +731,62 @@ def main():
         if st.button("AI Insights →"):
             st.switch_page("pages/ai_insights.py")
     
-    # Load data
-    if 'dose_data' not in st.session_state:
-        st.session_state.dose_data = load_dose_data(conn)
-    
-    data = st.session_state.dose_data
+    # Sections in page order with the data key each one needs. Placeholders are laid out
+    # first and filled as results arrive, so the KPIs show without waiting for the slowest query.
+    sections = [
+        (create_overview_section, 'overview'),
+        (create_ms_analysis_section, 'ms_analysis'),
+        (create_atc_hierarchy_analysis, 'atc'),
+        (create_patient_demographics_analysis, 'demographics'),
+        (create_provider_patterns_analysis, 'providers'),
+        (create_financial_analysis, 'financial'),
+        (create_high_cost_patients_analysis, 'high_cost'),
+        (create_cost_tier_analysis, 'cost_tiers')
+    ]
+    status = st.container()
+    placeholders = create_section_placeholders(len(sections))
+    rendered = set()
+    
+    # Load data - every session reads one shared copy per data version; this session's lease
+    # keeps it counted until the version changes or the session ends
+    store = get_dataset_store()
+    version_queries = [get_query('dose', name) for name in list_queries('dose')]
+    cost_tiers = cost_tier_query(conn)
+    if cost_tiers is not None:
+        version_queries.append(cost_tiers[0])
+    version = dataset_version(get_backend(conn), version_queries)
+    data = store.get('dose', version)
+    if data is None:
+        with status:
+            data = load_dose_data(
+                conn, on_section_ready=lambda partial: render_ready_sections(sections, placeholders, partial, rendered)
+            )
+        if data is not None and data['failed_sections']:
+            # A partial dataset stays with this run only; the next run retries the failed queries
+            st.session_state.pop('dose_dataset', None)
+            st.warning(f"Incomplete data (failed: {', '.join(data['failed_sections'])}) - not shared, retried on the next run")
+        elif data is not None:
+            data = store.put('dose', version, data)
+    shared = data is not None and not data['failed_sections']
+    if shared and getattr(st.session_state.get('dose_dataset'), 'key', None) != ('dose', version):
+        st.session_state.dose_dataset = store.lease('dose', version)
     
     if data is None:
+        for placeholder in placeholders:
+            placeholder.empty()
         st.error("Failed to load Q.Dose data")
         return
     
-    # Create dashboard sections
-    create_overview_section(data)
-    
-    st.markdown("---")
-    create_ms_analysis_section(data)
-    
-    st.markdown("---")
-    create_atc_hierarchy_analysis(data)
-    
-    st.markdown("---")
-    create_patient_demographics_analysis(data)
-    
-    st.markdown("---")
-    create_provider_patterns_analysis(data)
-    
-    st.markdown("---")
-    create_financial_analysis(data)
-    
-    st.markdown("---")
-    create_high_cost_patients_analysis(data)
+    # Create dashboard sections (all at once when served from the dataset store)
+    render_ready_sections(sections, placeholders, data, rendered)
     
     # Footer with performance stats
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Dashboard Load Time", f"{data['load_time']:.1f}s", "Target: <3s")
+        if data.get('first_content_time') is not None:
+            st.caption(f"First section after {data['first_content_time']:.1f}s")
     with col2:
         st.metric("Total Prescriptions", f"{data['overview'].iloc[0]['TOTAL_PRESCRIPTIONS']:,.0f}" if not data['overview'].empty else "0")
     with col3:
@@ -0,0 +1,239 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+from datetime import datetime
+
+# Import custom modules
+from utils.compaction import get_result_compactor
+from utils.telemetry import QUERY_TARGET_SECONDS, get_query_telemetry, latency_summary
+from utils.viz_components import create_metric_card, create_performance_monitor
+from utils.profiling import profile_rerun
+
+# Page configuration
+st.set_page_config(
+    page_title="Query Performance",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+# Custom CSS
+st.markdown("""
+<style>
+    .main-header {
+        font-size: 2.2rem;
+        color: #1f77b4;
+        text-align: center;
+        margin-bottom: 1rem;
+    }
+    .section-header {
+        font-size: 1.5rem;
+        color: #333;
+        border-bottom: 2px solid #1f77b4;
+        padding-bottom: 0.5rem;
+        margin: 1.5rem 0 1rem 0;
+    }
+    .metric-container {
+        background: #f8f9fa;
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #1f77b4;
+        margin: 0.5rem 0;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+def create_overview_section(df: pd.DataFrame):
+    """Headline numbers across every recorded query"""
+    st.markdown('<h2 class="section-header">📊 Overview</h2>', unsafe_allow_html=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        create_metric_card("Queries Recorded", f"{len(df):,}", f"{df['query_name'].nunique()} distinct queries")
+    with col2:
+        warehouse = (df['cache'] == 'miss').mean()
+        create_metric_card("Cache Hit Rate", f"{1 - warehouse:.0%}", "Memory, disk or coalesced")
+    with col3:
+        create_metric_card("p95 Latency", f"{df['total_seconds'].quantile(0.95):.2f}s", f"Target: {QUERY_TARGET_SECONDS:.0f}s")
+    with col4:
+        over = int((df['total_seconds'] > QUERY_TARGET_SECONDS).sum())
+        create_metric_card("Over Target", f"{over:,}", f"{df['error'].notna().sum()} failed")
+
+    create_performance_monitor(df['total_seconds'].quantile(0.95), QUERY_TARGET_SECONDS)
+
+def create_target_section(df: pd.DataFrame):
+    """p95 per query against the 3-second target"""
+    st.markdown('<h2 class="section-header">🎯 p95 Latency vs Target</h2>', unsafe_allow_html=True)
+
+    summary = latency_summary(df)
+    summary['label'] = summary['page'] + ' / ' + summary['query_name']
+
+    fig = px.bar(
+        summary.sort_values('p95'),
+        x='p95',
+        y='label',
+        orientation='h',
+        color='meets_target',
+        color_discrete_map={True: '#28a745', False: '#dc3545'},
+        hover_data=['queries', 'p50', 'max', 'hit_rate'],
+        labels={'p95': 'p95 latency (s)', 'label': '', 'meets_target': 'Meets target'},
+        title="p95 Latency per Query"
+    )
+    fig.add_vline(x=QUERY_TARGET_SECONDS, line_dash="dash", line_color="red",
+                  annotation_text=f"Target ({QUERY_TARGET_SECONDS:.0f}s)")
+    fig.update_layout(height=max(400, 28 * len(summary)))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(
+        summary.drop(columns=['label']),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'p50': st.column_config.NumberColumn('p50 (s)', format="%.3f"),
+            'p95': st.column_config.NumberColumn('p95 (s)', format="%.3f"),
+            'max': st.column_config.NumberColumn('max (s)', format="%.3f"),
+            'hit_rate': st.column_config.ProgressColumn('Cache hit rate', min_value=0, max_value=1, format="%.2f")
+        }
+    )
+
+def create_histogram_section(df: pd.DataFrame):
+    """Latency distributions, overall and per query"""
+    st.markdown('<h2 class="section-header">📈 Latency Distribution</h2>', unsafe_allow_html=True)
+
+    queries = sorted(df['query_name'].unique())
+    selected = st.multiselect("Queries", queries, default=queries[:8])
+    subset = df[df['query_name'].isin(selected)] if selected else df
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.histogram(
+            subset,
+            x='total_seconds',
+            color='query_name',
+            nbins=40,
+            barmode='overlay',
+            opacity=0.7,
+            labels={'total_seconds': 'Latency (s)', 'query_name': 'Query'},
+            title="Latency Histogram"
+        )
+        fig.add_vline(x=QUERY_TARGET_SECONDS, line_dash="dash", line_color="red")
+        fig.update_layout(height=450)
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        # Where warehouse time goes: waiting for results vs materializing them
+        misses = subset[subset['cache'] == 'miss']
+        if misses.empty:
+            st.info("No warehouse executions recorded for the selected queries")
+        else:
+            split = misses.groupby('query_name')[['execute_seconds', 'fetch_seconds']].mean().reset_index()
+            fig = px.bar(
+                split.melt(id_vars='query_name', var_name='phase', value_name='seconds'),
+                x='query_name',
+                y='seconds',
+                color='phase',
+                labels={'query_name': 'Query', 'seconds': 'Mean seconds'},
+                title="Execute vs Fetch (warehouse executions)"
+            )
+            fig.update_layout(height=450)
+            st.plotly_chart(fig, use_container_width=True)
+
+def create_memory_section(df: pd.DataFrame):
+    """Result memory before and after compaction, per query"""
+    st.markdown('<h2 class="section-header">🗜️ Result Memory</h2>', unsafe_allow_html=True)
+
+    stats = get_result_compactor().metrics()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        create_metric_card("Results Compacted", f"{stats['results']:,}", f"{stats['dictionaries']} shared dictionaries")
+    with col2:
+        create_metric_card("Memory Saved", f"{stats['saved_ratio']:.0%}",
+                           f"{stats['bytes_before'] / 1e6:,.1f} MB → {stats['bytes_after'] / 1e6:,.1f} MB")
+    with col3:
+        create_metric_card("Columns Changed", f"{stats['categorized'] + stats['downcast']:,}",
+                           f"{stats['categorized']} categorical • {stats['downcast']} downcast")
+
+    compacted = df.dropna(subset=['raw_bytes']) if 'raw_bytes' in df.columns else df.iloc[0:0]
+    if compacted.empty:
+        st.info("No warehouse results compacted yet")
+        return
+
+    # Latest execution of each query
+    latest = compacted.groupby(['page', 'query_name']).tail(1).copy()
+    latest['label'] = latest['page'] + ' / ' + latest['query_name']
+    fig = px.bar(
+        latest[['label', 'raw_bytes', 'compact_bytes']].melt(id_vars='label', var_name='stage', value_name='bytes'),
+        x='label',
+        y='bytes',
+        color='stage',
+        barmode='group',
+        labels={'label': 'Query', 'bytes': 'Bytes in memory', 'stage': ''},
+        title="Result Size Before and After Compaction"
+    )
+    fig.update_layout(height=450)
+    st.plotly_chart(fig, use_container_width=True)
+
+def create_records_section(df: pd.DataFrame):
+    """Most recent records with JSONL export"""
+    st.markdown('<h2 class="section-header">🧾 Recent Queries</h2>', unsafe_allow_html=True)
+
+    telemetry = get_query_telemetry()
+    columns = ['time', 'page', 'query_name', 'cache', 'total_seconds', 'execute_seconds', 'fetch_seconds',
+               'rows', 'bytes', 'raw_bytes', 'compact_bytes', 'backend', 'priority', 'fingerprint', 'params_hash', 'error']
+    st.dataframe(df[columns].iloc[::-1].head(200), use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button(
+            label="📥 Download as JSONL",
+            data=telemetry.to_jsonl(),
+            file_name=f"query_telemetry_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime="application/x-ndjson"
+        )
+    with col2:
+        if st.button("🗑️ Clear Telemetry"):
+            telemetry.clear()
+            st.rerun()
+    with col3:
+        metrics = telemetry.metrics()
+        st.caption(f"{metrics['buffered']:,}/{metrics['capacity']:,} records buffered, "
+                   f"{metrics['recorded']:,} recorded since start")
+        if metrics['export_path']:
+            st.caption(f"Appending to {metrics['export_path']}")
+
+@profile_rerun('performance')
+def main():
+    # Header
+    st.markdown('<h1 class="main-header">⏱️ Query Performance</h1>', unsafe_allow_html=True)
+
+    # Navigation
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("← Q.CheckUp Lite"):
+            st.switch_page("pages/checkup_lite.py")
+    with col2:
+        if st.button("🏠 Home"):
+            st.switch_page("main.py")
+    with col3:
+        if st.button("Q.Dose →"):
+            st.switch_page("pages/dose.py")
+
+    st.caption("Every query served by this app node, from all sessions. "
+               "Cache 'miss' means the query ran on the warehouse.")
+
+    df = get_query_telemetry().to_frame()
+    if df.empty:
+        st.info("No queries recorded yet - open a dashboard to generate telemetry.")
+        return
+
+    create_overview_section(df)
+    st.markdown("---")
+    create_target_section(df)
+    st.markdown("---")
+    create_histogram_section(df)
+    st.markdown("---")
+    create_memory_section(df)
+    st.markdown("---")
+    create_records_section(df)
+
+if __name__ == "__main__":
+    main()
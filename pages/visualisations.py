@@ -14,6 +14,9 @@ import altair as alt
 from utils.snowflake_conn import ensure_connection, execute_query
 from utils.viz_components import create_performance_monitor
 from utils.queries import get_query
+from utils.downsampling import downsample_frame
+from utils.large_scatter import create_scatter
+from utils.profiling import profile_rerun
 
 # Page configuration
 st.set_page_config(
@@ -193,20 +196,20 @@ def create_plotly_visualizations(data):
         st.markdown('<div class="viz-title">1. Hospital Operations Dashboard</div>', unsafe_allow_html=True)
         st.markdown('<div class="viz-description">Multi-line view of admissions, discharges, and bed occupancy over time</div>', unsafe_allow_html=True)
         
-        # Prepare data - sample every 30 days for better performance
-        ts_sample = data['time_series'][::30].copy()  # Every 30th day
-        ts_melted = ts_sample.melt(
+        # Prepare data - every day, downsampled per metric to the chart point budget (keeps peaks)
+        ts_melted = data['time_series'].melt(
             id_vars=['date'], 
             value_vars=['admissions', 'discharges', 'bed_occupancy'],
             var_name='metric', value_name='value'
         )
+        ts_melted = downsample_frame(ts_melted, 'date', 'value', 'metric')
         
         fig1 = px.line(
             ts_melted,
             x='date',
             y='value',
             color='metric',
-            title='Hospital Operations Trends (Sampled)',
+            title='Hospital Operations Trends',
             markers=True,
             color_discrete_map={
                 'admissions': '#1f77b4',
@@ -293,10 +296,12 @@ def create_plotly_visualizations(data):
         st.markdown('<div class="viz-title">6. Genomic Research: Differential Gene Expression</div>', unsafe_allow_html=True)
         st.markdown('<div class="viz-description">Volcano plot highlighting significant gene expression changes</div>', unsafe_allow_html=True)
         
-        fig6 = px.scatter(
+        fig6 = create_scatter(
             data['genes'],
             x='log2_fold_change',
             y='neg_log10_p',
+            highlight='significance',
+            highlight_name='Significant',
             color='significance',
             hover_data=['gene_id'],
             title='Volcano Plot: Differential Gene Expression Analysis',
@@ -793,6 +798,7 @@ def create_specialty_visualizations(data):
         )
         st.plotly_chart(fig21, use_container_width=True, theme="streamlit")
 
+@profile_rerun('visualisations')
 def main():
     """Main function to run the visualization gallery"""
     
@@ -0,0 +1,101 @@
+"""Routed aggregates against the sql/03 rollups match the same aggregates over the fact tables"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip('duckdb')
+
+from benchmarks.make_local_dataset import build_rollups, generate_synthetic
+from utils import aggregate_router
+from utils.aggregate_router import RoutingError, route_aggregate
+from utils.duckdb_backend import DuckDBBackend
+
+RISK_CATEGORIES = {1: 'Very Low', 3: 'Low', 5: 'Medium', 8: 'High', 10: 'Very High'}
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp('qdata'))
+    con = duckdb.connect()
+    generate_synthetic(con, out_dir, 0.005)
+    build_rollups(con, out_dir)
+    return out_dir
+
+@pytest.fixture
+def backend(data_dir):
+    # Source sizes are cached per table name for an hour
+    aggregate_router._row_counts.clear()
+    return DuckDBBackend(data_dir)
+
+def _fact(data_dir: str, table: str) -> pd.DataFrame:
+    return pd.read_parquet(os.path.join(data_dir, f"{table}.parquet"))
+
+def _routed(backend, *request) -> pd.DataFrame:
+    sql, params, source, _ = route_aggregate(backend, *request)
+    df = backend.execute(sql, params or None)
+    df.attrs['source'] = source
+    return df
+
+def _assert_matches(routed: pd.DataFrame, expected: pd.DataFrame, key: str):
+    routed = routed.set_index(key).sort_index()
+    expected = expected.sort_index()
+    assert len(expected) > 1
+    assert list(routed.index) == list(expected.index)
+    for column in expected.columns:
+        np.testing.assert_allclose(routed[column].astype(float), expected[column].astype(float),
+                                   rtol=1e-9, atol=0.01, err_msg=column)
+
+def test_patient_rollup_answers_sums_averages_and_distinct_counts(backend, data_dir):
+    routed = _routed(backend, 'PHARMACEUTICAL_CLAIMS', ['rows', 'paid', 'avg_paid', 'patients'], ['PROVINCE'])
+    assert routed.attrs['source'] == 'PATIENT_COST_CATEGORIES'
+
+    fact = _fact(data_dir, 'PHARMACEUTICAL_CLAIMS').groupby('PROVINCE')
+    expected = pd.DataFrame({'ROWS': fact.size(), 'PAID': fact['AMT_PAID'].sum(),
+                             'AVG_PAID': fact['AMT_PAID'].mean(), 'PATIENTS': fact['ENTITY_NO'].nunique()})
+    _assert_matches(routed, expected, 'PROVINCE')
+
+def test_rollup_predicate_is_required_and_sufficient(backend, data_dir):
+    fact = _fact(data_dir, 'HEALTHCARE_CLAIMS')
+    fact['RISK_CATEGORY'] = fact['WF'].map(RISK_CATEGORIES).fillna('Medium')
+
+    for threshold, source in ((1000, 'HIGH_VALUE_CLAIMS_RISK'), (500, 'HEALTHCARE_CLAIMS')):
+        routed = _routed(backend, 'HEALTHCARE_CLAIMS', ['claims', 'claimed', 'avg_claimed'], ['RISK_CATEGORY'],
+                         [('AMT_CLAIMED_TY', '>', threshold)])
+        # A looser filter than the rollup's baked-in one must not be answered from it
+        assert routed.attrs['source'] == source
+
+        grouped = fact[fact['AMT_CLAIMED_TY'] > threshold].groupby('RISK_CATEGORY')['AMT_CLAIMED_TY']
+        expected = pd.DataFrame({'CLAIMS': grouped.size(), 'CLAIMED': grouped.sum(), 'AVG_CLAIMED': grouped.mean()})
+        _assert_matches(routed, expected, 'RISK_CATEGORY')
+
+def test_residual_filter_outside_the_rollup_falls_back_to_the_fact_table(backend):
+    _, params, source, _ = route_aggregate(backend, 'HEALTHCARE_CLAIMS', ['claims'], ['RISK_CATEGORY'],
+                                           [('AMT_CLAIMED_TY', '>', 1000), ('P_PROVINCE', '=', 'Gauteng')])
+    assert source == 'HEALTHCARE_CLAIMS'
+    assert sorted(params.values(), key=str) == [1000, 'Gauteng']
+
+def test_summary_view_is_used_only_once_materialized(backend, data_dir, monkeypatch):
+    request = ('HEALTHCARE_CLAIMS', ['claims', 'paid', 'avg_paid'], ['P_PROVINCE'], [('YEAR', '>=', 2025)])
+    assert route_aggregate(backend, *request)[2] == 'HEALTHCARE_CLAIMS'
+
+    monkeypatch.setattr(aggregate_router, 'MATERIALIZED_ROLLUPS', {'VW_CLAIMS_SUMMARY'})
+    routed = _routed(backend, *request)
+    assert routed.attrs['source'] == 'VW_CLAIMS_SUMMARY'
+
+    fact = _fact(data_dir, 'HEALTHCARE_CLAIMS')
+    grouped = fact[fact['YEAR'] >= 2025].groupby('P_PROVINCE')
+    expected = pd.DataFrame({'CLAIMS': grouped.size(), 'PAID': grouped['AMT_PAID_TY'].sum(),
+                             'AVG_PAID': grouped['AMT_PAID_TY'].mean()})
+    _assert_matches(routed, expected, 'P_PROVINCE')
+
+def test_rollup_only_dimension_needs_the_rollup(backend, data_dir, tmp_path):
+    assert route_aggregate(backend, 'PHARMACEUTICAL_CLAIMS', ['patients'], ['COST_CATEGORY'])[2] == 'PATIENT_COST_CATEGORIES'
+
+    # Without the sql/03 tables nothing can classify patients by cost
+    for table in ('HEALTHCARE_CLAIMS', 'PHARMACEUTICAL_CLAIMS'):
+        os.symlink(os.path.join(data_dir, f"{table}.parquet"), tmp_path / f"{table}.parquet")
+    aggregate_router._row_counts.clear()
+    with pytest.raises(RoutingError):
+        route_aggregate(DuckDBBackend(str(tmp_path)), 'PHARMACEUTICAL_CLAIMS', ['patients'], ['COST_CATEGORY'])
@@ -0,0 +1,47 @@
+"""Catalog date coverage comes from Parquet row group statistics on the local backend"""
+
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+pytest.importorskip('duckdb')
+
+from utils.catalog import CatalogStatistics
+from utils.duckdb_backend import DuckDBBackend
+
+def _write_claims(path: str, dates, row_group_size: int):
+    table = pa.table({'DATE_KEY': pa.array(dates, pa.date32()), 'AMT_PAID': [1.0] * len(dates)})
+    pq.write_table(table, path, row_group_size=row_group_size)
+
+def test_date_ranges_span_row_groups_and_files(tmp_path):
+    start = datetime.date(2024, 1, 1)
+    dates = [start + datetime.timedelta(days=d) for d in (40, 3, 90, 12, 65, 7)]
+    _write_claims(str(tmp_path / 'CLAIMS.parquet'), dates, row_group_size=2)
+    parts = tmp_path / 'CLAIM_PARTS'
+    parts.mkdir()
+    _write_claims(str(parts / 'part-0.parquet'), dates[:3], row_group_size=1)
+    _write_claims(str(parts / 'part-1.parquet'), [None, *dates[3:]], row_group_size=2)
+    backend = DuckDBBackend(str(tmp_path))
+
+    ranges = backend.date_ranges({'CLAIMS': 'DATE_KEY', 'CLAIM_PARTS': 'DATE_KEY',
+                                  'DIM_PATIENTS': 'DATE_KEY'}).set_index('TABLE_NAME')
+    expected = backend.execute(
+        "SELECT MIN(DATE_KEY) AS MIN_DATE, MAX(DATE_KEY) AS MAX_DATE "
+        "FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.CLAIMS"
+    ).iloc[0]
+    assert list(ranges.index) == ['CLAIMS', 'CLAIM_PARTS']
+    for table in ranges.index:
+        assert pd.Timestamp(ranges.loc[table, 'MIN_DATE']) == pd.Timestamp(expected['MIN_DATE'])
+        assert pd.Timestamp(ranges.loc[table, 'MAX_DATE']) == pd.Timestamp(expected['MAX_DATE'])
+
+def test_catalog_reads_no_table_data_locally(tmp_path, monkeypatch):
+    _write_claims(str(tmp_path / 'CLAIMS.parquet'), [datetime.date(2025, 3, 1)], row_group_size=1)
+    backend = DuckDBBackend(str(tmp_path))
+    monkeypatch.setattr(backend, 'execute', lambda *args, **kwargs: pytest.fail("catalog ran a query"))
+
+    df = CatalogStatistics().statistics(backend, {'CLAIMS': 'DATE_KEY'})
+    row = df.iloc[0]
+    assert (row['ROW_COUNT'], row['MIN_DATE'], row['MAX_DATE']) == (1, datetime.date(2025, 3, 1), datetime.date(2025, 3, 1))
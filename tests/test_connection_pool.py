@@ -0,0 +1,124 @@
+"""ConnectionPool session statements and idle reaping, against in-memory fake connections"""
+
+import threading
+import time
+
+from utils.connection_pool import ConnectionPool
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, statement):
+        self.conn.executed.append(statement)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    # Called with the connection on every server round trip (heartbeat, close)
+    on_round_trip = None
+
+    def __init__(self):
+        self.executed = []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def is_closed(self):
+        return self.closed
+
+    def is_valid(self):
+        if self.on_round_trip:
+            self.on_round_trip(self)
+        return not self.closed
+
+    def close(self):
+        if self.on_round_trip:
+            self.on_round_trip(self)
+        self.closed = True
+
+def test_latest_statement_for_a_parameter_wins():
+    pool = ConnectionPool(FakeConnection)
+    for value in ('FALSE', 'TRUE', 'FALSE'):
+        pool.add_session_statement(f"ALTER SESSION SET USE_CACHED_RESULT = {value}")
+    with pool.connection() as conn:
+        assert conn.executed == ["ALTER SESSION SET USE_CACHED_RESULT = FALSE"]
+
+def test_unset_drops_the_parameter():
+    pool = ConnectionPool(FakeConnection)
+    pool.add_session_statement("ALTER SESSION SET QUERY_TAG = 'bench'")
+    pool.add_session_statement("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+    pool.add_session_statement("alter session unset query_tag")
+    with pool.connection() as conn:
+        assert conn.executed == ["ALTER SESSION SET USE_CACHED_RESULT = FALSE"]
+
+def test_changed_settings_recycle_idle_connections():
+    pool = ConnectionPool(FakeConnection)
+    with pool.connection() as first:
+        pass
+    pool.add_session_statement("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+    assert first.closed
+    with pool.connection() as second:
+        pass
+    # Re-issuing the current setting keeps the pooled connection
+    pool.add_session_statement("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+    assert not second.closed and pool.metrics()['idle'] == 1
+
+def test_idle_connections_past_max_idle_are_reaped_on_release():
+    pool = ConnectionPool(FakeConnection, max_idle=0.05)
+    with pool.connection() as stale:
+        with pool.connection():
+            pass
+    time.sleep(0.1)
+    with pool.connection() as fresh:
+        pass
+    assert stale.closed and not fresh.closed
+    assert pool.metrics()['expired'] >= 1
+
+def _lock_free_from_other_thread(pool: ConnectionPool) -> bool:
+    """True if another thread can take the pool lock right now"""
+    result = []
+    def probe():
+        acquired = pool._cond.acquire(timeout=0.5)
+        if acquired:
+            pool._cond.release()
+        result.append(acquired)
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return result[0]
+
+def test_heartbeats_and_closes_run_outside_the_pool_lock():
+    pool = ConnectionPool(FakeConnection, validate_after=0.0, max_idle=0.05)
+    round_trips = []
+    class Probed(FakeConnection):
+        on_round_trip = staticmethod(lambda conn: round_trips.append(_lock_free_from_other_thread(pool)))
+    pool._factory = Probed
+    with pool.connection():
+        pass
+    with pool.connection():  # heartbeat: idle longer than validate_after
+        pass
+    pool.add_session_statement("ALTER SESSION SET USE_CACHED_RESULT = FALSE")  # closes the idle connection
+    with pool.connection():
+        pass
+    time.sleep(0.1)
+    with pool.connection():  # reaps the expired idle connection
+        pass
+    pool.close()
+    assert len(round_trips) >= 4 and all(round_trips)
+
+def test_session_statements_can_change_while_a_connection_opens():
+    pool = ConnectionPool(FakeConnection)
+    pool.add_session_statement("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+    class Racing(FakeConnection):
+        def cursor(self):
+            # Another session changes a setting while this connection replays the current ones
+            pool.add_session_statement("ALTER SESSION SET QUERY_TAG = 'other'")
+            return super().cursor()
+    pool._factory = Racing
+    with pool.connection() as conn:
+        assert conn.executed == ["ALTER SESSION SET USE_CACHED_RESULT = FALSE"]
+    # Opened under the previous settings, so it is recycled rather than kept idle
+    assert conn.closed and pool.metrics()['idle'] == 0
@@ -0,0 +1,40 @@
+"""Point-budget downsampling of time series"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.downsampling import downsample_frame, downsample_indices
+
+def _series(n: int) -> pd.DataFrame:
+    start = datetime.date(2020, 1, 1)
+    return pd.DataFrame({
+        # Snowflake DATE columns arrive as datetime.date objects (object dtype)
+        'MONTH': [start + datetime.timedelta(days=i) for i in range(n)],
+        'TOTAL': np.sin(np.arange(n) / 50.0) * 100
+    })
+
+def test_lttb_accepts_date_objects():
+    df = _series(5000)
+    assert df['MONTH'].dtype == object
+    result = downsample_frame(df, 'MONTH', 'TOTAL', max_points=500, mode='lttb')
+    assert len(result) == 500
+    assert result['MONTH'].iloc[0] == df['MONTH'].iloc[0]
+    assert result['MONTH'].iloc[-1] == df['MONTH'].iloc[-1]
+
+def test_date_objects_select_the_same_points_as_datetimes():
+    df = _series(3000)
+    from_dates = downsample_indices(df['MONTH'], df['TOTAL'], 300, 'lttb')
+    from_datetimes = downsample_indices(pd.to_datetime(df['MONTH']), df['TOTAL'], 300, 'lttb')
+    np.testing.assert_array_equal(from_dates, from_datetimes)
+
+def test_non_temporal_labels_fall_back_to_positions():
+    df = _series(3000)
+    labels = df['MONTH'].astype(str) + ' (est.)'
+    kept = downsample_indices(labels, df['TOTAL'], 300, 'lttb')
+    assert len(kept) == 300 and kept[0] == 0 and kept[-1] == len(df) - 1
+
+def test_short_series_are_returned_unchanged():
+    df = _series(100)
+    assert downsample_frame(df, 'MONTH', 'TOTAL', max_points=500) is df
@@ -0,0 +1,33 @@
+"""Figure cache keys hash argument contents"""
+
+import numpy as np
+import pandas as pd
+
+from utils.figure_cache import figure_key
+
+def _builder(*args, **kwargs):
+    return None
+
+def test_large_arrays_differing_in_the_middle_get_different_keys():
+    # repr() of both arrays is the same truncated '[0. 0. 0. ... 0. 0. 0.]'
+    a, b = np.zeros(10000), np.zeros(10000)
+    b[5000] = 1.0
+    assert repr(a) == repr(b)
+    assert figure_key(_builder, (a,), {}) != figure_key(_builder, (b,), {})
+
+def test_array_dtype_and_shape_are_part_of_the_key():
+    values = np.arange(12, dtype=np.int64)
+    keys = {figure_key(_builder, (array,), {}) for array in
+            (values, values.reshape(3, 4), values.astype(np.int32), values.astype(object))}
+    assert len(keys) == 4
+
+def test_equal_arrays_share_a_key():
+    assert figure_key(_builder, (np.arange(5000.0),), {}) == figure_key(_builder, (np.arange(5000.0),), {})
+    assert figure_key(_builder, (np.arange(6)[::2],), {}) == figure_key(_builder, (np.array([0, 2, 4]),), {})
+
+def test_large_indexes_are_hashed_by_content():
+    a = pd.Index([f"provider {i}" for i in range(5000)])
+    b = a.insert(2500, 'other').delete(2501)
+    assert repr(a) == repr(b)
+    assert figure_key(_builder, (), {'x': a}) != figure_key(_builder, (), {'x': b})
+    assert figure_key(_builder, (), {'x': a}) == figure_key(_builder, (), {'x': a.copy()})
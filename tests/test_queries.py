@@ -0,0 +1,31 @@
+"""Q.CheckUp Lite filter SQL against the reference data domains in sql/02"""
+
+from utils.queries import (
+    CHECKUP_LITE_PROVIDER_CATEGORIES, CHECKUP_LITE_PROVIDER_TYPES, build_checkup_lite_query,
+    normalize_checkup_lite_filters, provider_categories
+)
+from utils.reference_data import reference_values
+
+def test_provider_types_map_to_reference_categories():
+    domain = set(reference_values('DIM_PROVIDERS', 'PROVIDER_CATEGORY'))
+    for provider_type, categories in CHECKUP_LITE_PROVIDER_CATEGORIES.items():
+        assert categories, provider_type
+        assert set(categories) <= domain, f"{provider_type}: {set(categories) - domain} not in sql/02"
+
+def test_provider_types_cover_every_reference_category_once():
+    mapped = [category for categories in CHECKUP_LITE_PROVIDER_CATEGORIES.values() for category in categories]
+    assert sorted(mapped) == sorted(reference_values('DIM_PROVIDERS', 'PROVIDER_CATEGORY'))
+
+def test_every_option_is_offered():
+    assert CHECKUP_LITE_PROVIDER_TYPES == ['All', *CHECKUP_LITE_PROVIDER_CATEGORIES]
+
+def test_provider_type_binds_in_list():
+    filters = normalize_checkup_lite_filters(provider_type='Specialists')
+    sql, params = build_checkup_lite_query('overview_kpis', filters)
+    assert "CATEGORY_DESCR IN (%(provider_category_0)s, %(provider_category_1)s, " in sql
+    bound = [value for name, value in sorted(params.items()) if name.startswith('provider_category_')]
+    assert bound == provider_categories('Specialists')
+
+def test_unfiltered_query_has_no_category_predicate():
+    sql, params = build_checkup_lite_query('overview_kpis', normalize_checkup_lite_filters())
+    assert 'CATEGORY_DESCR IN' not in sql and params == {}
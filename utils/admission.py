@@ -0,0 +1,123 @@
+"""
+Priority-aware admission control for warehouse queries
+Bounds the number of queries running against the warehouse at once. When every slot is busy,
+waiting queries are admitted by priority class (KPI tiles before charts before detail tables)
+and first-come-first-served within a class, so above-the-fold content returns first under load.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict
+
+# Priority classes, highest first
+PRIORITY_KPI = 'kpi'
+PRIORITY_CHART = 'chart'
+PRIORITY_DETAIL = 'detail'
+PRIORITY_CLASSES = (PRIORITY_KPI, PRIORITY_CHART, PRIORITY_DETAIL)
+
+# Keep at or below the connection pool size so admitted queries never queue for a connection
+MAX_CONCURRENT_QUERIES = int(os.environ.get('QHEALTH_MAX_CONCURRENT_QUERIES', 8))
+ADMISSION_TIMEOUT = float(os.environ.get('QHEALTH_ADMISSION_TIMEOUT', 120))
+
+class AdmissionTimeoutError(Exception):
+    """Raised when a query is not admitted within the admission timeout"""
+
+class AdmissionController:
+    """
+    Counting semaphore with one FIFO queue per priority class.
+
+    A waiter is admitted only when a slot is free and it heads the highest-priority
+    non-empty queue, so a later KPI query overtakes queued chart and detail queries but
+    never preempts a running one.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_QUERIES, timeout: float = ADMISSION_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._queues = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._running = 0
+        self._stats = {
+            priority: {'admitted': 0, 'queued': 0, 'timeouts': 0, 'total_wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+            for priority in PRIORITY_CLASSES
+        }
+
+    def _next_ticket(self):
+        for priority in PRIORITY_CLASSES:
+            if self._queues[priority]:
+                return self._queues[priority][0]
+        return None
+
+    def acquire(self, priority: str = PRIORITY_CHART) -> float:
+        """Block until admitted and return the seconds spent waiting"""
+        if priority not in self._queues:
+            priority = PRIORITY_CHART
+        start_time = time.time()
+        deadline = start_time + self.timeout
+        ticket = object()
+
+        with self._cond:
+            queue = self._queues[priority]
+            queue.append(ticket)
+            if self._running >= self.max_concurrent or self._next_ticket() is not ticket:
+                self._stats[priority]['queued'] += 1
+
+            while self._running >= self.max_concurrent or self._next_ticket() is not ticket:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    self._stats[priority]['timeouts'] += 1
+                    self._cond.notify_all()  # the next ticket may now be at the head
+                    raise AdmissionTimeoutError(
+                        f"Query not admitted within {self.timeout:.0f}s ({self._running} running)")
+                self._cond.wait(remaining)
+
+            queue.popleft()
+            self._running += 1
+            waited = time.time() - start_time
+            stats = self._stats[priority]
+            stats['admitted'] += 1
+            stats['total_wait_seconds'] += waited
+            stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+            # Several slots may have freed at once - let the new head check too
+            self._cond.notify_all()
+        return waited
+
+    def release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, priority: str = PRIORITY_CHART):
+        """Hold a warehouse slot for the duration of the block; yields the admission wait in seconds"""
+        waited = self.acquire(priority)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Running/waiting counts plus admission wait statistics per priority class"""
+        with self._cond:
+            classes = {}
+            for priority in PRIORITY_CLASSES:
+                stats = dict(self._stats[priority])
+                stats['waiting'] = len(self._queues[priority])
+                stats['avg_wait_seconds'] = stats['total_wait_seconds'] / stats['admitted'] if stats['admitted'] else 0.0
+                classes[priority] = stats
+            return {
+                'running': self._running,
+                'max_concurrent': self.max_concurrent,
+                'waiting': sum(len(queue) for queue in self._queues.values()),
+                'classes': classes
+            }
+
+_admission = AdmissionController()
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide admission controller shared by all sessions"""
+    return _admission
@@ -0,0 +1,257 @@
+"""
+Aggregate-aware query routing
+Aggregate requests are written against a fact table's logical measures and dimensions; the
+router answers each one from the smallest precomputed rollup that can, rewriting the SQL for
+that rollup, and falls back to the fact table otherwise.
+
+    sql, params, source, rows = route_aggregate(conn, 'PHARMACEUTICAL_CLAIMS', ['rows', 'paid'], ['COST_CATEGORY'])
+
+The planned (sql, params) runs like any other query, e.g. through iter_query_results
+(see the cost tiers on pages/dose.py).
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+QUALIFIED = 'QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO'
+
+# VW_CLAIMS_SUMMARY and VW_PHARMA_SUMMARY are plain views (sql/01_database_setup.sql), so reading
+# them still scans the fact table. List them here once they are materialized (materialized view,
+# dynamic table or CTAS) so the router costs them at their own size.
+MATERIALIZED_ROLLUPS = {
+    name.strip().upper() for name in os.environ.get('QHEALTH_MATERIALIZED_ROLLUPS', '').split(',') if name.strip()
+}
+
+ROW_COUNT_TTL = 3600  # seconds between source size refreshes
+
+# Script that builds the rollup tables (CREATE OR REPLACE TABLE <rollup> AS ...)
+ROLLUP_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'sql', '03_synthetic_data_generation_improved.sql')
+
+# Logical measures per fact table as (kind, argument):
+# - count: COUNT(*)    - sum: SUM(fact column)    - avg: sum measure / count measure
+# - distinct: COUNT(DISTINCT fact column), answerable from a rollup only when grouped by that column
+FACTS = {
+    'HEALTHCARE_CLAIMS': {
+        'measures': {
+            'claims': ('count', None),
+            'claimed': ('sum', 'AMT_CLAIMED_TY'),
+            'paid': ('sum', 'AMT_PAID_TY'),
+            'units': ('sum', 'UNITS_TY'),
+            'avg_claimed': ('avg', 'claimed'),
+            'avg_paid': ('avg', 'paid')
+        },
+        # Dimensions computed from fact columns rather than stored (as in HIGH_VALUE_CLAIMS_RISK)
+        'derived': {
+            'RISK_CATEGORY': "CASE WHEN WF = 1 THEN 'Very Low' WHEN WF = 3 THEN 'Low' WHEN WF = 5 THEN 'Medium' "
+                             "WHEN WF = 8 THEN 'High' WHEN WF = 10 THEN 'Very High' ELSE 'Medium' END"
+        },
+        'rollup_only': set()
+    },
+    'PHARMACEUTICAL_CLAIMS': {
+        'measures': {
+            'rows': ('count', None),
+            'claims': ('sum', 'CLAIMS'),
+            'paid': ('sum', 'AMT_PAID'),
+            'claimed': ('sum', 'AMT_CLAIMED'),
+            'quantity': ('sum', 'QTY'),
+            'avg_paid': ('avg', 'paid'),
+            'patients': ('distinct', 'ENTITY_NO')
+        },
+        'derived': {},
+        # COST_CATEGORY classifies each patient's all-time total, so only PATIENT_COST_CATEGORIES has it
+        'rollup_only': {'COST_CATEGORY'}
+    }
+}
+
+# Precomputed rollups (sql/01 and sql/03):
+# - dimensions: fact dimension -> rollup column
+# - measures: fact measure -> rollup expression re-aggregating it
+# - predicates: filters baked into the rollup; a request must carry every one of them
+# - view: plain view, costed as a fact scan unless listed in QHEALTH_MATERIALIZED_ROLLUPS
+ROLLUPS = {
+    'VW_CLAIMS_SUMMARY': {
+        'fact': 'HEALTHCARE_CLAIMS',
+        'dimensions': {'YEAR': 'YEAR', 'MONTH_NO': 'MONTH_NO', 'P_PROVINCE': 'P_PROVINCE',
+                       'CATEGORY_DESCR': 'CATEGORY_DESCR', 'TR_LEVEL_1': 'TR_LEVEL_1'},
+        'measures': {'claims': 'SUM(CLAIM_COUNT)', 'claimed': 'SUM(TOTAL_CLAIMED_TY)',
+                     'paid': 'SUM(TOTAL_PAID_TY)', 'units': 'SUM(TOTAL_UNITS_TY)'},
+        'predicates': [],
+        'view': True
+    },
+    'HIGH_VALUE_CLAIMS_RISK': {
+        'fact': 'HEALTHCARE_CLAIMS',
+        'dimensions': {'RISK_CATEGORY': 'RISK_CATEGORY'},
+        # TOTAL_VALUE is rounded to cents per risk category
+        'measures': {'claims': 'SUM(CLAIM_COUNT)', 'claimed': 'SUM(TOTAL_VALUE)'},
+        'predicates': [('AMT_CLAIMED_TY', '>', 1000)],
+        'view': False
+    },
+    'VW_PHARMA_SUMMARY': {
+        'fact': 'PHARMACEUTICAL_CLAIMS',
+        'dimensions': {'YEAR': 'YEAR', 'MONTH_KEY': 'MONTH_KEY', 'PROVINCE': 'PROVINCE',
+                       'PROVIDER_TYPE': 'PROVIDER_TYPE', 'ATC_LEVEL_DESC_1': 'ATC_LEVEL_DESC_1',
+                       'AGE_GROUPS': 'AGE_GROUPS', 'GENDER': 'GENDER'},
+        'measures': {'rows': 'SUM(PRESCRIPTION_COUNT)', 'paid': 'SUM(TOTAL_PAID)',
+                     'claimed': 'SUM(TOTAL_CLAIMED)', 'quantity': 'SUM(TOTAL_QUANTITY)'},
+        'predicates': [],
+        'view': True
+    },
+    'PATIENT_COST_CATEGORIES': {
+        'fact': 'PHARMACEUTICAL_CLAIMS',
+        'dimensions': {'ENTITY_NO': 'ENTITY_NO', 'PROVINCE': 'PROVINCE', 'AGE_GROUPS': 'AGE_GROUPS',
+                       'COST_CATEGORY': 'COST_CATEGORY'},
+        'measures': {'rows': 'SUM(PRESCRIPTION_COUNT)', 'paid': 'SUM(TOTAL_BENEFIT_PAID)'},
+        'predicates': [],
+        'view': False
+    }
+}
+
+def rollup_statements(path: str = ROLLUP_SQL) -> Dict[str, str]:
+    """The SELECT each rollup table is built from in sql/03, for rebuilding them on another engine"""
+    with open(path, encoding='utf-8') as f:
+        sql = f.read()
+    statements = {}
+    for name, rollup in ROLLUPS.items():
+        if rollup['view']:
+            continue
+        match = re.search(rf"CREATE OR REPLACE TABLE {name} AS\s+(.*?);", sql, flags=re.DOTALL | re.IGNORECASE)
+        if match is None:
+            raise ValueError(f"No CREATE OR REPLACE TABLE {name} in {path}")
+        statements[name] = match.group(1)
+    return statements
+
+class RoutingError(ValueError):
+    """Raised when neither a rollup nor the fact table can answer a request"""
+
+_row_counts: Dict[str, Tuple[Optional[int], float]] = {}
+_row_counts_lock = threading.Lock()
+
+def source_rows(conn, source: str) -> Optional[int]:
+    """Row count of a table (a metadata lookup on Snowflake), or None if it does not exist; cached"""
+    with _row_counts_lock:
+        cached = _row_counts.get(source)
+    if cached and time.time() - cached[1] < ROW_COUNT_TTL:
+        return cached[0]
+
+    try:
+        df = get_backend(conn).execute(f"SELECT COUNT(*) AS ROW_COUNT FROM {QUALIFIED}.{source}")
+        rows = int(df.iloc[0, 0]) if not df.empty else 0
+    except Exception as e:
+        # e.g. the sql/03 rollup tables were never built in this database
+        logger.warning("aggregate source %s unavailable: %s", source, e)
+        rows = None
+    with _row_counts_lock:
+        _row_counts[source] = (rows, time.time())
+    return rows
+
+def _scan_rows(conn, source: str) -> Optional[int]:
+    """Rows a query against `source` reads: a plain view re-scans its fact table"""
+    rollup = ROLLUPS.get(source)
+    if rollup and rollup['view'] and source not in MATERIALIZED_ROLLUPS:
+        return source_rows(conn, rollup['fact'])
+    return source_rows(conn, source)
+
+def _count_measure(fact: Dict) -> str:
+    return next(name for name, (kind, _) in fact['measures'].items() if kind == 'count')
+
+def _can_answer(rollup: Dict, fact: Dict, measures: List[str], dimensions: List[str], filters: List[Tuple]) -> bool:
+    if any(p not in filters for p in rollup['predicates']):
+        return False
+    residual = [f for f in filters if f not in rollup['predicates']]
+    if any(column not in rollup['dimensions'] for column in dimensions + [f[0] for f in residual]):
+        return False
+
+    for measure in measures:
+        kind, argument = fact['measures'][measure]
+        if kind == 'distinct':
+            if argument not in rollup['dimensions']:
+                return False
+        elif kind == 'avg':
+            if argument not in rollup['measures'] or _count_measure(fact) not in rollup['measures']:
+                return False
+        elif measure not in rollup['measures']:
+            return False
+    return True
+
+def _measure_sql(fact: Dict, measure: str, rollup: Optional[Dict]) -> str:
+    """SQL for a measure against the fact table (rollup=None) or a rollup"""
+    kind, argument = fact['measures'][measure]
+    if kind == 'distinct':
+        return f"COUNT(DISTINCT {rollup['dimensions'][argument] if rollup else argument})"
+    if kind == 'avg':
+        # Re-aggregated as sum / count so averages stay exact over rollup groups
+        total = _measure_sql(fact, argument, rollup)
+        count = _measure_sql(fact, _count_measure(fact), rollup)
+        return f"{total} / NULLIF({count}, 0)"
+    if rollup:
+        return rollup['measures'][measure]
+    return 'COUNT(*)' if kind == 'count' else f"SUM({argument})"
+
+def _predicate_sql(column_sql: str, op: str, value: Any, name: str, params: Dict[str, Any]) -> str:
+    if op.upper() == 'IN':
+        binds = []
+        for i, item in enumerate(value):
+            params[f"{name}_{i}"] = item
+            binds.append(f"%({name}_{i})s")
+        return f"{column_sql} IN ({', '.join(binds)})"
+    if op.upper() == 'BETWEEN':
+        params[f"{name}_lo"], params[f"{name}_hi"] = value
+        return f"{column_sql} BETWEEN %({name}_lo)s AND %({name}_hi)s"
+    params[name] = value
+    return f"{column_sql} {op} %({name})s"
+
+def route_aggregate(conn, fact_table: str, measures: List[str], dimensions: Optional[List[str]] = None,
+                    filters: Optional[List[Tuple[str, str, Any]]] = None) -> Tuple[str, Dict[str, Any], str, int]:
+    """
+    Plan an aggregate request and return (sql, params, source, rows scanned).
+
+    `filters` are (column, op, value) tuples with op one of =, <>, <, <=, >, >=, IN, BETWEEN.
+    Result columns are the dimensions followed by the upper-cased measure names.
+    """
+    fact = FACTS[fact_table]
+    dimensions = list(dimensions or [])
+    filters = list(filters or [])
+    unknown = [m for m in measures if m not in fact['measures']]
+    if unknown:
+        raise RoutingError(f"Unknown measures for {fact_table}: {', '.join(unknown)}")
+
+    candidates = []
+    for name, rollup in ROLLUPS.items():
+        if rollup['fact'] == fact_table and _can_answer(rollup, fact, measures, dimensions, filters):
+            candidates.append((_scan_rows(conn, name), name, rollup))
+    if not any(column in fact['rollup_only'] for column in dimensions + [f[0] for f in filters]):
+        candidates.append((source_rows(conn, fact_table), fact_table, None))
+    candidates = [c for c in candidates if c[0] is not None]
+    if not candidates:
+        raise RoutingError(f"No available source answers {fact_table} by {', '.join(dimensions) or '-'}")
+
+    # Fewest rows scanned wins; on a tie the fact table's simpler plan is preferred
+    rows, source, rollup = min(candidates, key=lambda c: (c[0], c[2] is not None))
+
+    def column_sql(column):
+        return rollup['dimensions'][column] if rollup else fact['derived'].get(column, column)
+
+    params = {}
+    select = [f"{column_sql(d)} AS {d}" for d in dimensions]
+    select += [f"{_measure_sql(fact, m, rollup)} AS {m.upper()}" for m in measures]
+    residual = [f for f in filters if not rollup or f not in rollup['predicates']]
+    where = [_predicate_sql(column_sql(column), op, value, f"f{i}", params)
+             for i, (column, op, value) in enumerate(residual)]
+
+    sql = f"SELECT {', '.join(select)}\nFROM {QUALIFIED}.{source}"
+    if where:
+        sql += "\nWHERE " + "\nAND ".join(where)
+    if dimensions:
+        sql += "\nGROUP BY " + ", ".join(str(i + 1) for i in range(len(dimensions)))
+    logger.info("aggregate %s(%s) by %s -> %s, %d rows scanned",
+                fact_table, ', '.join(measures), ', '.join(dimensions) or '-', source, rows)
+    return sql, params, source, rows
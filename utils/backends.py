@@ -0,0 +1,228 @@
+"""
+Pluggable query execution backends
+execute_query, test_connection and get_database_info talk to a QueryBackend, so the
+dashboard runs unchanged against Snowflake or an embedded local engine.
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import snowflake.connector
+
+from utils.connection_pool import ConnectionPool, is_connection_error
+
+# Result materialization: 'arrow' streams columnar result batches, 'rows' is the legacy fetchall path
+FETCH_MODE = os.environ.get('QHEALTH_FETCH_MODE', 'arrow')
+
+# Matches pyformat bind parameters such as %(province)s
+PYFORMAT_PARAM = re.compile(r'%\((\w+)\)s')
+
+# Columns returned by QueryBackend.table_statistics
+TABLE_STATISTICS_COLUMNS = ['TABLE_NAME', 'ROW_COUNT', 'BYTES', 'LAST_ALTERED']
+
+# Columns returned by QueryBackend.date_ranges
+DATE_RANGE_COLUMNS = ['TABLE_NAME', 'MIN_DATE', 'MAX_DATE']
+
+class QueryBackend:
+    """
+    Interface for an engine that can answer the dashboard's SQL.
+    Queries use Snowflake SQL with pyformat bind parameters (%(name)s); backends
+    translate both as needed and return DataFrames with upper-case column names.
+    """
+
+    name = 'base'
+
+    def execute(self, query: str, params: Optional[Dict[str, Any]] = None,
+                fetch_mode: Optional[str] = None, timings: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """
+        Run a query and return its result. Raises on failure.
+        When `timings` is given, 'execute_seconds' (until the first result is available)
+        and 'fetch_seconds' (materializing the DataFrame) are written into it.
+        """
+        raise NotImplementedError
+
+    def execute_command(self, statement: str):
+        """Run a statement whose result is not needed (session or warehouse commands)"""
+        raise NotImplementedError
+
+    def table_versions(self, tables: List[str]) -> Dict[str, str]:
+        """
+        Cheap version stamp per table that changes whenever its data changes.
+        Tables the backend cannot stamp are left out; callers fall back to time-based expiry.
+        """
+        return {}
+
+    def table_statistics(self, tables: List[str]) -> pd.DataFrame:
+        """
+        Row count, storage bytes and last change per table, read from metadata without
+        scanning the tables (TABLE_STATISTICS_COLUMNS). Unknown tables are left out.
+        """
+        return pd.DataFrame(columns=TABLE_STATISTICS_COLUMNS)
+
+    def date_ranges(self, columns: Dict[str, str]) -> pd.DataFrame:
+        """
+        Earliest and latest value of a date column per table (DATE_RANGE_COLUMNS), given as
+        {table: column}. Tables the backend cannot answer are left out.
+        """
+        return pd.DataFrame(columns=DATE_RANGE_COLUMNS)
+
+    def test(self) -> bool:
+        """Return True if the backend can answer queries"""
+        try:
+            return not self.execute("SELECT CURRENT_VERSION()").empty
+        except Exception:
+            return False
+
+def to_qmark(query: str, params: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Rewrite pyformat parameters as positional ? markers with an ordered value list"""
+    values = []
+
+    def _bind(match):
+        values.append(params[match.group(1)])
+        return '?'
+
+    return PYFORMAT_PARAM.sub(_bind, query).replace('%%', '%'), values
+
+def _fetch_rows(cursor) -> pd.DataFrame:
+    """Legacy fetch: materialize every row as a Python tuple"""
+    results = cursor.fetchall()
+    columns = [desc[0] for desc in cursor.description]
+    return pd.DataFrame(results, columns=columns)
+
+def _fetch_arrow(cursor) -> pd.DataFrame:
+    """Columnar fetch: concatenate the connector's Arrow result batches without per-row Python objects"""
+    batches = list(cursor.fetch_arrow_batches())
+    if not batches:
+        # Empty result sets produce no batches - keep the column names
+        return pd.DataFrame(columns=[desc[0] for desc in cursor.description])
+
+    return pa.concat_tables(batches).to_pandas(split_blocks=True, self_destruct=True)
+
+class SnowflakeBackend(QueryBackend):
+    """Snowflake via a Snowpark session, a connector connection or a ConnectionPool"""
+
+    name = 'snowflake'
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query: str, params: Optional[Dict[str, Any]] = None,
+                fetch_mode: Optional[str] = None, timings: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        timings = {} if timings is None else timings
+        return self._execute(self.conn, query, params, fetch_mode or FETCH_MODE, timings)
+
+    def _execute(self, conn, query: str, params: Optional[Dict[str, Any]], fetch_mode: str,
+                 timings: Dict[str, float]) -> pd.DataFrame:
+        if isinstance(conn, ConnectionPool):
+            try:
+                with conn.connection() as pooled:
+                    return self._execute(pooled, query, params, fetch_mode, timings)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+            # The pool discarded the broken connection - retry once on a fresh one
+            with conn.connection() as pooled:
+                return self._execute(pooled, query, params, fetch_mode, timings)
+
+        start_time = time.time()
+
+        # Handle both session and connection types
+        if hasattr(conn, 'sql'):  # Snowpark session
+            if params:
+                # Snowpark binds positionally with ? markers
+                query, values = to_qmark(query, params)
+                df = conn.sql(query, params=values)
+            else:
+                df = conn.sql(query)
+            if fetch_mode == 'arrow':
+                # Arrow batches bound peak memory to one batch plus the concatenated result.
+                # Snowpark runs lazily, so execution ends when the first batch arrives.
+                batches = df.to_pandas_batches()
+                first = next(batches, None)
+                timings['execute_seconds'] = time.time() - start_time
+                frames = [] if first is None else [first, *batches]
+                result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=df.columns)
+            else:
+                result = df.to_pandas()
+                timings['execute_seconds'] = time.time() - start_time
+            timings['fetch_seconds'] = time.time() - start_time - timings['execute_seconds']
+            return result
+
+        # Regular connection - a dedicated cursor per call keeps concurrent callers independent
+        cursor = conn.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            timings['execute_seconds'] = time.time() - start_time
+
+            result = None
+            if fetch_mode == 'arrow':
+                try:
+                    result = _fetch_arrow(cursor)
+                except snowflake.connector.errors.NotSupportedError:
+                    # Metadata commands (SHOW, DESCRIBE) return JSON result sets - fall back to rows
+                    pass
+            if result is None:
+                result = _fetch_rows(cursor)
+
+            timings['fetch_seconds'] = time.time() - start_time - timings['execute_seconds']
+            return result
+        finally:
+            cursor.close()
+
+    def table_statistics(self, tables: List[str]) -> pd.DataFrame:
+        """ROW_COUNT, BYTES and LAST_ALTERED from INFORMATION_SCHEMA.TABLES in one metadata query"""
+        if not tables:
+            return pd.DataFrame(columns=TABLE_STATISTICS_COLUMNS)
+        params = {f"t{i}": table.upper() for i, table in enumerate(tables)}
+        return self.execute(f"""
+            SELECT TABLE_NAME, ROW_COUNT, BYTES, LAST_ALTERED
+            FROM QUANTIUM_HEALTHCARE_DEMO.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = 'QUANTIUM_HEALTHCARE_DEMO'
+            AND TABLE_NAME IN ({', '.join(f'%({name})s' for name in params)})
+        """, params)
+
+    def date_ranges(self, columns: Dict[str, str]) -> pd.DataFrame:
+        """MIN/MAX per table in one UNION ALL query, which Snowflake answers from micro-partition metadata"""
+        if not columns:
+            return pd.DataFrame(columns=DATE_RANGE_COLUMNS)
+        return self.execute("\nUNION ALL\n".join(
+            f"SELECT '{table}' AS TABLE_NAME, MIN({column}) AS MIN_DATE, MAX({column}) AS MAX_DATE "
+            f"FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.{table}"
+            for table, column in columns.items()
+        ))
+
+    def table_versions(self, tables: List[str]) -> Dict[str, str]:
+        """LAST_ALTERED plus row count from INFORMATION_SCHEMA (metadata only, no table scan)"""
+        df = self.table_statistics(tables)
+        return {row.TABLE_NAME: f"{row.LAST_ALTERED}/{row.ROW_COUNT}" for row in df.itertuples(index=False)}
+
+    def execute_command(self, statement: str):
+        conn = self.conn
+        if hasattr(conn, 'sql'):  # Snowpark session
+            conn.sql(statement).collect()
+        elif isinstance(conn, ConnectionPool):
+            if statement.strip().upper().startswith('ALTER SESSION'):
+                # Session settings must reach every pooled connection, not just one
+                conn.add_session_statement(statement)
+            else:
+                with conn.connection() as pooled:
+                    SnowflakeBackend(pooled).execute_command(statement)
+        else:  # Regular connection
+            cursor = conn.cursor()
+            try:
+                cursor.execute(statement)
+            finally:
+                cursor.close()
+
+def get_backend(conn) -> QueryBackend:
+    """Wrap a session, connection or pool in its backend; backends pass through unchanged"""
+    if isinstance(conn, QueryBackend):
+        return conn
+    return SnowflakeBackend(conn)
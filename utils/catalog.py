@@ -0,0 +1,89 @@
+"""
+Catalog statistics for the dashboard tables
+Row counts, storage size, last change and date coverage of every table the dashboards read,
+taken from table metadata instead of COUNT(*) scans. Row counts and sizes come from one
+INFORMATION_SCHEMA query (Parquet footers locally); date coverage is a MIN/MAX per fact table,
+which Snowflake answers from micro-partition metadata and DuckDB from Parquet row group
+statistics (QueryBackend.date_ranges). Results are cached per data version,
+so they are only re-read after a source table changes.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from utils.backends import DATE_RANGE_COLUMNS, QueryBackend
+from utils.data_versions import get_version_probe, time_bucket
+
+logger = logging.getLogger(__name__)
+
+# Dashboard tables and the date column their coverage is measured on
+CATALOG_TABLES: Dict[str, Optional[str]] = {
+    'HEALTHCARE_CLAIMS': 'DATE_KEY',
+    'PHARMACEUTICAL_CLAIMS': 'DATE_KEY',
+    'DIM_PATIENTS': None,
+    'DIM_PROVIDERS': None
+}
+
+CATALOG_COLUMNS = ['TABLE_NAME', 'ROW_COUNT', 'BYTES', 'LAST_ALTERED', 'MIN_DATE', 'MAX_DATE']
+
+class CatalogStatistics:
+    """Process-wide catalog statistics, refreshed when the tables' data version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Tuple[str, ...]], Tuple[str, pd.DataFrame]] = {}
+        self._stats = {'refreshes': 0, 'hits': 0}
+
+    def statistics(self, backend: QueryBackend, tables: Optional[Dict[str, Optional[str]]] = None) -> pd.DataFrame:
+        """One row per table (CATALOG_COLUMNS), in the order given; tables the backend lacks are left out"""
+        tables = tables or CATALOG_TABLES
+        key = (backend.name, tuple(tables))
+        versions = get_version_probe().versions(backend, list(tables))
+        token = ';'.join(f"{table}={version}" for table, version in versions.items()) if versions else time_bucket()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == token:
+                self._stats['hits'] += 1
+                return entry[1]
+
+        df = self._load(backend, tables)
+        with self._lock:
+            self._entries[key] = (token, df)
+            self._stats['refreshes'] += 1
+        return df
+
+    def _load(self, backend: QueryBackend, tables: Dict[str, Optional[str]]) -> pd.DataFrame:
+        stats = backend.table_statistics(list(tables))
+        stats['TABLE_NAME'] = stats['TABLE_NAME'].str.upper()
+
+        dated = {table: column for table, column in tables.items()
+                 if column and table in set(stats['TABLE_NAME'])}
+        ranges = pd.DataFrame(columns=DATE_RANGE_COLUMNS)
+        if dated:
+            try:
+                ranges = backend.date_ranges(dated)
+            except Exception as e:
+                logger.warning("Catalog date ranges unavailable: %s", e)
+
+        df = stats.merge(ranges, on='TABLE_NAME', how='left')
+        order = {table: i for i, table in enumerate(tables)}
+        df = df.sort_values('TABLE_NAME', key=lambda names: names.map(order)).reset_index(drop=True)
+        return df.reindex(columns=CATALOG_COLUMNS)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries)}
+
+_catalog = CatalogStatistics()
+
+def get_catalog_statistics() -> CatalogStatistics:
+    """Process-wide catalog statistics shared by all sessions"""
+    return _catalog
@@ -0,0 +1,130 @@
+"""
+Memory-compact query results
+Results are compacted once after fetch, before they are cached: low-cardinality string
+columns (PROVINCE, GENDER, AGE_BUCKET, PROVIDER_TYPE...) become categoricals and numeric
+columns are downcast where the values round-trip exactly. Category dictionaries are shared
+process-wide, so every result with the same province list references one set of strings.
+Code grouping on compacted columns should pass observed=True to groupby.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Set QHEALTH_COMPACT_RESULTS=0 to keep results exactly as the backend returns them
+COMPACTION_ENABLED = os.environ.get('QHEALTH_COMPACT_RESULTS', '1') != '0'
+
+# A string column is categorized when it has at least this many rows and at most
+# this share of distinct values (repeated labels, not identifiers)
+CATEGORY_MIN_ROWS = 16
+CATEGORY_MAX_RATIO = 0.5
+
+# Distinct category dictionaries kept for sharing; least recently used are dropped first
+SHARED_DICTIONARIES = 1024
+
+# Integers are not narrowed below int32: page arithmetic on int8/int16 columns would overflow
+INTEGER_FLOOR = np.int32
+
+def _memory(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class ResultCompactor:
+    """Compacts result DataFrames and keeps process-wide compaction statistics"""
+
+    def __init__(self, max_dictionaries: int = SHARED_DICTIONARIES):
+        self.max_dictionaries = max_dictionaries
+        self._lock = threading.Lock()
+        self._dictionaries: 'OrderedDict[Tuple[str, ...], pd.CategoricalDtype]' = OrderedDict()
+        self._stats = {'results': 0, 'bytes_before': 0, 'bytes_after': 0,
+                       'categorized': 0, 'downcast': 0, 'shared': 0}
+
+    def _dictionary(self, values: Tuple[str, ...]) -> pd.CategoricalDtype:
+        """The shared dtype for a sorted set of labels, created on first use"""
+        with self._lock:
+            dtype = self._dictionaries.get(values)
+            if dtype is not None:
+                self._dictionaries.move_to_end(values)
+                self._stats['shared'] += 1
+                return dtype
+            dtype = pd.CategoricalDtype([sys.intern(value) for value in values])
+            self._dictionaries[values] = dtype
+            if len(self._dictionaries) > self.max_dictionaries:
+                self._dictionaries.popitem(last=False)
+            return dtype
+
+    def _categorize(self, column: pd.Series) -> pd.Series:
+        if len(column) < CATEGORY_MIN_ROWS or pd.api.types.infer_dtype(column, skipna=True) != 'string':
+            return column
+        values = column.dropna().unique()
+        if len(values) > len(column) * CATEGORY_MAX_RATIO:
+            return column
+        return column.astype(self._dictionary(tuple(sorted(values))))
+
+    @staticmethod
+    def _downcast(column: pd.Series) -> pd.Series:
+        dtype = column.dtype
+        if not isinstance(dtype, np.dtype) or dtype.kind not in 'if' or dtype.itemsize <= 4 or column.empty:
+            return column
+        if dtype.kind == 'i':
+            limits = np.iinfo(INTEGER_FLOOR)
+            if limits.min <= column.min() and column.max() <= limits.max:
+                return column.astype(INTEGER_FLOOR)
+            return column
+        narrow = column.astype(np.float32)
+        # Only when every value (NaN included) survives the round trip unchanged
+        if np.array_equal(narrow.to_numpy(np.float64), column.to_numpy(), equal_nan=True):
+            return narrow
+        return column
+
+    def compact(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Return (compacted copy, report of bytes before/after and the columns changed)"""
+        start_time = time.time()
+        before = _memory(df)
+        columns, categorized, downcast = {}, [], []
+        for name in df.columns:
+            column = df[name]
+            if column.dtype == object or pd.api.types.is_string_dtype(column.dtype):
+                compacted = self._categorize(column)
+                if compacted is not column:
+                    categorized.append(name)
+            else:
+                compacted = self._downcast(column)
+                if compacted is not column:
+                    downcast.append(name)
+            columns[name] = compacted
+
+        result = pd.DataFrame(columns, index=df.index) if categorized or downcast else df
+        after = _memory(result)
+        with self._lock:
+            self._stats['results'] += 1
+            self._stats['bytes_before'] += before
+            self._stats['bytes_after'] += after
+            self._stats['categorized'] += len(categorized)
+            self._stats['downcast'] += len(downcast)
+        return result, {'bytes_before': before, 'bytes_after': after, 'categorized': categorized,
+                        'downcast': downcast, 'seconds': time.time() - start_time}
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['dictionaries'] = len(self._dictionaries)
+        stats['saved_ratio'] = 1 - stats['bytes_after'] / stats['bytes_before'] if stats['bytes_before'] else 0.0
+        return stats
+
+_compactor = ResultCompactor()
+
+def get_result_compactor() -> ResultCompactor:
+    """Process-wide result compactor shared by all sessions"""
+    return _compactor
+
+def compact_result(df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+    """Compact a fetched result; no report when disabled with QHEALTH_COMPACT_RESULTS=0"""
+    if not COMPACTION_ENABLED:
+        return df, None
+    return get_result_compactor().compact(df)
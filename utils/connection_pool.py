@@ -0,0 +1,275 @@
+"""
+Bounded Snowflake connection pool for multi-user dashboard sessions
+Connections are created lazily, reused LIFO, validated cheaply and replaced when broken.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+import snowflake.connector
+
+# ALTER SESSION SET <parameter> = ... / ALTER SESSION UNSET <parameter>
+SESSION_PARAMETER = re.compile(r'^\s*ALTER\s+SESSION\s+(SET|UNSET)\s+(\w+)', re.IGNORECASE)
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout"""
+
+def is_connection_error(exc: BaseException) -> bool:
+    """True when an exception means the connection itself is unusable rather than the query failing"""
+    if isinstance(exc, (snowflake.connector.errors.OperationalError, snowflake.connector.errors.InterfaceError)):
+        return True
+    # Expired sessions surface as ProgrammingError 390112 / 390114 (session or token no longer valid)
+    return getattr(exc, 'errno', None) in (390111, 390112, 390114)
+
+class ConnectionPool:
+    """
+    Thread-safe bounded pool of Snowflake connector connections.
+
+    - Lazy creation: connections are opened on demand, up to max_size.
+    - Liveness without a round trip: a checkout only inspects the local closed flag;
+      a server heartbeat is issued only for connections idle longer than validate_after.
+    - Idle keep-alive: connections are opened with client_session_keep_alive by the
+      factory; idle connections older than max_idle are closed whenever a connection is
+      checked out or returned (there is no background reaper).
+    - Broken connections are discarded on error and replaced on the next checkout.
+    - Heartbeats, connects and closes (server round trips) never run under the pool lock,
+      so one slow session cannot stall every other checkout and return.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = 8, checkout_timeout: float = 30.0,
+                 validate_after: float = 300.0, max_idle: float = 1800.0):
+        self._factory = factory
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.validate_after = validate_after
+        self.max_idle = max_idle
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, last_used) pairs, most recently used last
+        self._session_statements: Dict[str, str] = {}  # session parameter -> statement setting it
+        self._generation = 0  # bumped whenever session statements change
+        self._conn_generation: Dict[int, int] = {}
+        self._size = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'replaced': 0,
+            'expired': 0,
+            'timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+
+    def _open(self, statements: List[str]):
+        """Create a new connection and apply the session statements registered when its slot was reserved"""
+        conn = self._factory()
+        for statement in statements:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(statement)
+            finally:
+                cursor.close()
+        return conn
+
+    @staticmethod
+    def _heartbeat(conn) -> bool:
+        """Server round trip confirming the session is still valid (never called under the lock)"""
+        try:
+            return conn.is_valid()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conns: List[Any]):
+        """Close connections (a server round trip each) after their slots were released"""
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _drop(self, conn):
+        """Release a connection's slot; the caller closes it once the lock is released (caller holds the lock)"""
+        self._size -= 1
+        self._conn_generation.pop(id(conn), None)
+        self._cond.notify()
+        return conn
+
+    def _reap_idle(self) -> List[Any]:
+        """Drop idle connections unused for longer than max_idle and return them for closing (caller holds the lock)"""
+        now = time.time()
+        expired = []
+        # The deque is ordered by last use, so expired connections are at the left
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._stats['expired'] += 1
+            expired.append(self._drop(conn))
+        return expired
+
+    def _reserve(self, start_time: float) -> Tuple[Any, float, int, List[str], List[Any]]:
+        """
+        Under the lock: take the most recently used idle connection, or a slot for a new one,
+        waiting for a release if the pool is full. Returns (connection or None for a new slot,
+        seconds it was idle, generation, session statements, connections to close).
+        """
+        deadline = start_time + self.checkout_timeout
+        to_close = []
+        try:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+
+                while True:
+                    to_close.extend(self._reap_idle())
+                    # Prefer the most recently used idle connection - it is the warmest
+                    while self._idle:
+                        conn, last_used = self._idle.pop()
+                        # The local closed flag costs nothing; heartbeats happen after the lock is released
+                        if conn.is_closed():
+                            self._stats['replaced'] += 1
+                            to_close.append(self._drop(conn))
+                        else:
+                            self._in_use += 1
+                            return conn, time.time() - last_used, self._generation, [], to_close
+
+                    if self._size < self.max_size:
+                        # Reserve the slot, then connect outside the lock
+                        self._size += 1
+                        self._in_use += 1
+                        return None, 0.0, self._generation, list(self._session_statements.values()), to_close
+
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(f"No Snowflake connection available after {self.checkout_timeout:.0f}s "
+                                               f"({self._in_use} in use, pool size {self.max_size})")
+                    self._waiters += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+        except PoolTimeoutError:
+            self._close(to_close)
+            raise
+
+    def _acquire(self):
+        """Check out an idle connection, open a new one, or wait for a release"""
+        start_time = time.time()
+        while True:
+            conn, idle_for, generation, statements, to_close = self._reserve(start_time)
+            self._close(to_close)
+
+            if conn is None:
+                try:
+                    conn = self._open(statements)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._conn_generation[id(conn)] = generation
+                    self._stats['created'] += 1
+                    return self._checked_out(conn, start_time)
+
+            # A heartbeat only after long idle periods
+            if idle_for <= self.validate_after or self._heartbeat(conn):
+                with self._cond:
+                    return self._checked_out(conn, start_time)
+
+            with self._cond:
+                self._in_use -= 1
+                self._stats['replaced'] += 1
+                self._drop(conn)
+            self._close([conn])
+
+    def _checked_out(self, conn, start_time: float):
+        """Record checkout metrics for a reserved connection (caller holds the lock)"""
+        wait = time.time() - start_time
+        self._stats['checkouts'] += 1
+        self._stats['total_wait_seconds'] += wait
+        self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], wait)
+        return conn
+
+    def _release(self, conn, broken: bool):
+        """Return a connection to the idle set, or close it if broken or stale"""
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if broken or self._closed or conn.is_closed():
+                if not self._closed:
+                    self._stats['replaced'] += 1
+                to_close.append(self._drop(conn))
+            elif self._conn_generation.get(id(conn)) != self._generation:
+                # Opened before the latest session statements - recycle it
+                to_close.append(self._drop(conn))
+            else:
+                self._idle.append((conn, time.time()))
+                self._cond.notify()
+            to_close.extend(self._reap_idle())
+        self._close(to_close)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block"""
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+        except BaseException as e:
+            broken = is_connection_error(e)
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def add_session_statement(self, statement: str):
+        """
+        Apply a session-level statement (e.g. ALTER SESSION) to every pooled connection.
+        Statements are kept per session parameter, so the latest SET of a parameter replaces
+        earlier ones and an UNSET drops it. Idle connections are recycled so they reopen with
+        the new settings; in-use ones are replaced on return.
+        """
+        match = SESSION_PARAMETER.match(statement)
+        # Statements that do not set a single parameter are keyed by their text
+        key = match.group(2).upper() if match else ' '.join(statement.split())
+        with self._cond:
+            previous = self._session_statements.pop(key, None)
+            if not (match and match.group(1).upper() == 'UNSET'):
+                self._session_statements[key] = statement
+            if self._session_statements.get(key) == previous:
+                return
+            self._generation += 1
+            idle = [self._drop(conn) for conn, _ in self._idle]
+            self._idle.clear()
+        self._close(idle)
+
+    def metrics(self) -> Dict[str, float]:
+        """Snapshot of pool occupancy and wait statistics for sizing"""
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiters': self._waiters,
+                **self._stats,
+                'avg_wait_seconds': self._stats['total_wait_seconds'] / checkouts if checkouts else 0.0
+            }
+
+    def close(self):
+        """Close idle connections; in-use connections are closed when returned"""
+        with self._cond:
+            self._closed = True
+            idle = [self._drop(conn) for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close(idle)
@@ -0,0 +1,123 @@
+"""
+Data-version-aware cache keys
+Each query is tagged with the tables it reads, and its cache entries are keyed by those tables'
+current versions (LAST_ALTERED / row count on Snowflake, file stamps on the local backend).
+Results then stay valid until a source table changes instead of expiring on a fixed TTL.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from utils.backends import QueryBackend
+
+# Set QHEALTH_DATA_VERSIONING=0 to fall back to time-based expiry for every query
+DATA_VERSIONING_ENABLED = os.environ.get('QHEALTH_DATA_VERSIONING', '1') != '0'
+
+# How long a probed table version is trusted - the longest a fresh load can stay hidden
+VERSION_PROBE_SECONDS = int(os.environ.get('QHEALTH_VERSION_PROBE_SECONDS', 30))
+
+# Expiry for queries whose sources cannot be versioned (monitoring queries, failed probes)
+UNVERSIONED_TTL = 300
+
+TABLE_REFERENCE = re.compile(r'QUANTIUM_HEALTHCARE_DEMO\.QUANTIUM_HEALTHCARE_DEMO\.(\w+)', re.IGNORECASE)
+
+# Plain views change when their base tables do (sql/01_database_setup.sql)
+VIEW_BASE_TABLES = {
+    'VW_CLAIMS_SUMMARY': ['HEALTHCARE_CLAIMS'],
+    'VW_PHARMA_SUMMARY': ['PHARMACEUTICAL_CLAIMS']
+}
+
+# Results depend on the clock as well as the data
+CURRENT_DATE_REFERENCE = re.compile(r'\bCURRENT_DATE\b', re.IGNORECASE)
+CURRENT_TIME_REFERENCE = re.compile(r'\b(CURRENT_TIMESTAMP|CURRENT_TIME|SYSDATE|GETDATE|QUERY_HISTORY\w*)\b',
+                                    re.IGNORECASE)
+
+def tables_read(query: str) -> List[str]:
+    """Base tables a query reads, resolved through summary views"""
+    tables = set()
+    for name in TABLE_REFERENCE.findall(query):
+        tables.update(VIEW_BASE_TABLES.get(name.upper(), [name.upper()]))
+    return sorted(tables)
+
+class TableVersionProbe:
+    """
+    Process-wide cache of table versions, refreshed at most every probe_seconds.
+    A refresh re-stamps every known table in one metadata query, so the probe costs one
+    round trip per interval however many queries are served.
+    """
+
+    def __init__(self, probe_seconds: int = VERSION_PROBE_SECONDS):
+        self.probe_seconds = probe_seconds
+        self._lock = threading.Lock()
+        self._versions: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._stats = {'probes': 0, 'failures': 0}
+
+    def versions(self, backend: QueryBackend, tables: List[str]) -> Optional[Dict[str, str]]:
+        """Current version of every table, or None if any of them cannot be versioned"""
+        now = time.time()
+        with self._lock:
+            stale = [t for t in tables
+                     if (backend.name, t) not in self._versions
+                     or now - self._versions[(backend.name, t)][1] > self.probe_seconds]
+            if stale:
+                # Refresh everything known for this backend along with the stale tables
+                known = {t for (name, t) in self._versions if name == backend.name}
+                probe = sorted(known | set(stale))
+                self._stats['probes'] += 1
+                try:
+                    found = backend.table_versions(probe)
+                except Exception:
+                    self._stats['failures'] += 1
+                    found = {}
+                for table in probe:
+                    self._versions[(backend.name, table)] = (found.get(table), now)
+
+            versions = {t: self._versions[(backend.name, t)][0] for t in tables}
+        if any(version is None for version in versions.values()):
+            return None
+        return versions
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'tables': len(self._versions)}
+
+_probe = TableVersionProbe()
+
+def get_version_probe() -> TableVersionProbe:
+    """Process-wide table version probe shared by all sessions"""
+    return _probe
+
+def data_version(backend: QueryBackend, query: str) -> Optional[str]:
+    """
+    Version token for a query's result: its source table versions, plus today's date for
+    CURRENT_DATE windows. None when the result cannot be versioned and must expire by time.
+    """
+    if not DATA_VERSIONING_ENABLED or CURRENT_TIME_REFERENCE.search(query):
+        return None
+    tables = tables_read(query)
+    if not tables:
+        return None
+    versions = get_version_probe().versions(backend, tables)
+    if versions is None:
+        return None
+
+    token = ';'.join(f"{table}={version}" for table, version in versions.items())
+    if CURRENT_DATE_REFERENCE.search(query):
+        token += f";date={date.today().isoformat()}"
+    return token
+
+def time_bucket(ttl: int = UNVERSIONED_TTL) -> str:
+    """Stand-in version for unversioned results: changes every ttl seconds"""
+    return f"t{int(time.time() // ttl)}"
+
+def dataset_version(backend: QueryBackend, queries: List[str]) -> str:
+    """Version token for a dataset built from several queries; a time bucket if any is unversioned"""
+    return data_version(backend, '\n'.join(queries)) or time_bucket()
@@ -0,0 +1,156 @@
+"""
+Process-wide shared dataset store
+Dashboard pages load a whole dataset (a dict of section DataFrames plus load stats) per
+data version. Instead of every session copying it into st.session_state, the dataset is stored
+once here under (name, version) and sessions hold a DatasetLease - a counted reference that is
+released when the session drops it (new version, new filters or the session ending).
+Entries are read-only: get() hands out shallow copies, so adding columns never reaches the
+shared frames. The store is bounded by bytes; superseded and unreferenced datasets go first.
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Upper bound on the memory held by stored datasets
+DATASET_STORE_BYTES = int(float(os.environ.get('QHEALTH_DATASET_STORE_MB', 512)) * 1024 * 1024)
+
+DatasetKey = Tuple[str, str]
+
+def dataset_bytes(data: Dict[str, Any]) -> int:
+    """Deep memory of the DataFrames in a dataset"""
+    return sum(int(value.memory_usage(index=True, deep=True).sum())
+               for value in data.values() if isinstance(value, pd.DataFrame))
+
+class DatasetLease:
+    """A session's reference to a stored dataset; dropping or releasing it decrements the count"""
+
+    def __init__(self, store: 'DatasetStore', key: DatasetKey):
+        self.key = key
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    def release(self):
+        self._finalizer()
+
+class _Entry:
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.bytes = dataset_bytes(data)
+        self.created = time.time()
+        self.hits = 0
+
+class DatasetStore:
+    """Reference-counted, byte-bounded LRU store of datasets keyed by (name, data version)"""
+
+    def __init__(self, max_bytes: int = DATASET_STORE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[DatasetKey, _Entry]' = OrderedDict()
+        self._refs: Dict[DatasetKey, int] = {}
+        self._latest: Dict[str, str] = {}
+        # Lease finalizers can run inside garbage collection at any point, even while this
+        # thread holds the lock, so releases are queued and applied on the next store call
+        self._released = deque()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evictions': 0}
+
+    @staticmethod
+    def _view(data: Dict[str, Any]) -> Dict[str, Any]:
+        # Shallow copies share the stored arrays but keep column changes local to the caller
+        return {name: value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+                for name, value in data.items()}
+
+    def get(self, name: str, version: str) -> Optional[Dict[str, Any]]:
+        """The stored dataset for this version, or None if it has to be loaded"""
+        with self._lock:
+            self._apply_releases()
+            entry = self._entries.get((name, version))
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end((name, version))
+            entry.hits += 1
+            self._stats['hits'] += 1
+            return self._view(entry.data)
+
+    def put(self, name: str, version: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a freshly loaded dataset (replacing the same version) and return a view of it"""
+        key = (name, version)
+        entry = _Entry(data)
+        with self._lock:
+            self._apply_releases()
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).bytes
+            self._entries[key] = entry
+            self._bytes += entry.bytes
+            self._latest[name] = version
+            self._stats['stored'] += 1
+            # Older versions of this dataset are dead once no session points at them
+            for old in [k for k in self._entries if k[0] == name and k != key and not self._refs.get(k)]:
+                self._evict(old)
+            self._enforce_limit(keep=key)
+        return self._view(data)
+
+    def lease(self, name: str, version: str) -> DatasetLease:
+        """Count a session's reference to a dataset until the returned lease is dropped"""
+        key = (name, version)
+        with self._lock:
+            self._apply_releases()
+            self._refs[key] = self._refs.get(key, 0) + 1
+        return DatasetLease(self, key)
+
+    def _release(self, key: DatasetKey):
+        self._released.append(key)
+
+    def _apply_releases(self):
+        while self._released:
+            key = self._released.popleft()
+            refs = self._refs.get(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+                continue
+            self._refs.pop(key, None)
+            if key in self._entries and self._latest.get(key[0]) != key[1]:
+                self._evict(key)
+
+    def _evict(self, key: DatasetKey):
+        self._bytes -= self._entries.pop(key).bytes
+        self._stats['evictions'] += 1
+
+    def _enforce_limit(self, keep: DatasetKey):
+        # Unreferenced datasets first, then referenced ones (their sessions reload on the next rerun)
+        for referenced in (False, True):
+            for key in list(self._entries):
+                if self._bytes <= self.max_bytes:
+                    return
+                if key != keep and bool(self._refs.get(key)) == referenced:
+                    self._evict(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._apply_releases()
+            datasets: List[Dict[str, Any]] = [
+                {'name': name, 'version': version, 'bytes': entry.bytes, 'sessions': self._refs.get((name, version), 0),
+                 'hits': entry.hits, 'age_seconds': now - entry.created}
+                for (name, version), entry in self._entries.items()
+            ]
+            return {**self._stats, 'entries': len(self._entries), 'bytes': self._bytes,
+                    'max_bytes': self.max_bytes, 'sessions': sum(self._refs.values()), 'datasets': datasets}
+
+_store = DatasetStore()
+
+def get_dataset_store() -> DatasetStore:
+    """Process-wide dataset store shared by all sessions"""
+    return _store
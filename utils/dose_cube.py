@@ -0,0 +1,199 @@
+"""
+Single-scan GROUPING SETS cube for the Q.Dose page
+Six DOSE_QUERIES aggregate PHARMACEUTICAL_CLAIMS over YEAR BETWEEN 2017 AND 2019 at
+different groupings. DOSE_CUBE_QUERY computes all six in one table scan and
+split_dose_cube rebuilds the DataFrames the individual queries return.
+"""
+
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+# Opt-in: the single scan pays off when scans dominate (Snowflake micro-partitions), but every
+# grouping set also evaluates every COUNT(DISTINCT), so confirm with benchmarks/bench_dose_cube.py
+DOSE_CUBE_MODE = os.environ.get('QHEALTH_DOSE_CUBE', '0') == '1'
+
+# DOSE_QUERIES answered by the cube
+CUBE_QUERY_NAMES = [
+    'overview_kpis', 'atc_hierarchy', 'patient_demographics',
+    'provider_patterns', 'financial_breakdown', 'yearly_trends'
+]
+
+# GROUPING() is 0 for columns in the row's grouping set; YEAR alone is financial_breakdown,
+# YEAR plus MONTH_KEY is yearly_trends, and the empty set is the overview total
+DOSE_CUBE_QUERY = """
+    SELECT
+        CASE
+            WHEN GROUPING(ATC_LEVEL_DESC_1) = 0 THEN 'atc_hierarchy'
+            WHEN GROUPING(AGE_BUCKET) = 0 THEN 'patient_demographics'
+            WHEN GROUPING(PROVIDER) = 0 THEN 'provider_patterns'
+            WHEN GROUPING(MONTH_KEY) = 0 THEN 'yearly_trends'
+            WHEN GROUPING(YEAR) = 0 THEN 'financial_breakdown'
+            ELSE 'overview_kpis'
+        END as GROUPING_SET,
+        ATC_LEVEL_DESC_1,
+        ATC_LEVEL_DESC_2,
+        ATC_LEVEL_DESC_3,
+        AGE_BUCKET,
+        GENDER,
+        PROVINCE,
+        PROVIDER,
+        PROVIDER_TYPE,
+        PROVIDER_PROVINCE,
+        YEAR,
+        MONTH_KEY,
+        MONTH_KEY / 100 as YEAR_EXTRACTED,
+        MONTH_KEY % 100 as MONTH_EXTRACTED,
+        SUM(CLAIMS) as TOTAL_PRESCRIPTIONS,
+        COUNT(DISTINCT ENTITY_NO) as UNIQUE_PATIENTS,
+        COUNT(DISTINCT PROVIDER) as UNIQUE_PROVIDERS,
+        COUNT(DISTINCT NAPPI9) as UNIQUE_PRODUCTS,
+        SUM(AMT_PAID) as TOTAL_BENEFIT_PAID,
+        AVG(AMT_PAID) as AVG_AMT_PAID,
+        MAX(AMT_PAID) as MAX_AMT_PAID,
+        STDDEV(AMT_PAID) as STDDEV_AMT_PAID,
+        SUM(AMT_CLAIMED) as TOTAL_GROSS_COST,
+        SUM(AMT_PAID_MEM) as SUM_AMT_PAID_MEM,
+        SUM(AMT_PAID_CEB) as SUM_AMT_PAID_CEB,
+        SUM(AMT_PAID_MSA) as SUM_AMT_PAID_MSA,
+        SUM(AMT_PAID_ATB) as SUM_AMT_PAID_ATB,
+        SUM(AMT_PAID_GPN) as SUM_AMT_PAID_GPN,
+        SUM(AMT_PAID_PROV) as SUM_AMT_PAID_PROV,
+        SUM(AMT_PAID_MOB) as SUM_AMT_PAID_MOB,
+        SUM(AMT_PAID_HCC) as SUM_AMT_PAID_HCC,
+        SUM(AMT_PAID_PMB) as SUM_AMT_PAID_PMB,
+        SUM(AMT_PAID_TP) as SUM_AMT_PAID_TP
+    FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.PHARMACEUTICAL_CLAIMS
+    WHERE YEAR BETWEEN 2017 AND 2019
+    GROUP BY GROUPING SETS (
+        (),
+        (ATC_LEVEL_DESC_1, ATC_LEVEL_DESC_2, ATC_LEVEL_DESC_3),
+        (AGE_BUCKET, GENDER, PROVINCE),
+        (PROVIDER, PROVIDER_TYPE, PROVIDER_PROVINCE),
+        (YEAR),
+        (YEAR, MONTH_KEY)
+    )
+"""
+
+# Output columns of each query as (name, cube column); None marks the literal 'N/A' codes
+_CUBE_COLUMNS = {
+    'overview_kpis': [
+        ('TOTAL_PRESCRIPTIONS', 'TOTAL_PRESCRIPTIONS'),
+        ('UNIQUE_PATIENTS', 'UNIQUE_PATIENTS'),
+        ('UNIQUE_PROVIDERS', 'UNIQUE_PROVIDERS'),
+        ('TOTAL_BENEFIT_PAID', 'TOTAL_BENEFIT_PAID'),
+        ('TOTAL_COPAY', 'SUM_AMT_PAID_MEM'),
+        ('TOTAL_GROSS_COST', 'TOTAL_GROSS_COST'),
+        ('AVG_BENEFIT_PAID', 'AVG_AMT_PAID')
+    ],
+    'atc_hierarchy': [
+        ('ATC_LEVEL_1_CODE', None),
+        ('ATC_LEVEL_DESC_1', 'ATC_LEVEL_DESC_1'),
+        ('ATC_LEVEL_2_CODE', None),
+        ('ATC_LEVEL_DESC_2', 'ATC_LEVEL_DESC_2'),
+        ('ATC_LEVEL_3_CODE', None),
+        ('ATC_LEVEL_DESC_3', 'ATC_LEVEL_DESC_3'),
+        ('TOTAL_PRESCRIPTIONS', 'TOTAL_PRESCRIPTIONS'),
+        ('TOTAL_BENEFIT_PAID', 'TOTAL_BENEFIT_PAID'),
+        ('TOTAL_GROSS_COST', 'TOTAL_GROSS_COST'),
+        ('AVG_BENEFIT_PAID', 'AVG_AMT_PAID'),
+        ('UNIQUE_PATIENTS', 'UNIQUE_PATIENTS')
+    ],
+    'patient_demographics': [
+        ('AGE_BUCKET', 'AGE_BUCKET'),
+        ('GENDER', 'GENDER'),
+        ('PROVINCE', 'PROVINCE'),
+        ('UNIQUE_PATIENTS', 'UNIQUE_PATIENTS'),
+        ('TOTAL_PRESCRIPTIONS', 'TOTAL_PRESCRIPTIONS'),
+        ('TOTAL_BENEFIT_PAID', 'TOTAL_BENEFIT_PAID'),
+        ('AVG_BENEFIT_PER_PATIENT', 'AVG_AMT_PAID'),
+        ('TOTAL_GROSS_COST', 'TOTAL_GROSS_COST')
+    ],
+    'provider_patterns': [
+        ('PROVIDER_NAME', 'PROVIDER'),
+        ('PROVIDER_TYPE', 'PROVIDER_TYPE'),
+        ('PROVIDER_PROVINCE', 'PROVIDER_PROVINCE'),
+        ('TOTAL_PRESCRIPTIONS', 'TOTAL_PRESCRIPTIONS'),
+        ('UNIQUE_PATIENTS', 'UNIQUE_PATIENTS'),
+        ('UNIQUE_PRODUCTS', 'UNIQUE_PRODUCTS'),
+        ('TOTAL_BENEFIT_PAID', 'TOTAL_BENEFIT_PAID'),
+        ('AVG_PRESCRIPTION_VALUE', 'AVG_AMT_PAID'),
+        ('MAX_PRESCRIPTION_VALUE', 'MAX_AMT_PAID'),
+        ('PRESCRIPTION_VALUE_STDDEV', 'STDDEV_AMT_PAID')
+    ],
+    'financial_breakdown': [
+        ('YEAR', 'YEAR'),
+        ('TOTAL_PRESCRIPTIONS', 'TOTAL_PRESCRIPTIONS'),
+        ('BENEFIT_PAID', 'TOTAL_BENEFIT_PAID'),
+        ('PATIENT_COPAY', 'SUM_AMT_PAID_MEM'),
+        ('DEDUCTIBLE', 'SUM_AMT_PAID_CEB'),
+        ('COINSURANCE', 'SUM_AMT_PAID_MSA'),
+        ('GROSS_DRUG_COST', 'TOTAL_GROSS_COST'),
+        ('ALLOWABLE_COST', 'SUM_AMT_PAID_ATB'),
+        ('INGREDIENT_COST', 'SUM_AMT_PAID_GPN'),
+        ('DISPENSING_FEE', 'SUM_AMT_PAID_PROV'),
+        ('SALES_TAX', 'SUM_AMT_PAID_MOB'),
+        ('INCENTIVE_FEE', 'SUM_AMT_PAID_HCC'),
+        ('PROFESSIONAL_FEE', 'SUM_AMT_PAID_PMB'),
+        ('OTHER_FEES', 'SUM_AMT_PAID_TP')
+    ],
+    'yearly_trends': [
+        ('YEAR', 'YEAR'),
+        ('YEAR_EXTRACTED', 'YEAR_EXTRACTED'),
+        ('MONTH_EXTRACTED', 'MONTH_EXTRACTED'),
+        ('PRESCRIPTION_COUNT', 'TOTAL_PRESCRIPTIONS'),
+        ('TOTAL_BENEFIT_PAID', 'TOTAL_BENEFIT_PAID'),
+        ('AVG_PRESCRIPTION_VALUE', 'AVG_AMT_PAID'),
+        ('UNIQUE_PATIENTS', 'UNIQUE_PATIENTS'),
+        ('UNIQUE_PROVIDERS', 'UNIQUE_PROVIDERS')
+    ]
+}
+
+# Grouping columns that come back nullable (float or Int64) from the cube but are int64 in the original queries
+_INTEGER_COLUMNS = ['YEAR', 'MONTH_KEY', 'MONTH_EXTRACTED']
+
+def _restore_integers(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    for col in columns:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]) and df[col].notna().all():
+            # Nullable Int32/Int64 keep their width; floats holding integers become int64
+            dtype = getattr(df[col].dtype, 'numpy_dtype', None)
+            df[col] = df[col].astype(dtype if dtype is not None else 'int64')
+    return df
+
+def split_dose_cube(cube: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Split the cube result into {query_name: DataFrame} with the same columns, ordering,
+    HAVING filters and LIMITs as the corresponding DOSE_QUERIES.
+    """
+    results = {}
+    for name, columns in _CUBE_COLUMNS.items():
+        if 'GROUPING_SET' not in cube.columns:
+            # Failed cube query - empty frames, as execute_queries returns for failed queries
+            results[name] = pd.DataFrame(columns=[output for output, _ in columns])
+            continue
+
+        part = _restore_integers(cube[cube['GROUPING_SET'] == name].copy(), _INTEGER_COLUMNS)
+
+        if name == 'provider_patterns':
+            # HAVING SUM(CLAIMS) >= 50 ... LIMIT 100
+            part = part[part['TOTAL_PRESCRIPTIONS'] >= 50]
+            part = part.sort_values('TOTAL_PRESCRIPTIONS', ascending=False, kind='mergesort').head(100)
+        elif name in ('atc_hierarchy', 'patient_demographics'):
+            part = part.sort_values('TOTAL_PRESCRIPTIONS', ascending=False, kind='mergesort')
+        elif name == 'financial_breakdown':
+            part = part.sort_values('YEAR', kind='mergesort')
+        elif name == 'yearly_trends':
+            part = part.sort_values(['YEAR', 'MONTH_KEY'], kind='mergesort')
+
+        frame = pd.DataFrame(index=part.index)
+        for output, source in columns:
+            if source is None:
+                frame[output] = 'N/A'
+            elif isinstance(part[source].dtype, pd.CategoricalDtype):
+                # Compacted cube columns carry every grouping set's labels - keep this section's
+                frame[output] = part[source].cat.remove_unused_categories()
+            else:
+                frame[output] = part[source]
+        results[name] = frame.reset_index(drop=True)
+    return results
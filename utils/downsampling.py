@@ -0,0 +1,119 @@
+"""
+Point-budget downsampling for time-series charts
+A line chart never needs more points than the screen has pixels. Series longer than the
+point budget are reduced before they reach Plotly, with one of two shape-preserving modes:
+- 'lttb': Largest-Triangle-Three-Buckets keeps, per bucket, the point forming the largest
+  triangle with its neighbours, which follows the visual shape including isolated spikes
+- 'minmax': the minimum and maximum of every bucket, an exact envelope of the series
+Both keep the first and last point. The x values must be sorted (dates are fine).
+"""
+
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Points kept per series; longer series are downsampled
+DOWNSAMPLE_POINTS = int(os.environ.get('QHEALTH_CHART_POINTS', 2000))
+
+# 'lttb' or 'minmax'
+DOWNSAMPLE_MODE = os.environ.get('QHEALTH_DOWNSAMPLE_MODE', 'lttb')
+
+DOWNSAMPLE_MODES = ('lttb', 'minmax')
+
+def _numeric(x) -> np.ndarray:
+    """x values as float64; datetimes as nanoseconds, anything else non-numeric as positions"""
+    values = pd.Series(x) if not isinstance(x, pd.Series) else x
+    if values.dtype == object:
+        # Snowflake DATE columns arrive as datetime.date objects
+        try:
+            values = pd.to_datetime(values)
+        except (TypeError, ValueError):
+            return np.arange(len(values), dtype=np.float64)
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.to_numpy('datetime64[ns]').astype(np.int64).astype(np.float64)
+    if not pd.api.types.is_numeric_dtype(values.dtype):
+        return np.arange(len(values), dtype=np.float64)
+    return values.to_numpy(np.float64)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions of the threshold points LTTB selects from (x, y)"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # n - 2 interior points split into threshold - 2 buckets; bucket means are the right-hand anchors
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The last bucket's right-hand anchor is the final point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    # Each bucket depends on the point chosen in the previous one; the areas within a bucket are vectorized
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - next_x[i]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (next_y[i] - ay))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions of the minimum and maximum of each of threshold // 2 buckets, plus both ends"""
+    n = len(y)
+    buckets = max(threshold // 2 - 1, 1)
+    if threshold >= n or buckets >= n:
+        return np.arange(n)
+
+    size = int(np.ceil(n / buckets))
+    padded = np.full(size * int(np.ceil(n / size)), np.nan)
+    padded[:n] = y
+    grid = padded.reshape(-1, size)
+    # NaNs (padding or missing values) never win; an all-NaN bucket yields its first position
+    lows = np.argmin(np.where(np.isnan(grid), np.inf, grid), axis=1)
+    highs = np.argmax(np.where(np.isnan(grid), -np.inf, grid), axis=1)
+    offsets = np.arange(grid.shape[0]) * size
+    indices = np.concatenate(([0, n - 1], offsets + lows, offsets + highs))
+    return np.unique(indices[indices < n])
+
+def downsample_indices(x, y, max_points: int = DOWNSAMPLE_POINTS, mode: str = DOWNSAMPLE_MODE) -> np.ndarray:
+    """Sorted positions to keep so that the series fits in max_points"""
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError(f"Unknown downsampling mode '{mode}' (expected one of {DOWNSAMPLE_MODES})")
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    if mode == 'minmax':
+        return minmax_indices(y, max_points)
+    return lttb_indices(_numeric(x), y, max_points)
+
+def downsample_frame(df: pd.DataFrame, x_col: str, y_col: str, group_col: Optional[Union[str, List[str]]] = None,
+                     max_points: int = DOWNSAMPLE_POINTS, mode: str = DOWNSAMPLE_MODE) -> pd.DataFrame:
+    """
+    Rows of df (sorted by x_col) that keep each series - one per group_col value - within
+    max_points. Returns df itself when no series is over budget. Rows with a missing y are dropped
+    from series that are downsampled.
+    """
+    if group_col is None:
+        series = [np.arange(len(df))]
+    else:
+        codes = df.groupby(group_col, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+        series = [np.flatnonzero(codes == code) for code in range(codes.max() + 1)] if len(codes) else []
+    if all(len(positions) <= max_points for positions in series):
+        return df
+
+    keep = []
+    for positions in series:
+        if len(positions) > max_points:
+            y = df[y_col].to_numpy(np.float64)[positions]
+            positions = positions[~np.isnan(y)]
+            x = df[x_col].iloc[positions]
+            positions = positions[downsample_indices(x, y[~np.isnan(y)], max_points, mode)]
+        keep.append(positions)
+    return df.iloc[np.sort(np.concatenate(keep))]
@@ -0,0 +1,297 @@
+"""
+Embedded DuckDB backend - a local stand-in for Snowflake
+Loads the HEALTHCARE_CLAIMS / PHARMACEUTICAL_CLAIMS schemas from local Parquet so every
+dashboard page can be run, profiled and benchmarked with no network access.
+"""
+
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from utils.backends import DATE_RANGE_COLUMNS, PYFORMAT_PARAM, TABLE_STATISTICS_COLUMNS, QueryBackend
+
+try:
+    import duckdb
+except ImportError:  # Optional dependency - only needed for offline runs
+    duckdb = None
+
+DATABASE = 'QUANTIUM_HEALTHCARE_DEMO'
+SCHEMA = 'QUANTIUM_HEALTHCARE_DEMO'
+LOCAL_DATA_DIR = os.environ.get('QHEALTH_LOCAL_DATA_DIR', os.path.join('data', 'local'))
+
+# Summary views from sql/01_database_setup.sql, created when their base tables are present
+SUMMARY_VIEWS = {
+    'VW_CLAIMS_SUMMARY': ('HEALTHCARE_CLAIMS', """
+        SELECT YEAR, MONTH_NO, P_PROVINCE, CATEGORY_DESCR, TR_LEVEL_1,
+            COUNT(*) AS CLAIM_COUNT,
+            SUM(AMT_CLAIMED_TY) AS TOTAL_CLAIMED_TY,
+            SUM(AMT_PAID_TY) AS TOTAL_PAID_TY,
+            SUM(UNITS_TY) AS TOTAL_UNITS_TY,
+            AVG(AMT_CLAIMED_TY) AS AVG_CLAIMED_TY,
+            AVG(AMT_PAID_TY) AS AVG_PAID_TY
+        FROM {schema}.HEALTHCARE_CLAIMS
+        GROUP BY YEAR, MONTH_NO, P_PROVINCE, CATEGORY_DESCR, TR_LEVEL_1
+    """),
+    'VW_PHARMA_SUMMARY': ('PHARMACEUTICAL_CLAIMS', """
+        SELECT YEAR, MONTH_KEY, PROVINCE, PROVIDER_TYPE, ATC_LEVEL_DESC_1, AGE_GROUPS, GENDER,
+            COUNT(*) AS PRESCRIPTION_COUNT,
+            SUM(AMT_CLAIMED) AS TOTAL_CLAIMED,
+            SUM(AMT_PAID) AS TOTAL_PAID,
+            SUM(QTY) AS TOTAL_QUANTITY,
+            AVG(AMT_CLAIMED) AS AVG_CLAIMED,
+            AVG(AMT_PAID) AS AVG_PAID
+        FROM {schema}.PHARMACEUTICAL_CLAIMS
+        GROUP BY YEAR, MONTH_KEY, PROVINCE, PROVIDER_TYPE, ATC_LEVEL_DESC_1, AGE_GROUPS, GENDER
+    """)
+}
+
+# =====================================================
+# SNOWFLAKE -> DUCKDB DIALECT SHIM
+# =====================================================
+# ILIKE, STDDEV, NULLIF and DATE_TRUNC parse natively in DuckDB. The rewrites below cover
+# the remaining Snowflake-isms used in utils/queries.py and the semantic gaps between them.
+
+def _split_args(args: str) -> List[str]:
+    """Split a function argument list on top-level commas, respecting parentheses and quotes"""
+    parts, depth, quote, current = [], 0, None, []
+    for ch in args:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    parts.append(''.join(current).strip())
+    return parts
+
+def _rewrite_calls(sql: str, function: str, rewrite: Callable[[List[str]], str]) -> str:
+    """Replace every call of `function(...)` with rewrite(args), handling nested parentheses"""
+    pattern = re.compile(r'\b' + function + r'\s*\(', re.IGNORECASE)
+    out, pos = [], 0
+    while True:
+        match = pattern.search(sql, pos)
+        if not match:
+            out.append(sql[pos:])
+            return ''.join(out)
+
+        depth, end = 1, match.end()
+        while end < len(sql) and depth:
+            if sql[end] == '(':
+                depth += 1
+            elif sql[end] == ')':
+                depth -= 1
+            end += 1
+
+        inner = _rewrite_calls(sql[match.end():end - 1], function, rewrite)
+        out.append(sql[pos:match.start()])
+        out.append(rewrite(_split_args(inner)))
+        pos = end
+
+def _dateadd(args: List[str]) -> str:
+    part = args[0].strip("'\"")
+    return f"({args[2]} + ({args[1]}) * INTERVAL 1 {part})"
+
+def translate_sql(query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Translate dashboard Snowflake SQL into DuckDB SQL"""
+    sql = query
+
+    # LISTAGG(DISTINCT x, ', ') -> STRING_AGG(DISTINCT x, ', ')
+    sql = _rewrite_calls(sql, 'LISTAGG', lambda args: f"STRING_AGG({', '.join(args)})")
+
+    # Snowflake returns a DATE when truncating a DATE; DuckDB returns a TIMESTAMP
+    sql = _rewrite_calls(sql, 'DATE_TRUNC', lambda args: f"CAST(DATE_TRUNC({', '.join(args)}) AS DATE)")
+
+    # DATEADD(month, -6, CURRENT_DATE) -> (CURRENT_DATE + (-6) * INTERVAL 1 month)
+    sql = _rewrite_calls(sql, 'DATEADD', _dateadd)
+
+    # INTERVAL '12 MONTHS' -> INTERVAL 12 MONTH
+    sql = re.sub(r"INTERVAL\s+'(\d+)\s+([A-Za-z]+?)S?'", r'INTERVAL \1 \2', sql, flags=re.IGNORECASE)
+
+    # Niladic functions Snowflake allows with parentheses
+    sql = re.sub(r'\b(CURRENT_TIMESTAMP|CURRENT_DATE)\(\)', r'\1', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bCURRENT_VERSION\(\)', 'version()', sql, flags=re.IGNORECASE)
+
+    # Pyformat binds -> DuckDB named parameters; %% is only an escape when binding
+    if params:
+        sql = PYFORMAT_PARAM.sub(r'$\1', sql).replace('%%', '%')
+
+    return sql
+
+class DuckDBBackend(QueryBackend):
+    """
+    In-process DuckDB engine over local Parquet files.
+
+    Every `<TABLE>.parquet` file (or `<TABLE>/` directory of Parquet parts) in data_dir is
+    exposed as QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.<TABLE>, matching the
+    fully qualified names in utils/queries.py. Tables are views over the files by default;
+    materialize=True copies them into memory for warehouse-like scan speed.
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, data_dir: str = LOCAL_DATA_DIR, materialize: bool = False, threads: Optional[int] = None):
+        if duckdb is None:
+            raise ImportError("The duckdb package is required for the local backend (pip install duckdb)")
+        if not os.path.isdir(data_dir):
+            raise FileNotFoundError(f"Local data directory not found: {data_dir}")
+
+        self.data_dir = data_dir
+        self.materialize = materialize
+        self._conn = duckdb.connect(':memory:')
+        if threads:
+            self._conn.execute(f"SET threads = {int(threads)}")
+        self._conn.execute(f"ATTACH ':memory:' AS {DATABASE}")
+        self._conn.execute(f"CREATE SCHEMA {DATABASE}.{SCHEMA}")
+        self.tables = self._load_tables()
+
+    def table_paths(self) -> Dict[str, str]:
+        """Map each local table name to its Parquet file or directory"""
+        paths = {}
+        for entry in sorted(os.listdir(self.data_dir)):
+            path = os.path.join(self.data_dir, entry)
+            if entry.endswith('.parquet'):
+                paths[entry[:-len('.parquet')].upper()] = path
+            elif os.path.isdir(path):
+                paths[entry.upper()] = path
+        return paths
+
+    @staticmethod
+    def _parquet_files(path: str) -> List[str]:
+        """The Parquet file itself, or every part in a Parquet directory"""
+        if os.path.isdir(path):
+            return [entry.path for entry in os.scandir(path) if entry.name.endswith('.parquet')]
+        return [path]
+
+    def _file_version(self, path: str) -> str:
+        """mtime and size of a Parquet file, or of every part in a Parquet directory"""
+        if os.path.isdir(path):
+            parts = [entry.stat() for entry in os.scandir(path) if entry.name.endswith('.parquet')]
+            return f"{len(parts)}/{max((s.st_mtime_ns for s in parts), default=0)}/{sum(s.st_size for s in parts)}"
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}/{stat.st_size}"
+
+    def table_versions(self, tables: List[str]) -> Dict[str, str]:
+        """File stamps for views over Parquet; materialized tables keep the stamp they were loaded with"""
+        if self.materialize:
+            return {table: self._loaded_versions[table] for table in tables if table in self._loaded_versions}
+        paths = self.table_paths()
+        versions = {}
+        for table in tables:
+            if table in paths:
+                try:
+                    versions[table] = self._file_version(paths[table])
+                except OSError:
+                    pass
+        return versions
+
+    def table_statistics(self, tables: List[str]) -> pd.DataFrame:
+        """Row counts from Parquet footers plus file sizes and mtimes - no data pages are read"""
+        paths = self.table_paths()
+        rows = []
+        for table in tables:
+            if table not in paths:
+                continue
+            files = self._parquet_files(paths[table])
+            try:
+                stats = [os.stat(f) for f in files]
+                rows.append({
+                    'TABLE_NAME': table,
+                    'ROW_COUNT': sum(pq.read_metadata(f).num_rows for f in files),
+                    'BYTES': sum(stat.st_size for stat in stats),
+                    'LAST_ALTERED': pd.Timestamp(max((stat.st_mtime for stat in stats), default=0), unit='s')
+                })
+            except OSError:
+                continue
+        return pd.DataFrame(rows, columns=TABLE_STATISTICS_COLUMNS)
+
+    def date_ranges(self, columns: Dict[str, str]) -> pd.DataFrame:
+        """
+        MIN/MAX from the row group statistics in the Parquet footers - no data pages are read.
+        Tables with a row group that has no min/max for the column are left out.
+        """
+        paths = self.table_paths()
+        rows = []
+        for table, column in columns.items():
+            if table not in paths:
+                continue
+            bounds = []
+            try:
+                for path in self._parquet_files(paths[table]):
+                    metadata = pq.read_metadata(path)
+                    index = metadata.schema.names.index(column)
+                    for i in range(metadata.num_row_groups):
+                        chunk = metadata.row_group(i).column(index)
+                        if chunk.num_values == 0:
+                            continue  # all-null row group
+                        stats = chunk.statistics
+                        if stats is None or not stats.has_min_max:
+                            raise ValueError(f"{path} row group {i} has no {column} statistics")
+                        bounds.append((stats.min, stats.max))
+            except (OSError, ValueError):
+                continue
+            if bounds:
+                rows.append({
+                    'TABLE_NAME': table,
+                    'MIN_DATE': min(low for low, _ in bounds),
+                    'MAX_DATE': max(high for _, high in bounds)
+                })
+        return pd.DataFrame(rows, columns=DATE_RANGE_COLUMNS)
+
+    def _load_tables(self) -> List[str]:
+        qualified = f"{DATABASE}.{SCHEMA}"
+        loaded = []
+        self._loaded_versions = {}
+        for table, path in self.table_paths().items():
+            self._loaded_versions[table] = self._file_version(path)
+            source = os.path.join(path, '*.parquet') if os.path.isdir(path) else path
+            kind = 'TABLE' if self.materialize else 'VIEW'
+            self._conn.execute(f"CREATE {kind} {qualified}.{table} AS SELECT * FROM read_parquet('{source}')")
+            loaded.append(table)
+
+        for view, (base_table, definition) in SUMMARY_VIEWS.items():
+            if base_table in loaded and view not in loaded:
+                self._conn.execute(f"CREATE VIEW {qualified}.{view} AS {definition.format(schema=qualified)}")
+                loaded.append(view)
+        return loaded
+
+    def execute(self, query: str, params: Optional[Dict[str, Any]] = None,
+                fetch_mode: Optional[str] = None, timings: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        start_time = time.time()
+        # A cursor per call gives each thread its own handle onto the shared database
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(translate_sql(query, params), params or None)
+            execute_seconds = time.time() - start_time
+            df = cursor.df()
+        finally:
+            cursor.close()
+
+        if timings is not None:
+            timings['execute_seconds'] = execute_seconds
+            timings['fetch_seconds'] = time.time() - start_time - execute_seconds
+
+        # Snowflake upper-cases unquoted identifiers; the pages index results that way
+        df.columns = [str(col).upper() for col in df.columns]
+        return df
+
+    def execute_command(self, statement: str):
+        # Warehouse and session cache controls have no local equivalent
+        if re.match(r'\s*ALTER\s+(WAREHOUSE|SESSION)\b', statement, re.IGNORECASE):
+            return
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(translate_sql(statement))
+        finally:
+            cursor.close()
@@ -0,0 +1,129 @@
+"""
+On-demand table exports
+Download buttons used to render df.to_csv() on every rerun, holding a full text copy of the
+table whether or not anyone downloaded it. Exports are now generated only when a download
+is clicked (Streamlit's deferred download data, or a prepare button on versions without
+it), in CSV, Parquet or Arrow IPC. CSV is written in row chunks, so the only full-size copy is
+the encoded file itself. Finished files are cached by the content hash of the table, so
+repeated downloads of unchanged data - from any session - reuse the same bytes.
+"""
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.figure_cache import frame_digest
+
+# Upper bound on the generated files kept for repeat downloads
+EXPORT_CACHE_BYTES = int(float(os.environ.get('QHEALTH_EXPORT_CACHE_MB', 256)) * 1024 * 1024)
+
+# Rows rendered to text at a time when writing CSV
+CSV_CHUNK_ROWS = 100_000
+
+# Format -> (button label, MIME type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    'csv': ('CSV', 'text/csv', 'csv'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('Arrow IPC', 'application/vnd.apache.arrow.file', 'arrow')
+}
+
+try:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    # Callables passed as download_button data run only when the button is clicked
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, 'add_deferred')
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
+def write_csv(df: pd.DataFrame, out, chunk_rows: int = CSV_CHUNK_ROWS):
+    """Write df as UTF-8 CSV to a binary stream, chunk_rows rows at a time"""
+    if df.empty:
+        out.write(df.to_csv(index=False).encode('utf-8'))
+        return
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0)
+        out.write(chunk.encode('utf-8'))
+
+def export_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    """The file contents of df in one of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of {list(EXPORT_FORMATS)})")
+    buffer = io.BytesIO()
+    if fmt == 'csv':
+        write_csv(df, buffer)
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if fmt == 'parquet':
+            pq.write_table(table, buffer, compression='zstd')
+        else:
+            with pa.ipc.new_file(buffer, table.schema) as writer:
+                writer.write_table(table)
+    return buffer.getvalue()
+
+class ExportCache:
+    """Byte-bounded LRU of generated export files, keyed by table content and format"""
+
+    def __init__(self, max_bytes: int = EXPORT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[bytes, str], bytes]' = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'generated': 0, 'evictions': 0}
+
+    def export(self, df: pd.DataFrame, fmt: str) -> bytes:
+        """df as a file in fmt, generated on the first request for this content"""
+        key = (frame_digest(df), fmt)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return data
+
+        data = export_bytes(df, fmt)
+        with self._lock:
+            self._stats['generated'] += 1
+            if len(data) <= self.max_bytes and key not in self._entries:
+                self._entries[key] = data
+                self._bytes += len(data)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+                    self._stats['evictions'] += 1
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+_export_cache = ExportCache()
+
+def get_export_cache() -> ExportCache:
+    """Process-wide export cache shared by all sessions"""
+    return _export_cache
+
+def lazy_export(df: pd.DataFrame, fmt: str) -> Callable[[], bytes]:
+    """A callable producing the export, for download_button data; nothing runs until it is called"""
+    return lambda: get_export_cache().export(df, fmt)
+
+def export_button(df: pd.DataFrame, fmt: str, file_stem: str, key: str):
+    """Download button for df in fmt that generates the file only when asked for"""
+    label, mime, extension = EXPORT_FORMATS[fmt]
+    file_name = f"{file_stem}.{extension}"
+    if DEFERRED_DOWNLOADS:
+        st.download_button(label=f"📥 {label}", data=lazy_export(df, fmt), file_name=file_name,
+                           mime=mime, key=key, on_click='ignore')
+    elif st.button(f"📦 Prepare {label}", key=f"{key}_prepare"):
+        st.download_button(label=f"📥 Download {label}", data=get_export_cache().export(df, fmt),
+                           file_name=file_name, mime=mime, key=key)
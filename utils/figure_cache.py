@@ -0,0 +1,148 @@
+"""
+Content-addressed Plotly figure cache
+Chart builders are pure functions of their input frames and arguments, yet every rerun
+rebuilt every figure. Figures are cached as serialized JSON under a hash of the builder
+plus its arguments (DataFrames hashed by content), so a rerun over unchanged data - a button
+click, another session on the same dataset - re-inflates the stored JSON without validation
+instead of building the figure again. Every hit returns a new Figure, so callers can still
+update_layout on it. The cache is process-wide and bounded by bytes (LRU).
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Set QHEALTH_FIGURE_CACHE=0 to build every figure on every rerun
+FIGURE_CACHE_ENABLED = os.environ.get('QHEALTH_FIGURE_CACHE', '1') != '0'
+
+# Upper bound on the serialized figures kept
+FIGURE_CACHE_BYTES = int(float(os.environ.get('QHEALTH_FIGURE_CACHE_MB', 64)) * 1024 * 1024)
+
+def frame_digest(df: pd.DataFrame) -> bytes:
+    """Content hash of a DataFrame: values, index, column names and dtypes"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.digest()
+
+def _update(digest, value: Any):
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'frame:' + frame_digest(value))
+    elif isinstance(value, pd.Series):
+        digest.update(b'series:' + frame_digest(value.to_frame()))
+    elif isinstance(value, pd.Index):
+        digest.update(f"index:{value.dtype}:{len(value)}".encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"array:{value.dtype.str}:{value.shape}".encode('utf-8'))
+        if value.dtype.hasobject:
+            # Object arrays hold references, not values
+            digest.update(pd.util.hash_pandas_object(pd.Series(value.ravel()), index=False).to_numpy().tobytes())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}".encode('utf-8'))
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}".encode('utf-8'))
+        for name in sorted(value, key=str):
+            digest.update(str(name).encode('utf-8'))
+            _update(digest, value[name])
+    else:
+        digest.update(repr(value).encode('utf-8'))
+
+def figure_key(builder: Callable, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Cache key for builder(*args, **kwargs)"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{builder.__module__}.{builder.__qualname__}".encode('utf-8'))
+    _update(digest, args)
+    _update(digest, kwargs)
+    return digest.hexdigest()
+
+class FigureCache:
+    """Byte-bounded LRU of serialized figures, shared by all sessions"""
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES, enabled: bool = FIGURE_CACHE_ENABLED):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evictions': 0}
+
+    def get(self, key: str) -> Optional[go.Figure]:
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        # The JSON came from a valid figure; skipping validation is what makes a hit cheap
+        return go.Figure(json.loads(spec), _validate=False)
+
+    def put(self, key: str, fig: go.Figure):
+        spec = pio.to_json(fig, validate=False)
+        size = len(spec)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = spec
+            self._bytes += size
+            self._stats['stored'] += 1
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats['evictions'] += 1
+
+    def build(self, builder: Callable[..., go.Figure], *args, **kwargs) -> go.Figure:
+        """builder(*args, **kwargs), served from the cache when the same inputs were seen before"""
+        if not self.enabled:
+            return builder(*args, **kwargs)
+        key = figure_key(builder, args, kwargs)
+        fig = self.get(key)
+        if fig is None:
+            fig = builder(*args, **kwargs)
+            self.put(key, fig)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {**self._stats, 'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+_figure_cache = FigureCache()
+
+def get_figure_cache() -> FigureCache:
+    """Process-wide figure cache shared by all sessions"""
+    return _figure_cache
+
+def build_figure(builder: Callable[..., go.Figure], *args, **kwargs) -> go.Figure:
+    """Build a figure through the process-wide cache, e.g. build_figure(px.treemap, df, path=[...])"""
+    return get_figure_cache().build(builder, *args, **kwargs)
+
+def cached_figure(fn: Callable[..., go.Figure]) -> Callable[..., go.Figure]:
+    """Decorator for figure builders whose output depends only on their arguments"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return build_figure(fn, *args, **kwargs)
+    return wrapper
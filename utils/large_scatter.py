@@ -0,0 +1,105 @@
+"""
+Scatter plots that stay responsive at any row count
+SVG scatters (one DOM node per point) stall the browser beyond a few thousand points, and
+even WebGL scatters ship every point in the figure JSON. create_scatter picks the rendering by
+row count:
+- up to SCATTERGL_POINTS: px.scatter as SVG
+- up to DENSITY_POINTS: px.scatter rendered with WebGL (Scattergl)
+- beyond: a 2-D histogram (np.histogram2d) drawn as a heatmap, so the payload is
+  DENSITY_BINS x DENSITY_BINS cells whatever the row count; highlighted rows (anomalies,
+  significant results) are overlaid as individual WebGL points
+"""
+
+import os
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Row counts at which rendering switches to WebGL, then to a density grid
+SCATTERGL_POINTS = int(os.environ.get('QHEALTH_SCATTERGL_POINTS', 1000))
+DENSITY_POINTS = int(os.environ.get('QHEALTH_DENSITY_POINTS', 50000))
+
+# Histogram cells per axis in density mode
+DENSITY_BINS = int(os.environ.get('QHEALTH_DENSITY_BINS', 200))
+
+# Highlighted rows overlaid on a density grid; the most extreme are kept beyond this
+HIGHLIGHT_POINTS = 10000
+
+def scatter_mode(rows: int) -> str:
+    """'svg', 'webgl' or 'density' for a scatter of this many rows"""
+    if rows > DENSITY_POINTS:
+        return 'density'
+    if rows > SCATTERGL_POINTS:
+        return 'webgl'
+    return 'svg'
+
+def _values(df: pd.DataFrame, ref) -> pd.Series:
+    """A column by name, or an array-like (e.g. df.index) aligned to df"""
+    if isinstance(ref, str) and ref in df.columns:
+        return df[ref]
+    return pd.Series(np.asarray(ref), index=df.index, name=getattr(ref, 'name', None))
+
+def _numeric(values: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype)
+
+def create_density_scatter(df: pd.DataFrame, x, y, highlight=None, title: str = "",
+                           labels: Optional[Dict[str, str]] = None, bins: int = DENSITY_BINS,
+                           highlight_name: str = "Highlighted") -> go.Figure:
+    """Heatmap of point counts on a bins x bins grid, with highlighted rows drawn as points"""
+    labels = labels or {}
+    xs, ys = _values(df, x), _values(df, y)
+    x_label = labels.get(xs.name, xs.name or 'x')
+    y_label = labels.get(ys.name, ys.name or 'y')
+    x_values, y_values = xs.to_numpy(np.float64), ys.to_numpy(np.float64)
+    finite = np.isfinite(x_values) & np.isfinite(y_values)
+
+    counts, x_edges, y_edges = np.histogram2d(x_values[finite], y_values[finite], bins=bins)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        # Empty cells stay transparent; heatmap z is indexed [y][x]
+        z=np.where(counts > 0, counts, np.nan).T,
+        colorscale='Blues',
+        colorbar=dict(title='Points'),
+        name='Density',
+        hovertemplate=f"{x_label}: %{{x:.3g}}<br>{y_label}: %{{y:.3g}}<br>Points: %{{z:,.0f}}<extra></extra>"
+    ))
+
+    if highlight is not None:
+        mask = _values(df, highlight).fillna(False).to_numpy(bool) & finite
+        positions = np.flatnonzero(mask)
+        if len(positions) > HIGHLIGHT_POINTS:
+            # Keep the points furthest from the median y
+            spread = np.abs(y_values[positions] - np.median(y_values[finite]))
+            positions = np.sort(positions[np.argpartition(spread, -HIGHLIGHT_POINTS)[-HIGHLIGHT_POINTS:]])
+        fig.add_trace(go.Scattergl(
+            x=x_values[positions],
+            y=y_values[positions],
+            mode='markers',
+            marker=dict(color='red', size=5),
+            name=highlight_name
+        ))
+
+    fig.update_layout(
+        title=f"{title} ({finite.sum():,} points, density)" if title else None,
+        xaxis_title=x_label,
+        yaxis_title=y_label
+    )
+    return fig
+
+def create_scatter(df: pd.DataFrame, x, y, highlight: Union[str, Any, None] = None,
+                   highlight_name: str = "Highlighted", **px_kwargs) -> go.Figure:
+    """
+    px.scatter(df, x, y, **px_kwargs) rendered as SVG, WebGL or a density grid by row count.
+    highlight (a boolean column name or mask) marks rows drawn individually on a density grid;
+    px_kwargs that only apply to individual points (color, size, hover_data...) are used below
+    DENSITY_POINTS.
+    """
+    mode = scatter_mode(len(df))
+    if mode == 'density' and _numeric(_values(df, x)) and _numeric(_values(df, y)):
+        return create_density_scatter(df, x, y, highlight, title=px_kwargs.get('title', ''),
+                                      labels=px_kwargs.get('labels'), highlight_name=highlight_name)
+    return px.scatter(df, x=x, y=y, render_mode='svg' if mode == 'svg' else 'webgl', **px_kwargs)
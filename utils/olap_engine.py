@@ -0,0 +1,234 @@
+"""
+In-process OLAP engine for Q.CheckUp Lite slice-and-dice
+One compact pre-aggregated base - the VW_CLAIMS_SUMMARY dimensions (P_PROVINCE, CATEGORY_DESCR,
+TR_LEVEL_1) at day rather than month grain, over the widest dashboard window - is held as
+dictionary-encoded NumPy arrays. Overview, province, category and trend breakdowns for any
+filter combination are answered with vectorized group-bys, so filter changes do not go back
+to the warehouse for them.
+"""
+
+import calendar
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.admission import PRIORITY_DETAIL
+from utils.backends import get_backend
+from utils.data_versions import data_version, time_bucket
+from utils.queries import checkup_lite_window_months, provider_categories
+from utils.snowflake_conn import _versioned_query
+
+# Set QHEALTH_OLAP=0 to answer every section with SQL instead
+OLAP_ENABLED = os.environ.get('QHEALTH_OLAP', '1') != '0'
+# Rebuild interval when the claims table cannot be versioned (otherwise rebuilt on data change)
+OLAP_REFRESH_SECONDS = int(os.environ.get('QHEALTH_OLAP_REFRESH_SECONDS', 900))
+
+# Seconds before a failed cube build is retried
+OLAP_RETRY_SECONDS = int(os.environ.get('QHEALTH_OLAP_RETRY_SECONDS', 60))
+
+# Day grain keeps the rolling DATE_KEY windows exact (VW_CLAIMS_SUMMARY is month grain)
+# and stays small: at most ~730 days x 9 provinces x 4 categories x 6 device groups
+CLAIMS_BASE_QUERY = """
+    SELECT
+        DATE_KEY,
+        P_PROVINCE,
+        CATEGORY_DESCR,
+        TR_LEVEL_1,
+        COUNT(*) as CLAIM_COUNT,
+        SUM(AMT_CLAIMED_TY) as TOTAL_CLAIMED_TY,
+        SUM(AMT_PAID_TY) as TOTAL_PAID_TY,
+        SUM(UNITS_TY) as TOTAL_UNITS_TY
+    FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
+    WHERE DATE_KEY >= DATEADD(month, -%(months)s, CURRENT_DATE)
+    AND YEAR >= YEAR(DATEADD(month, -%(months)s, CURRENT_DATE))
+    GROUP BY DATE_KEY, P_PROVINCE, CATEGORY_DESCR, TR_LEVEL_1
+"""
+
+# Widest window any cube answer needs (monthly trends over the default 12-month range)
+BASE_WINDOW_MONTHS = checkup_lite_window_months('monthly_trends')
+
+# Filter keys (as produced by normalize_checkup_lite_filters) -> base column and output column name
+DIMENSIONS = {
+    'province': ('P_PROVINCE', 'PROVINCE'),
+    'provider_category': ('CATEGORY_DESCR', 'PROVIDER_CATEGORY'),
+    'level_1': ('TR_LEVEL_1', 'LEVEL_1')
+}
+MEASURES = ['CLAIM_COUNT', 'TOTAL_CLAIMED_TY', 'TOTAL_PAID_TY', 'TOTAL_UNITS_TY']
+
+def _month_index(year, month) -> np.ndarray:
+    """Months since year 0, so consecutive calendar months are consecutive integers"""
+    return np.asarray(year, dtype=np.int64) * 12 + np.asarray(month, dtype=np.int64) - 1
+
+def _months_ago(today: date, months: int) -> date:
+    """DATEADD(month, -months, today): same day of month, clamped to the month's last day"""
+    index = int(_month_index(today.year, today.month)) - months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(today.day, calendar.monthrange(year, month)[1]))
+
+class ClaimsCube:
+    """
+    Immutable, dictionary-encoded snapshot of the claims summary.
+
+    Only additive measures are kept (claim counts and sums); averages are derived as
+    sum / count after grouping. Date windows follow the SQL exactly
+    (DATE_KEY >= DATEADD(month, -N, CURRENT_DATE)). CLAIM_ID is unique per claim, so
+    UNIQUE_PATIENTS (COUNT(DISTINCT CLAIM_ID) in the SQL) equals the claim count; distinct
+    provider counts are not additive and are not available from the cube.
+    """
+
+    def __init__(self, base: pd.DataFrame, version: Optional[str] = None):
+        base = base.dropna(subset=['DATE_KEY'])
+        self.version = version
+        dates = pd.to_datetime(base['DATE_KEY'])
+        self.rows = len(base)
+        self.loaded_at = time.time()
+        self.day = dates.to_numpy(dtype='datetime64[D]')
+        self.month = _month_index(dates.dt.year, dates.dt.month)
+        self.measures = {m: base[m].fillna(0).to_numpy(dtype=np.float64) for m in MEASURES}
+
+        # Dictionary encoding: int32 codes into a sorted label array (-1 for NULL)
+        self.codes, self.labels, self._lookup = {}, {}, {}
+        for key, (column, _) in DIMENSIONS.items():
+            codes, labels = pd.factorize(base[column], sort=True)
+            self.codes[key] = codes.astype(np.int32)
+            self.labels[key] = np.asarray(labels, dtype=object)
+            self._lookup[key] = {label: i for i, label in enumerate(labels)}
+
+    def _mask(self, filters: Dict[str, Any], months: int) -> np.ndarray:
+        mask = self.day >= np.datetime64(_months_ago(date.today(), months), 'D')
+        for key in DIMENSIONS:
+            if filters.get(key) is not None:
+                values = provider_categories(filters[key]) if key == 'provider_category' else [filters[key]]
+                # Unknown values match nothing
+                mask &= np.isin(self.codes[key], [self._lookup[key].get(value, -2) for value in values])
+        return mask
+
+    def _sums(self, group: np.ndarray, mask: np.ndarray, size: int) -> Dict[str, np.ndarray]:
+        """Sum every measure per group code (codes must be in [0, size))"""
+        return {m: np.bincount(group, weights=values[mask], minlength=size) for m, values in self.measures.items()}
+
+    def _frame(self, sums: Dict[str, np.ndarray], keys: Dict[str, Any]) -> pd.DataFrame:
+        claims = sums['CLAIM_COUNT']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_claimed = np.where(claims > 0, sums['TOTAL_CLAIMED_TY'] / claims, np.nan)
+        return pd.DataFrame({
+            **keys,
+            'TOTAL_CLAIMS': claims.astype(np.int64),
+            'TOTAL_CLAIMED': sums['TOTAL_CLAIMED_TY'],
+            'TOTAL_PAID': sums['TOTAL_PAID_TY'],
+            'TOTAL_UNITS': sums['TOTAL_UNITS_TY'],
+            'AVG_CLAIM_AMOUNT': avg_claimed
+        })
+
+    def overview(self, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Single-row KPIs with the overview_kpis column names"""
+        filters = filters or {}
+        mask = self._mask(filters, checkup_lite_window_months('overview_kpis', filters))
+        claims = float(self.measures['CLAIM_COUNT'][mask].sum())
+        claimed = float(self.measures['TOTAL_CLAIMED_TY'][mask].sum())
+        paid = float(self.measures['TOTAL_PAID_TY'][mask].sum())
+        if claims == 0:
+            return pd.DataFrame()
+        return pd.DataFrame([{
+            'TOTAL_CLAIMS': int(claims),
+            'UNIQUE_PATIENTS': int(claims),
+            'TOTAL_CLAIM_AMOUNT': claimed,
+            'TOTAL_PAID_AMOUNT': paid,
+            'AVG_CLAIM_AMOUNT': claimed / claims,
+            'AVG_PAID_AMOUNT': paid / claims
+        }])
+
+    def breakdown(self, dimension: str, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Totals per value of `dimension` ('province', 'provider_category' or 'level_1'), largest first"""
+        filters = filters or {}
+        mask = self._mask(filters, checkup_lite_window_months('province_performance', filters))
+        codes = self.codes[dimension]
+        mask &= codes >= 0
+        labels = self.labels[dimension]
+        df = self._frame(self._sums(codes[mask], mask, len(labels)), {DIMENSIONS[dimension][1]: labels})
+        df = df[df['TOTAL_CLAIMS'] > 0]
+        return df.sort_values('TOTAL_CLAIMS', ascending=False, kind='mergesort').reset_index(drop=True)
+
+    def trends(self, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Monthly totals with the monthly_trends column names, oldest first"""
+        filters = filters or {}
+        months = checkup_lite_window_months('monthly_trends', filters)
+        mask = self._mask(filters, months)
+        first_day = _months_ago(date.today(), months)
+        start = int(_month_index(first_day.year, first_day.month))
+        offsets = (self.month[mask] - start).astype(np.int64)
+        span = int(offsets.max()) + 1 if len(offsets) else 0
+        month_index = start + np.arange(span)
+        month_start = pd.to_datetime({'year': month_index // 12, 'month': month_index % 12 + 1, 'day': 1})
+        df = self._frame(self._sums(offsets, mask, span), {'MONTH': month_start.dt.date})
+        df['UNIQUE_PATIENTS'] = df['TOTAL_CLAIMS']
+        return df[df['TOTAL_CLAIMS'] > 0].reset_index(drop=True)
+
+def base_version(backend, refresh_seconds: int = OLAP_REFRESH_SECONDS) -> str:
+    """
+    Data version the cube base is loaded at: the claims table version plus today's date
+    (data_version), or a refresh_seconds time bucket when the table cannot be versioned
+    """
+    return data_version(backend, CLAIMS_BASE_QUERY) or time_bucket(refresh_seconds)
+
+class CubeStore:
+    """
+    Process-wide holder of the ClaimsCube for the current claims data version.
+    The cube is rebuilt as soon as the version of its base query changes (the same
+    TableVersionProbe that keys the SQL sections), so cube and SQL sections of a dashboard
+    always describe the same data. Builds run on a background thread and load the base through
+    the shared query path (result caches, single-flight, admission, telemetry); until a cube
+    for the current version is ready, current() returns None and callers answer with SQL.
+    """
+
+    def __init__(self, conn, refresh_seconds: int = OLAP_REFRESH_SECONDS):
+        self._conn = conn
+        self._backend = get_backend(conn)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._cube: Optional[ClaimsCube] = None
+        self._building: Optional[str] = None
+        self._failed_at = 0.0
+        self.last_error: Optional[Exception] = None
+
+    def current(self) -> Optional[ClaimsCube]:
+        """The cube at the current data version, or None (starting a build) if it is not loaded yet"""
+        version = base_version(self._backend, self.refresh_seconds)
+        cube = self._cube
+        if cube is not None and cube.version == version:
+            return cube
+        with self._lock:
+            # One build at a time; a failed build is retried after OLAP_RETRY_SECONDS, not on every rerun
+            if self._building is not None or time.time() - self._failed_at < OLAP_RETRY_SECONDS:
+                return None
+            self._building = version
+        threading.Thread(target=self._build, args=(version,), name='olap-cube-build', daemon=True).start()
+        return None
+
+    def _build(self, version: str):
+        start_time = time.time()
+        try:
+            # Background warm-up: SQL answers these sections meanwhile, so it yields to page queries
+            base = _versioned_query(self._conn, CLAIMS_BASE_QUERY, {'months': BASE_WINDOW_MONTHS},
+                                    priority=PRIORITY_DETAIL, name='olap_base')
+            cube = ClaimsCube(base, version)
+            cube.load_seconds = time.time() - start_time
+            self._cube = cube  # single reference assignment - readers see the old or the new cube
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e
+            self._failed_at = time.time()
+        finally:
+            with self._lock:
+                self._building = None
+
+@st.cache_resource(show_spinner=False)
+def get_claims_cube_store(_conn) -> CubeStore:
+    """Shared across all sessions"""
+    return CubeStore(_conn)
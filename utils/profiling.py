@@ -0,0 +1,182 @@
+"""
+On-demand profiling of page reruns
+With ?profile=1 in the page URL (or QHEALTH_PROFILE=1 for every rerun) a page's main()
+(@profile_rerun) runs under cProfile while a sampling thread records the call stacks of the
+script thread and its query workers. Each rerun saves a timestamped .prof file (pstats,
+snakeviz) and a .collapsed file of folded stacks (flamegraph.pl, speedscope) to
+QHEALTH_PROFILE_DIR, and lists the top functions by cumulative time in a sidebar expander.
+"""
+
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+# Profile every rerun, not only those requested with ?profile=1
+PROFILE_ALWAYS = os.environ.get('QHEALTH_PROFILE', '0') == '1'
+
+PROFILE_DIR = os.environ.get('QHEALTH_PROFILE_DIR', 'profiles')
+
+# Functions listed in the sidebar expander
+PROFILE_TOP_N = int(os.environ.get('QHEALTH_PROFILE_TOP_N', 25))
+
+# Stack sampling period for the collapsed-stack file
+SAMPLE_INTERVAL_SECONDS = float(os.environ.get('QHEALTH_PROFILE_INTERVAL_MS', 5)) / 1000
+
+# Attribute add_script_run_ctx sets on threads it attaches to a script run (query workers)
+SCRIPT_RUN_CTX_ATTR = 'streamlit_script_run_ctx'
+
+# Leaf frame of a pool worker blocked waiting for work - not part of the rerun's cost
+IDLE_WORKER_FRAME = 'thread:_worker'
+
+def profiling_requested() -> bool:
+    """True when this rerun should be profiled"""
+    if PROFILE_ALWAYS:
+        return True
+    try:
+        return st.query_params.get('profile', '').lower() in ('1', 'true', 'yes')
+    except Exception:
+        return False
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+class StackSampler:
+    """
+    Samples the stacks of a script thread and the worker threads sharing its script context.
+    cProfile only sees the thread that enabled it; the sampler also covers queries and pandas
+    work on execute_queries workers.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._origin = threading.current_thread()
+        self._ctx = getattr(self._origin, SCRIPT_RUN_CTX_ATTR, None)
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _targets(self) -> Dict[int, str]:
+        targets = {self._origin.ident: 'script'}
+        if self._ctx is not None:
+            for thread in threading.enumerate():
+                if thread is not self._origin and getattr(thread, SCRIPT_RUN_CTX_ATTR, None) is self._ctx:
+                    targets[thread.ident] = 'worker'
+        return targets
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            targets = self._targets()
+            for ident, frame in sys._current_frames().items():
+                if ident not in targets:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack[0] == IDLE_WORKER_FRAME:
+                    continue
+                self._stacks[';'.join([targets[ident], *reversed(stack)])] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Folded stacks, one 'root;...;leaf count' line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+def top_functions(profiler: cProfile.Profile, n: int = PROFILE_TOP_N) -> pd.DataFrame:
+    """The n functions with the most cumulative time in a cProfile run"""
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in pstats.Stats(profiler).stats.items():
+        location = f"{os.path.basename(filename)}:{line}" if line else filename
+        rows.append({'function': f"{name} ({location})", 'calls': calls,
+                     'tottime': total, 'cumtime': cumulative})
+    return pd.DataFrame(rows).nlargest(n, 'cumtime') if rows else pd.DataFrame(rows)
+
+def save_profile(page: str, profiler: Optional[cProfile.Profile], sampler: StackSampler,
+                 directory: str = PROFILE_DIR) -> List[str]:
+    """Write <page>-<timestamp>.prof (when cProfile ran) and .collapsed; returns the paths"""
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{page}-{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+    paths = []
+    if profiler is not None:
+        profiler.dump_stats(base + '.prof')
+        paths.append(base + '.prof')
+    with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+        f.write(sampler.collapsed())
+    paths.append(base + '.collapsed')
+    return paths
+
+def show_profile_summary(page: str, elapsed: float, top: pd.DataFrame, paths: List[str], samples: int):
+    """Sidebar expander with the top functions of the rerun just profiled"""
+    with st.sidebar.expander(f"🔬 Profile: {page} ({elapsed:.2f}s)"):
+        st.dataframe(
+            top,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'tottime': st.column_config.NumberColumn('tottime (s)', format="%.3f"),
+                'cumtime': st.column_config.NumberColumn('cumtime (s)', format="%.3f")
+            }
+        )
+        st.caption(f"{samples} stack samples. Saved to:")
+        for path in paths:
+            st.code(path, language=None)
+
+def profile_rerun(page: str) -> Callable:
+    """
+    Decorator for a page's main(): profiles the call when profiling_requested().
+    Files are saved however the rerun ends; the sidebar summary only after a normal return.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiling_requested():
+                return fn(*args, **kwargs)
+
+            profiler: Optional[cProfile.Profile] = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (a debugger, an outer profile) owns this thread
+                profiler = None
+            sampler = StackSampler()
+            sampler.start()
+            start_time = time.time()
+            completed = False
+            try:
+                result = fn(*args, **kwargs)
+                completed = True
+                return result
+            finally:
+                elapsed = time.time() - start_time
+                sampler.stop()
+                if profiler is not None:
+                    profiler.disable()
+                try:
+                    paths = save_profile(page, profiler, sampler)
+                except OSError as e:
+                    paths = [f"not saved: {e}"]
+                if completed:
+                    top = top_functions(profiler) if profiler is not None else pd.DataFrame()
+                    show_profile_summary(page, elapsed, top, paths, sampler.samples)
+        return wrapper
+    return decorator
@@ -3,7 +3,10 @@ Optimized SQL queries for Quantium Healthcare Analytics Platform
 Focus: <3 second execution times on 1M+ record datasets
 """
 
+from typing import Any, Dict, List, Optional, Tuple
+
 # Q.CheckUp Lite Queries (Medical Device Analytics)
+# {filters} is filled in by get_query (default date window) or build_checkup_lite_query (page filters)
 CHECKUP_LITE_QUERIES = {
     
     # Overview KPIs
@@ -17,7 +20,7 @@ CHECKUP_LITE_QUERIES = {
             AVG(AMT_CLAIMED_TY) as avg_claim_amount,
             AVG(AMT_PAID_TY) as avg_paid_amount
         FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
-        WHERE DATE_KEY >= CURRENT_DATE - INTERVAL '12 MONTHS'
+        WHERE {filters}
     """,
     
     # Province Performance
@@ -31,7 +34,7 @@ CHECKUP_LITE_QUERIES = {
             COUNT(DISTINCT CLAIM_ID) as unique_patients,
             COUNT(DISTINCT PRACTICE_NO_DESCR) as unique_providers
         FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
-        WHERE DATE_KEY >= CURRENT_DATE - INTERVAL '12 MONTHS'
+        WHERE {filters}
         GROUP BY PROVINCE_DESCR
         ORDER BY total_claims DESC
     """,
@@ -50,7 +53,7 @@ CHECKUP_LITE_QUERIES = {
             COUNT(DISTINCT CLAIM_ID) as unique_patients,
             (SUM(AMT_PAID_TY) / NULLIF(SUM(AMT_CLAIMED_TY), 0)) * 100 as approval_rate
         FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
-        WHERE DATE_KEY >= CURRENT_DATE - INTERVAL '12 MONTHS'
+        WHERE {filters}
         GROUP BY PRACTICE_NO_DESCR, CATEGORY_DESCR, PROVIDER_GROUP, PROVINCE_DESCR
         HAVING COUNT(*) >= 10
         ORDER BY total_claims DESC
@@ -69,7 +72,7 @@ CHECKUP_LITE_QUERIES = {
             SUM(AMT_PAID_TY) as total_paid,
             AVG(AMT_CLAIMED_TY) as avg_claim_amount
         FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
-        WHERE DATE_KEY >= CURRENT_DATE - INTERVAL '12 MONTHS'
+        WHERE {filters}
         GROUP BY HIGH_LEVEL_1, HIGH_LEVEL_2, HIGH_LEVEL_3, HIGH_LEVEL_4
         ORDER BY total_claims DESC
     """,
@@ -84,7 +87,7 @@ CHECKUP_LITE_QUERIES = {
             AVG(AMT_CLAIMED_TY) as avg_claim_amount,
             COUNT(DISTINCT CLAIM_ID) as unique_patients
         FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
-        WHERE DATE_KEY >= CURRENT_DATE - INTERVAL '24 MONTHS'
+        WHERE {filters}
         GROUP BY DATE_TRUNC('month', DATE_KEY)
         ORDER BY month
     """,
@@ -107,7 +110,7 @@ CHECKUP_LITE_QUERIES = {
             END as risk_category
         FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS
         WHERE AMT_CLAIMED_TY > 5000
-        AND DATE_KEY >= CURRENT_DATE - INTERVAL '12 MONTHS'
+        AND {filters}
         ORDER BY AMT_CLAIMED_TY DESC
         LIMIT 100
     """
@@ -318,11 +321,117 @@ PERFORMANCE_QUERIES = {
     """
 }
 
+# Persistent result cache lifetimes in seconds, by product or 'product.query_name'. Only used for
+# results that cannot be data-versioned (utils/data_versions.py); versioned results live until
+# their source tables change.
+QUERY_CACHE_TTL = {
+    'checkup_lite': 3600,           # Rolling 12-month window over daily loads
+    'dose': 7 * 24 * 3600,          # Fixed 2017-2019 history
+    'performance': 60               # Live monitoring data
+}
+
+def get_cache_ttl(product: str, query_name: str = None) -> int:
+    """Get the result cache TTL for a query, falling back to the product default"""
+    product = product.lower()
+    if query_name and f"{product}.{query_name}" in QUERY_CACHE_TTL:
+        return QUERY_CACHE_TTL[f"{product}.{query_name}"]
+    return QUERY_CACHE_TTL.get(product, 300)
+
+# Admission priority class ('kpi', 'chart' or 'detail', see utils/admission.py) by
+# 'product.query_name'; anything not listed is a chart
+QUERY_PRIORITY = {
+    'checkup_lite.overview_kpis': 'kpi',
+    'checkup_lite.provider_analysis': 'detail',
+    'checkup_lite.high_value_claims': 'detail',
+    'dose.overview_kpis': 'kpi',
+    'dose.provider_patterns': 'detail',
+    'dose.high_cost_patients': 'detail'
+}
+
+def get_query_priority(product: str, query_name: str) -> str:
+    """Get the admission priority class for a query"""
+    return QUERY_PRIORITY.get(f"{product.lower()}.{query_name}", 'chart')
+
+# Q.CheckUp Lite filter options, as offered by the page selectboxes
+CHECKUP_LITE_DATE_RANGES = {'Last 12 months': 12, 'Last 6 months': 6, 'Last 3 months': 3}
+CHECKUP_LITE_PROVINCES = ['All', 'Gauteng', 'Western Cape', 'KwaZulu-Natal']
+# Provider Type options -> the CATEGORY_DESCR values they cover (PROVIDER_CATEGORY in sql/02_reference_data.sql)
+CHECKUP_LITE_PROVIDER_CATEGORIES = {
+    'Hospitals': ['Hospitals', 'Sub-Acute', 'Rehabilitation'],
+    'Pharmacies': ['Pharmacy'],
+    'Specialists': ['Cardiologist', 'Dermatologist', 'Neurologist', 'Oncologist'],
+    'General Practitioners': ['General Practitioner']
+}
+CHECKUP_LITE_PROVIDER_TYPES = ['All', *CHECKUP_LITE_PROVIDER_CATEGORIES]
+
+# Default DATE_KEY window per query in months; trends show twice the selected range
+CHECKUP_LITE_WINDOW_MONTHS = {'monthly_trends': 24}
+DEFAULT_WINDOW_MONTHS = 12
+
+def normalize_checkup_lite_filters(date_range: str = 'Last 12 months', province: str = 'All',
+                                   provider_type: str = 'All') -> Dict[str, Any]:
+    """
+    Reduce page filter selections to the settings that differ from the default view.
+    An empty dict means the unfiltered default, so it shares SQL and cache entries with get_query.
+    """
+    filters = {}
+    months = CHECKUP_LITE_DATE_RANGES.get(date_range, DEFAULT_WINDOW_MONTHS)
+    if months != DEFAULT_WINDOW_MONTHS:
+        filters['months'] = months
+    if province and province != 'All':
+        filters['province'] = province
+    if provider_type and provider_type != 'All':
+        filters['provider_category'] = provider_type
+    return filters
+
+def provider_categories(provider_type: str) -> List[str]:
+    """CATEGORY_DESCR values selected by a Provider Type option (a raw category selects itself)"""
+    return CHECKUP_LITE_PROVIDER_CATEGORIES.get(provider_type, [provider_type])
+
+def checkup_lite_window_months(query_name: str, filters: Optional[Dict[str, Any]] = None) -> int:
+    """DATE_KEY window in months for a Q.CheckUp Lite query under the given filters"""
+    window = CHECKUP_LITE_WINDOW_MONTHS.get(query_name, DEFAULT_WINDOW_MONTHS)
+    return (filters or {}).get('months', DEFAULT_WINDOW_MONTHS) * window // DEFAULT_WINDOW_MONTHS
+
+def build_checkup_lite_query(query_name: str, filters: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Render a Q.CheckUp Lite query for normalized filters as (sql, bind parameters).
+
+    Filters become predicates on the HEALTHCARE_CLAIMS clustering key
+    (YEAR, P_PROVINCE, CATEGORY_DESCR) so narrower selections prune micro-partitions:
+    - months: DATE_KEY window, plus a YEAR lower bound derived from it
+    - province: P_PROVINCE (loaded with the same value as PROVINCE_DESCR)
+    - provider_category: CATEGORY_DESCR IN the option's categories (provider_categories)
+    """
+    template = CHECKUP_LITE_QUERIES.get(query_name, "")
+    if not filters:
+        return get_query('checkup_lite', query_name), {}
+
+    months = checkup_lite_window_months(query_name, filters)
+    predicates = [
+        "DATE_KEY >= DATEADD(month, -%(months)s, CURRENT_DATE)",
+        "YEAR >= YEAR(DATEADD(month, -%(months)s, CURRENT_DATE))"
+    ]
+    params = {'months': months}
+
+    if 'province' in filters:
+        predicates.append("P_PROVINCE = %(province)s")
+        params['province'] = filters['province']
+    if 'provider_category' in filters:
+        categories = provider_categories(filters['provider_category'])
+        names = [f"provider_category_{i}" for i in range(len(categories))]
+        predicates.append(f"CATEGORY_DESCR IN ({', '.join(f'%({name})s' for name in names)})")
+        params.update(zip(names, categories))
+
+    return template.format(filters='\n        AND '.join(predicates)), params
+
 # Utility function to get query by name
 def get_query(product: str, query_name: str) -> str:
     """Get a specific query by product and query name"""
     if product.lower() == 'checkup_lite':
-        return CHECKUP_LITE_QUERIES.get(query_name, "")
+        template = CHECKUP_LITE_QUERIES.get(query_name, "")
+        months = CHECKUP_LITE_WINDOW_MONTHS.get(query_name, DEFAULT_WINDOW_MONTHS)
+        return template.format(filters=f"DATE_KEY >= CURRENT_DATE - INTERVAL '{months} MONTHS'")
     elif product.lower() == 'dose':
         return DOSE_QUERIES.get(query_name, "")
     elif product.lower() == 'performance':
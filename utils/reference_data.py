@@ -0,0 +1,29 @@
+"""
+Value domains from the reference data scripts
+sql/02_reference_data.sql is the source of truth for dimension values (provider categories,
+provider types...). Reading them from the script keeps the synthetic dataset and the dashboard
+filters in step with the warehouse without a Snowflake round trip.
+"""
+
+import os
+import re
+from typing import List
+
+REFERENCE_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'sql', '02_reference_data.sql')
+
+def reference_values(table: str, column: str, path: str = REFERENCE_SQL) -> List[str]:
+    """Distinct values of a column in the INSERT INTO <table> (...) VALUES rows of sql/02, in file order"""
+    with open(path, encoding='utf-8') as f:
+        sql = f.read()
+    match = re.search(rf"INSERT INTO {table} \(([^)]*)\) VALUES(.*?);", sql, flags=re.DOTALL)
+    if match is None:
+        raise ValueError(f"No INSERT INTO {table} ... VALUES in {path}")
+    position = [name.strip() for name in match.group(1).split(',')].index(column)
+    values = []
+    for line in match.group(2).splitlines():
+        if line.strip().startswith('('):
+            literals = [value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", line)]
+            if literals[position] not in values:
+                values.append(literals[position])
+    return values
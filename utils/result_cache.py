@@ -0,0 +1,179 @@
+"""
+Persistent on-disk query result cache
+Results are stored as zstd-compressed Parquet files keyed by normalized SQL plus bind
+parameters, so a restarted or redeployed app serves dashboard queries without the warehouse.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Defaults, overridable per deployment
+RESULT_CACHE_DIR = os.environ.get('QHEALTH_RESULT_CACHE_DIR', os.path.join('.cache', 'query_results'))
+RESULT_CACHE_MAX_MB = int(os.environ.get('QHEALTH_RESULT_CACHE_MB', 512))
+RESULT_CACHE_ENABLED = os.environ.get('QHEALTH_RESULT_CACHE', '1') != '0'
+DEFAULT_TTL = 300  # seconds, matching the in-process cache
+
+def normalize_sql(query: str) -> str:
+    """Strip line comments and collapse whitespace so formatting changes do not change the cache key"""
+    without_comments = re.sub(r'--[^\n]*', ' ', query)
+    return re.sub(r'\s+', ' ', without_comments).strip()
+
+def query_fingerprint(query: str, params: Optional[Dict[str, Any]] = None, version: Optional[str] = None) -> str:
+    """Stable hash of normalized SQL plus bind parameters and, if given, the source data version"""
+    payload = normalize_sql(query)
+    if params:
+        payload += '\n' + json.dumps(params, sort_keys=True, default=str)
+    if version:
+        payload += '\nversion:' + version
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of query results on local disk.
+
+    - Each entry is one Parquet file; creation time and TTL live in the file's schema
+      metadata, so reading them touches only the footer.
+    - Writes go to a temporary file and are renamed into place, so readers never see
+      a partial file and concurrent writers of the same key are harmless.
+    - File mtime records last access; when the directory exceeds max_bytes the least
+      recently used entries are deleted.
+    """
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 default_ttl: int = DEFAULT_TTL, enabled: bool = RESULT_CACHE_ENABLED):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def get(self, query: str, params: Optional[Dict[str, Any]] = None,
+            version: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Return the cached DataFrame, or None when missing, expired or unreadable"""
+        if not self.enabled:
+            return None
+
+        path = self._path(query_fingerprint(query, params, version))
+        try:
+            metadata = pq.read_schema(path).metadata or {}
+            created_at = float(metadata.get(b'qhealth_created_at', 0))
+            ttl = float(metadata.get(b'qhealth_ttl', self.default_ttl))
+            if ttl >= 0 and time.time() - created_at > ttl:
+                self._remove(path)
+                self._count('misses')
+                return None
+
+            df = pq.read_table(path).to_pandas()
+            os.utime(path)  # mark as recently used for LRU eviction
+            self._count('hits')
+            return df
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except Exception:
+            # Corrupt or incompatible file - drop it and treat as a miss
+            self._remove(path)
+            self._count('errors')
+            return None
+
+    def put(self, query: str, params: Optional[Dict[str, Any]], df: pd.DataFrame, ttl: Optional[int] = None,
+            version: Optional[str] = None):
+        """
+        Store a result atomically; ttl < 0 keeps it until evicted. Entries stored under a data
+        version are unreachable once the version changes and age out through LRU eviction.
+        Failures are silently ignored.
+        """
+        if not self.enabled:
+            return
+
+        key = query_fingerprint(query, params, version)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                b'qhealth_created_at': str(time.time()).encode(),
+                b'qhealth_ttl': str(self.default_ttl if ttl is None else ttl).encode()
+            })
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+            self._count('writes')
+            self._evict()
+        except Exception:
+            self._remove(tmp_path)
+            self._count('errors')
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.parquet'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self._stats['evictions'] += 1
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def clear(self):
+        """Remove every cached result"""
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.parquet'):
+                self._remove(entry.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current on-disk footprint"""
+        entries, size = 0, 0
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.parquet'):
+                    entries += 1
+                    try:
+                        size += entry.stat().st_size
+                    except FileNotFoundError:
+                        pass
+        with self._lock:
+            return {**self._stats, 'entries': entries, 'bytes': size, 'enabled': self.enabled}
+
+_result_cache = ResultCache()
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache shared by all sessions"""
+    return _result_cache
@@ -0,0 +1,80 @@
+"""
+Single-flight query coalescing
+Concurrent callers asking for the same key share one in-flight execution: the first caller
+runs the query, later callers block on its Future and receive the same result (or exception).
+Used by snowflake_conn._cached_query so a burst of sessions after a cache expiry costs the
+warehouse one aggregation per distinct query instead of one per viewer. Keys are
+query_fingerprint values (normalized SQL plus binds), so requests that st.cache_data keys
+apart - different formatting, comments or ttl - still share one execution.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key; nothing is cached once a call completes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stats = {'executions': 0, 'coalesced': 0, 'errors': 0, 'max_waiters': 0, 'wait_seconds': 0.0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() unless a call with the same key is already running, in which case wait for its result"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                self._waiters[key] = 0
+                self._stats['executions'] += 1
+                leader = True
+            else:
+                self._waiters[key] += 1
+                self._stats['coalesced'] += 1
+                self._stats['max_waiters'] = max(self._stats['max_waiters'], self._waiters[key])
+                leader = False
+
+        if not leader:
+            start_time = time.time()
+            try:
+                return future.result()
+            finally:
+                with self._lock:
+                    self._stats['wait_seconds'] += time.time() - start_time
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            with self._lock:
+                self._stats['errors'] += 1
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: str):
+        # Unregister before publishing so callers arriving afterwards start a fresh execution
+        with self._lock:
+            self._calls.pop(key, None)
+            self._waiters.pop(key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Executions vs coalesced requests; coalesced requests never reached the warehouse"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        requests = stats['executions'] + stats['coalesced']
+        stats['coalesced_ratio'] = stats['coalesced'] / requests if requests else 0.0
+        stats['avg_wait_seconds'] = stats['wait_seconds'] / stats['coalesced'] if stats['coalesced'] else 0.0
+        return stats
+
+_query_flights = SingleFlight()
+
+def get_query_flights() -> SingleFlight:
+    """Process-wide single-flight group for warehouse queries, shared by all sessions"""
+    return _query_flights
@@ -1,19 +1,84 @@
 import streamlit as st
 import snowflake.connector
 import pandas as pd
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Iterator, Tuple, Union
+import os
+import threading
 import time
 import tomli
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from snowflake.snowpark.context import get_active_session
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.admission import PRIORITY_CHART, PRIORITY_CLASSES, get_admission_controller
+from utils.backends import get_backend
+from utils.catalog import get_catalog_statistics
+from utils.compaction import compact_result
+from utils.connection_pool import ConnectionPool
+from utils.data_versions import data_version, time_bucket
+from utils.result_cache import get_result_cache, query_fingerprint
+from utils.single_flight import get_query_flights
+from utils.telemetry import (CACHE_COALESCED, CACHE_DISK, CACHE_MEMORY, CACHE_MISS, current_page,
+                             get_query_telemetry, params_hash)
+from utils.tracing import span
+
+# Upper bound on concurrent warehouse round trips issued by execute_queries
+MAX_QUERY_WORKERS = 8
+
+# Connector connections shared by all dashboard sessions on this app node
+POOL_SIZE = int(os.environ.get('QHEALTH_POOL_SIZE', MAX_QUERY_WORKERS))
+
+# Execution backend: 'snowflake' (default) or 'duckdb' for offline runs over local Parquet
+BACKEND = os.environ.get('QHEALTH_BACKEND', 'snowflake').lower()
+
+LOCAL_CONFIG_PATH = '/Users/sweingartner/.snowflake/config.toml'
+
+# get_database_info keys and the tables they count
+DATABASE_INFO_TABLES = {
+    'checkup_lite_records': 'HEALTHCARE_CLAIMS',
+    'dose_records': 'PHARMACEUTICAL_CLAIMS',
+    'patients': 'DIM_PATIENTS',
+    'providers': 'DIM_PROVIDERS'
+}
+
+def load_local_connection_params() -> Dict[str, Any]:
+    """
+    Read the default connection parameters from the local Snowflake config.toml.
+    Raises ValueError if the config does not name a usable default connection.
+    """
+    with open(LOCAL_CONFIG_PATH, 'rb') as f:
+        config = tomli.load(f)
+    
+    # Get the default connection name
+    default_conn = config.get('default_connection_name')
+    if not default_conn:
+        raise ValueError("No default connection specified in config.toml")
+    
+    # Get the connection configuration for the default connection
+    conn_params = config.get('connections', {}).get(default_conn)
+    if not conn_params:
+        raise ValueError(f"Connection '{default_conn}' not found in config.toml")
+    
+    return conn_params
 
 @st.cache_resource
 def get_snowflake_connection() -> Optional[Union[snowflake.connector.SnowflakeConnection, object]]:
     """
     Create and cache Snowflake connection using hybrid approach:
+    0. QHEALTH_BACKEND=duckdb selects the embedded local backend (no network)
     1. First try to get active session (for Streamlit in Snowflake)
-    2. Fall back to local config file
+    2. Fall back to a connection pool built from the local config file
     Returns None if connection fails.
     """
+    if BACKEND == 'duckdb':
+        try:
+            from utils.duckdb_backend import DuckDBBackend
+            backend = DuckDBBackend()
+            st.success(f"✅ Connected to local DuckDB backend ({len(backend.tables)} tables from {backend.data_dir})")
+            return backend
+        except Exception as e:
+            st.error(f"Failed to start local DuckDB backend: {str(e)}")
+            return None
+    
     # First try to get active session (for Streamlit in Snowflake)
     try:
         session = get_active_session()
@@ -27,90 +92,130 @@ def get_snowflake_connection() -> Optional[Union[snowflake.connector.SnowflakeCo
             
     # Try local connection using config file
     try:
-        with open('/Users/sweingartner/.snowflake/config.toml', 'rb') as f:
-            config = tomli.load(f)
-        
-        # Get the default connection name
-        default_conn = config.get('default_connection_name')
-        if not default_conn:
-            st.error("No default connection specified in config.toml")
-            return None
-            
-        # Get the connection configuration for the default connection
-        conn_params = config.get('connections', {}).get(default_conn)
-        if not conn_params:
-            st.error(f"Connection '{default_conn}' not found in config.toml")
-            return None
-        
-        # Create a connection
-        conn = snowflake.connector.connect(**conn_params)
-        
-        # Test connection without setting context (use fully qualified names)
-        cursor = conn.cursor()
         try:
-            cursor.execute("SELECT CURRENT_VERSION()")
-            cursor.fetchone()
-            st.success("✅ Connected via local Snowflake config")
-        except Exception as e:
-            st.warning(f"Connection test failed: {str(e)}")
-        finally:
-            cursor.close()
+            conn_params = load_local_connection_params()
+        except ValueError as e:
+            st.error(str(e))
+            return None
         
-        return conn
+        # Connections are opened lazily on first checkout; test_connection validates the first one.
+        # Keep-alive heartbeats stop idle pooled sessions from expiring between page loads.
+        pool = ConnectionPool(
+            lambda: snowflake.connector.connect(**conn_params, client_session_keep_alive=True),
+            max_size=POOL_SIZE
+        )
+        st.success("✅ Connection pool ready via local Snowflake config")
+        return pool
         
     except Exception as e:
         st.error(f"Failed to connect to Snowflake: {str(e)}")
         return None
 
 def test_connection(conn: Union[snowflake.connector.SnowflakeConnection, object]) -> bool:
-    """Test if the Snowflake connection is working"""
+    """Test if the Snowflake connection (or configured backend) is working"""
     try:
-        # Handle both session and connection types
-        if hasattr(conn, 'sql'):  # Snowpark session
-            result = conn.sql("SELECT CURRENT_VERSION()").collect()
-            return len(result) > 0
-        else:  # Regular connection
-            cursor = conn.cursor()
-            cursor.execute("SELECT CURRENT_VERSION()")
-            result = cursor.fetchone()
-            cursor.close()
-            return result is not None
+        return get_backend(conn).test()
     except:
         return False
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def execute_query(_conn: Union[snowflake.connector.SnowflakeConnection, object], query: str, params: Optional[Dict] = None) -> pd.DataFrame:
+def _run_query(conn: Union[snowflake.connector.SnowflakeConnection, object], query: str, params: Optional[Dict] = None,
+               fetch_mode: Optional[str] = None, timings: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """Run a query on the connection's backend and return a DataFrame. Raises on failure."""
+    return get_backend(conn).execute(query, params, fetch_mode, timings)
+
+# How the current thread's last _cached_query call was served, for telemetry.
+# The cached body only runs on an in-memory miss, so whatever it leaves here is reset per call.
+_query_outcome = threading.local()
+
+# Entries no longer expire on a timer, so bound the in-memory cache by count instead
+MEMORY_CACHE_ENTRIES = int(os.environ.get('QHEALTH_MEMORY_CACHE_ENTRIES', 512))
+
+@st.cache_data(max_entries=MEMORY_CACHE_ENTRIES, show_spinner=False)
+def _cached_query(_conn: Union[snowflake.connector.SnowflakeConnection, object], query: str, params: Optional[Dict] = None,
+                  ttl: Optional[int] = None, version: Optional[str] = None, bucket: Optional[str] = None,
+                  _priority: str = PRIORITY_CHART) -> pd.DataFrame:
+    """
+    Cached query execution shared by execute_query and execute_queries.
+    `version` (the source tables' data version) is part of every cache key, so entries stay
+    valid until the data changes; unversioned queries pass a time `bucket` instead and keep
+    expiring after `ttl` seconds on disk.
+    Warehouse results are compacted (categoricals, lossless downcasts) before they are cached.
+    Misses fall through to the persistent on-disk result cache before the warehouse, and
+    concurrent misses for the same normalized query and parameters (from any session)
+    share a single execution. Warehouse round trips wait for an admission slot in their
+    priority class (not part of the cache key).
+    Emits no UI elements so it is safe to call from worker threads.
+    """
+    def load():
+        result_cache = get_result_cache()
+        df = result_cache.get(query, params, version)
+        if df is not None:
+            _query_outcome.cache = CACHE_DISK
+            return df
+
+        timings = {}
+        with get_admission_controller().admit(_priority):
+            df = _run_query(_conn, query, params, timings=timings)
+        df, _query_outcome.compaction = compact_result(df)
+        _query_outcome.cache, _query_outcome.timings = CACHE_MISS, timings
+        result_cache.put(query, params, df, -1 if version else ttl, version)
+        return df
+
+    # Overwritten by load() when this thread runs the execution rather than waiting on another
+    _query_outcome.cache = CACHE_COALESCED
+    return get_query_flights().do(query_fingerprint(query, params, version), load)
+
+def _versioned_query(conn: Union[snowflake.connector.SnowflakeConnection, object], query: str,
+                     params: Optional[Dict] = None, ttl: Optional[int] = None,
+                     priority: str = PRIORITY_CHART, name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Serve a query from cache under its current data version (or a time bucket when it has none)
+    and record it in the query telemetry buffer under `name`.
+    """
+    start_time = time.time()
+    backend = get_backend(conn)
+    _query_outcome.cache, _query_outcome.timings, _query_outcome.compaction = CACHE_MEMORY, {}, None
+    df, error = None, None
+    try:
+        with span(f"query {name or 'adhoc'}", 'query') as args:
+            version = data_version(backend, query)
+            df = _cached_query(conn, query, params, ttl, version, None if version else time_bucket(), priority)
+            args.update(cache=_query_outcome.cache, rows=len(df))
+        return df
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        get_query_telemetry().record(
+            query_name=name or 'adhoc',
+            fingerprint=query_fingerprint(query)[:16],
+            params_hash=params_hash(params),
+            backend=backend.name,
+            page=current_page(),
+            priority=priority,
+            cache=_query_outcome.cache,
+            total_seconds=time.time() - start_time,
+            execute_seconds=_query_outcome.timings.get('execute_seconds'),
+            fetch_seconds=_query_outcome.timings.get('fetch_seconds'),
+            rows=None if df is None else len(df),
+            bytes=None if df is None else int(df.memory_usage(index=True).sum()),
+            raw_bytes=_query_outcome.compaction['bytes_before'] if _query_outcome.compaction else None,
+            compact_bytes=_query_outcome.compaction['bytes_after'] if _query_outcome.compaction else None,
+            error=error
+        )
+
+def execute_query(_conn: Union[snowflake.connector.SnowflakeConnection, object], query: str, params: Optional[Dict] = None,
+                  ttl: Optional[int] = None, name: Optional[str] = None) -> pd.DataFrame:
     """
     Execute SQL query and return results as pandas DataFrame.
-    Cached for 5 minutes to improve performance.
+    Cached until a source table changes; queries without versionable sources are cached for
+    5 minutes in memory and for `ttl` seconds on disk across restarts.
+    `name` labels the query in telemetry (pages/performance.py).
     """
     start_time = time.time()
     
     try:
-        # Handle both session and connection types
-        if hasattr(_conn, 'sql'):  # Snowpark session
-            if params:
-                # For Snowpark sessions, parameters need to be handled differently
-                # This is a simplified approach - you may need to adjust based on your specific needs
-                df = _conn.sql(query).to_pandas()
-            else:
-                df = _conn.sql(query).to_pandas()
-        else:  # Regular connection
-            cursor = _conn.cursor()
-            
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            # Fetch results and column names
-            results = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            
-            # Create DataFrame
-            df = pd.DataFrame(results, columns=columns)
-            
-            cursor.close()
+        df = _versioned_query(_conn, query, params, ttl, name=name)
         
         # Log performance
         execution_time = time.time() - start_time
@@ -125,27 +230,87 @@ def execute_query(_conn: Union[snowflake.connector.SnowflakeConnection, object],
         st.error(f"Query execution failed: {str(e)}")
         return pd.DataFrame()
 
+def _timed_query(conn: Union[snowflake.connector.SnowflakeConnection, object], query: str, params: Optional[Dict] = None,
+                 ttl: Optional[int] = None, priority: str = PRIORITY_CHART, name: Optional[str] = None):
+    """Worker for execute_queries: returns (DataFrame, seconds, error)"""
+    start_time = time.time()
+    try:
+        return _versioned_query(conn, query, params, ttl, priority, name), time.time() - start_time, None
+    except Exception as e:
+        return pd.DataFrame(), time.time() - start_time, e
+
+def iter_query_results(_conn: Union[snowflake.connector.SnowflakeConnection, object],
+                       queries: Dict[str, Union[str, Tuple[str, Dict]]],
+                       timings: Optional[Dict[str, float]] = None, ttl: Optional[int] = None,
+                       max_workers: int = MAX_QUERY_WORKERS,
+                       priorities: Optional[Dict[str, str]] = None,
+                       failures: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Submit a named batch of queries at once and yield (name, DataFrame) in completion order.
+    
+    Every query is submitted up front on a thread pool, so callers can render each
+    section as soon as its own result lands instead of waiting for the slowest query.
+    Arguments are as for execute_queries. Failures are reported with st.error on the
+    caller's thread as they arrive and yield an empty DataFrame.
+    """
+    if not queries:
+        return
+    
+    # Propagate the Streamlit script context so cached calls behave as on the main thread
+    ctx = get_script_run_ctx()
+    priorities = priorities or {}
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries)),
+                            initializer=add_script_run_ctx, initargs=(None, ctx)) as pool:
+        # Higher priority classes are submitted first so they also get the first workers
+        order = sorted(queries, key=lambda name: PRIORITY_CLASSES.index(priorities.get(name, PRIORITY_CHART)))
+        futures = {}
+        for name in order:
+            query = queries[name]
+            sql, params = query if isinstance(query, tuple) else (query, None)
+            future = pool.submit(_timed_query, _conn, sql, params, ttl, priorities.get(name, PRIORITY_CHART), name)
+            futures[future] = name
+        for future in as_completed(futures):
+            name = futures[future]
+            df, elapsed, error = future.result()
+            if timings is not None:
+                timings[name] = elapsed
+            if error is not None:
+                st.error(f"Query '{name}' failed: {str(error)}")
+                if failures is not None:
+                    failures[name] = str(error)
+            yield name, df
+
+def execute_queries(_conn: Union[snowflake.connector.SnowflakeConnection, object],
+                    queries: Dict[str, Union[str, Tuple[str, Dict]]],
+                    timings: Optional[Dict[str, float]] = None, ttl: Optional[int] = None,
+                    max_workers: int = MAX_QUERY_WORKERS,
+                    priorities: Optional[Dict[str, str]] = None,
+                    failures: Optional[Dict[str, str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Execute a named batch of queries concurrently and return {name: DataFrame}.
+    
+    Queries are fanned out over a thread pool so a page load costs roughly the
+    slowest query instead of the sum of all of them. Works for both Snowpark
+    sessions and connector connections (each worker opens its own cursor).
+    Each value is either SQL or a (sql, bind parameters) pair.
+    Per-query wall times in seconds are written into `timings` when provided, and
+    `ttl` sets the on-disk result cache lifetime for the batch. `priorities` maps names to
+    admission classes ('kpi', 'chart', 'detail'; default 'chart'); higher classes are also
+    submitted first.
+    Failed queries yield an empty DataFrame, matching execute_query; their error messages are
+    written into `failures` ({name: message}) when provided, so callers can tell an empty
+    result from a failed one.
+    """
+    results = dict(iter_query_results(_conn, queries, timings, ttl, max_workers, priorities, failures))
+    return {name: results[name] for name in queries}
+
 def get_database_info(_conn: Union[snowflake.connector.SnowflakeConnection, object]) -> Dict[str, Any]:
-    """Get basic database information for monitoring"""
+    """Get basic database information for monitoring, from catalog metadata (no table scans)"""
     try:
-        info = {}
-        
-        # Get record counts for main tables
-        queries = {
-            'checkup_lite_records': "SELECT COUNT(*) FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.HEALTHCARE_CLAIMS",
-            'dose_records': "SELECT COUNT(*) FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.PHARMACEUTICAL_CLAIMS", 
-            'patients': "SELECT COUNT(*) FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.DIM_PATIENTS",
-            'providers': "SELECT COUNT(*) FROM QUANTIUM_HEALTHCARE_DEMO.QUANTIUM_HEALTHCARE_DEMO.DIM_PROVIDERS"
-        }
-        
-        for key, query in queries.items():
-            try:
-                df = execute_query(_conn, query)
-                info[key] = df.iloc[0, 0] if not df.empty else 0
-            except:
-                info[key] = 0
-        
-        return info
+        stats = get_catalog_statistics().statistics(get_backend(_conn)).set_index('TABLE_NAME')
+        counts = stats['ROW_COUNT'].fillna(0)
+        return {key: int(counts.get(table, 0)) for key, table in DATABASE_INFO_TABLES.items()}
         
     except Exception as e:
         st.error(f"Failed to get database info: {str(e)}")
@@ -175,7 +340,7 @@ def get_query_performance_stats(_conn: Union[snowflake.connector.SnowflakeConnec
         AND QUERY_TYPE = 'SELECT'
         """
         
-        df = execute_query(_conn, query)
+        df = execute_query(_conn, query, name='query_performance_stats')
         if not df.empty:
             return {
                 'avg_time': df['AVG_EXECUTION_TIME'].iloc[0] / 1000,  # Convert to seconds
@@ -193,14 +358,7 @@ def execute_cache_clear_query(_conn: Union[snowflake.connector.SnowflakeConnecti
     Returns True if successful, False otherwise.
     """
     try:
-        # Handle both session and connection types
-        if hasattr(_conn, 'sql'):  # Snowpark session
-            _conn.sql(query).collect()
-        else:  # Regular connection
-            cursor = _conn.cursor()
-            cursor.execute(query)
-            cursor.close()
-        
+        get_backend(_conn).execute_command(query)
         return True
         
     except Exception as e:
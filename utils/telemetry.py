@@ -0,0 +1,124 @@
+"""
+Structured query telemetry
+Every query served through snowflake_conn is recorded here with its name, SQL fingerprint,
+parameters hash, backend, cache outcome, execute/fetch split, size and calling page.
+Records live in a bounded in-memory ring buffer shared by all sessions (pages/performance.py
+reads it) and are optionally appended to a JSONL file for offline analysis.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# Most recent records kept in memory; older ones are dropped first
+TELEMETRY_BUFFER_SIZE = int(os.environ.get('QHEALTH_TELEMETRY_BUFFER', 5000))
+
+# Append every record to this JSONL file when set
+TELEMETRY_EXPORT_PATH = os.environ.get('QHEALTH_TELEMETRY_FILE')
+
+# Per-query latency target shown on the performance page
+QUERY_TARGET_SECONDS = 3.0
+
+# Cache outcomes, cheapest first: in-process st.cache_data, on-disk result cache,
+# a concurrent identical execution (single-flight), the warehouse itself
+CACHE_MEMORY = 'memory'
+CACHE_DISK = 'disk'
+CACHE_COALESCED = 'coalesced'
+CACHE_MISS = 'miss'
+
+def params_hash(params: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Short stable hash of bind parameters (values are not recorded)"""
+    if not params:
+        return None
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+def current_page() -> str:
+    """Name of the page whose script run issued the call, e.g. 'dose'; 'unknown' outside a script run"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            return 'unknown'
+        # Multipage runs name the page by its script; the entry script is the fallback
+        page = ctx.pages_manager.get_pages().get(ctx.pages_manager.current_page_script_hash, {})
+        script_path = page.get('script_path') or ctx.main_script_path
+        return os.path.splitext(os.path.basename(script_path))[0] or 'unknown'
+    except Exception:
+        return 'unknown'
+
+class QueryTelemetry:
+    """Thread-safe ring buffer of query records with optional JSONL export"""
+
+    def __init__(self, max_records: int = TELEMETRY_BUFFER_SIZE, export_path: Optional[str] = TELEMETRY_EXPORT_PATH):
+        self.export_path = export_path
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self._recorded = 0
+
+    def record(self, **fields) -> Dict[str, Any]:
+        """Add one record (timestamped now) and append it to the export file if configured"""
+        record = {'timestamp': time.time(), **fields}
+        with self._lock:
+            self._records.append(record)
+            self._recorded += 1
+            if self.export_path:
+                try:
+                    with open(self.export_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, default=str) + '\n')
+                except OSError:
+                    # Telemetry must never fail a query
+                    self.export_path = None
+        return record
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Snapshot of the buffered records, oldest first"""
+        with self._lock:
+            return list(self._records)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Buffered records as a DataFrame with a datetime 'time' column"""
+        df = pd.DataFrame(self.records())
+        if not df.empty:
+            df.insert(0, 'time', pd.to_datetime(df['timestamp'], unit='s'))
+        return df
+
+    def to_jsonl(self) -> str:
+        """Buffered records as JSON Lines"""
+        return ''.join(json.dumps(record, default=str) + '\n' for record in self.records())
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'recorded': self._recorded, 'buffered': len(self._records),
+                    'capacity': self._records.maxlen, 'export_path': self.export_path}
+
+def latency_summary(df: pd.DataFrame, target: float = QUERY_TARGET_SECONDS) -> pd.DataFrame:
+    """Per (page, query) count, cache hit rate and p50/p95/max latency against the target"""
+    if df.empty:
+        return pd.DataFrame()
+    summary = df.groupby(['page', 'query_name'])['total_seconds'].agg(
+        queries='count',
+        p50=lambda s: s.quantile(0.5),
+        p95=lambda s: s.quantile(0.95),
+        max='max'
+    )
+    summary['hit_rate'] = df['cache'].ne(CACHE_MISS).groupby([df['page'], df['query_name']]).mean()
+    summary['over_target'] = df['total_seconds'].gt(target).groupby([df['page'], df['query_name']]).sum()
+    summary['meets_target'] = summary['p95'] <= target
+    return summary.reset_index().sort_values('p95', ascending=False)
+
+_telemetry = QueryTelemetry()
+
+def get_query_telemetry() -> QueryTelemetry:
+    """Process-wide telemetry buffer shared by all sessions"""
+    return _telemetry
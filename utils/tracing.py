@@ -0,0 +1,136 @@
+"""
+Span tracing for page reruns
+A rerun of a traced page (@trace_rerun on its main()) collects nested timing spans from the
+loaders, section functions, chart builders, st.plotly_chart calls and queries - including those
+run on execute_queries worker threads - and writes them as one Chrome trace JSON file
+(chrome://tracing, https://ui.perfetto.dev) so the hot path of each page can be read directly.
+Disabled unless QHEALTH_TRACE_DIR is set; spans are then a single flag check.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Directory receiving one trace file per page rerun; tracing is off when unset
+TRACE_DIR = os.environ.get('QHEALTH_TRACE_DIR')
+TRACING_ENABLED = bool(TRACE_DIR)
+
+def _session_key() -> Optional[str]:
+    """Traces are per Streamlit session; worker threads carry their session's script context"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+        return ctx.session_id if ctx is not None else None
+    except Exception:
+        return None
+
+class Trace:
+    """Complete ('X') events of one rerun, in Chrome trace event format"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+
+    def add(self, name: str, cat: str, start: float, end: float, args: Dict[str, Any]):
+        thread = threading.current_thread()
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': os.getpid(), 'tid': thread.ident,
+                 'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_chrome(self) -> Dict[str, Any]:
+        with self._lock:
+            metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                        for tid, name in self._threads.items()]
+            return {'traceEvents': metadata + sorted(self._events, key=lambda e: e['ts']),
+                    'displayTimeUnit': 'ms',
+                    'otherData': {'trace': self.name, 'started': datetime.fromtimestamp(self.started).isoformat()}}
+
+    def export(self, directory: str) -> str:
+        """Write the trace to <directory>/<name>-<timestamp>.json and return the path"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d_%H%M%S_%f')
+        path = os.path.join(directory, f"{self.name}-{stamp}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome(), f, default=str)
+        return path
+
+_active_lock = threading.Lock()
+_active: Dict[Optional[str], Trace] = {}
+
+def current_trace() -> Optional[Trace]:
+    """The trace collecting spans for the calling session, if any"""
+    if not TRACING_ENABLED:
+        return None
+    with _active_lock:
+        return _active.get(_session_key())
+
+@contextmanager
+def span(name: str, cat: str = 'app', **args) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block as a span of the current trace.
+    Yields the span's args dict so callers can attach results (rows, cache outcome) before it closes.
+    """
+    trace = current_trace()
+    if trace is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        trace.add(name, cat, start, time.perf_counter(), args)
+
+def traced(name: Optional[str] = None, cat: str = 'app') -> Callable:
+    """Decorator form of span, named after the function by default"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return fn(*args, **kwargs)
+            with span(label, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def trace_rerun(page: str) -> Callable:
+    """
+    Decorator for a page's main(): each call (one script rerun) is traced as a whole and
+    exported to TRACE_DIR when it ends, including when it ends in st.stop() or st.rerun().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return fn(*args, **kwargs)
+            key = _session_key()
+            trace = Trace(page)
+            with _active_lock:
+                _active[key] = trace
+            try:
+                with span(f"rerun {page}", 'rerun'):
+                    return fn(*args, **kwargs)
+            finally:
+                with _active_lock:
+                    if _active.get(key) is trace:
+                        del _active[key]
+                try:
+                    trace.export(TRACE_DIR)
+                except OSError:
+                    pass
+        return wrapper
+    return decorator
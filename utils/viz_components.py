@@ -8,6 +8,13 @@ import time
 import numpy as np
 from scipy import interpolate
 
+from utils.tracing import span, traced
+from utils.downsampling import DOWNSAMPLE_POINTS, downsample_frame
+from utils.figure_cache import cached_figure
+from utils.large_scatter import create_scatter
+from utils.anomaly import anomaly_bounds, flag_anomalies, score_anomalies
+from utils.exports import EXPORT_FORMATS, export_button
+
 def create_metric_card(title: str, value: str, subtitle: str = ""):
     """Create a styled metric card"""
     st.markdown(f"""
@@ -41,6 +48,31 @@ def create_performance_monitor(execution_time: float, target_time: float = 3.0):
     </div>
     """, unsafe_allow_html=True)
 
+def create_section_placeholders(count: int, loading_text: str = "⏳ Loading section...") -> List[Any]:
+    """Reserve page slots for dashboard sections, in page order, separated by rules"""
+    placeholders = []
+    for i in range(count):
+        if i:
+            st.markdown("---")
+        placeholder = st.empty()
+        placeholder.info(loading_text)
+        placeholders.append(placeholder)
+    return placeholders
+
+def show_chart(fig: go.Figure, **kwargs):
+    """st.plotly_chart, traced separately so figure serialization shows apart from figure building"""
+    with span('st.plotly_chart', 'serialize', traces=len(fig.data)):
+        st.plotly_chart(fig, **kwargs)
+
+def render_ready_sections(sections: List[tuple], placeholders: List[Any], data: Dict[str, Any], rendered: set):
+    """Draw each (section function, data key) whose data has arrived into its placeholder, once"""
+    for i, (create_section, key) in enumerate(sections):
+        if i not in rendered and key in data:
+            with placeholders[i].container():
+                create_section(data)
+            rendered.add(i)
+
+@traced(cat='render')
 def create_kpi_dashboard(metrics: Dict[str, Any], title: str = "Key Performance Indicators"):
     """Create a KPI dashboard with multiple metrics"""
     st.subheader(title)
@@ -76,6 +108,8 @@ def create_kpi_dashboard(metrics: Dict[str, Any], title: str = "Key Performance
                 help=subtitle
             )
 
+@traced(cat='chart')
+@cached_figure
 def create_geographic_map(df: pd.DataFrame, location_col: str, value_col: str, title: str):
     """Create a choropleth map for South African provinces"""
     
@@ -118,6 +152,8 @@ def create_geographic_map(df: pd.DataFrame, location_col: str, value_col: str, t
     fig.update_layout(height=500)
     return fig
 
+@traced(cat='chart')
+@cached_figure
 def create_hierarchy_sunburst(df: pd.DataFrame, hierarchy_cols: List[str], value_col: str, title: str):
     """Create a sunburst chart for hierarchical data"""
     
@@ -137,6 +173,8 @@ def create_hierarchy_sunburst(df: pd.DataFrame, hierarchy_cols: List[str], value
     
     return fig
 
+@traced(cat='chart')
+@cached_figure
 def create_trend_analysis(df: pd.DataFrame, date_col: str, value_col: str, 
                          category_col: Optional[str] = None, title: str = "Trend Analysis"):
     """Create time series trend analysis using scipy for trend lines"""
@@ -148,9 +186,14 @@ def create_trend_analysis(df: pd.DataFrame, date_col: str, value_col: str,
     # Sort by date for proper trend line calculation
     df = df.sort_values(date_col)
     
+    # Plot at most DOWNSAMPLE_POINTS per series; the trend line below still fits every point
+    with span('downsample', 'chart', rows=len(df)) as args:
+        plot_df = downsample_frame(df, date_col, value_col, category_col)
+        args['points'] = len(plot_df)
+    
     if category_col:
         fig = px.line(
-            df,
+            plot_df,
             x=date_col,
             y=value_col,
             color=category_col,
@@ -159,7 +202,7 @@ def create_trend_analysis(df: pd.DataFrame, date_col: str, value_col: str,
         )
     else:
         fig = px.line(
-            df,
+            plot_df,
             x=date_col,
             y=value_col,
             title=title,
@@ -178,7 +221,7 @@ def create_trend_analysis(df: pd.DataFrame, date_col: str, value_col: str,
             spline = interpolate.UnivariateSpline(x_values, y_values, s=len(y_values))
             
             # Generate smooth curve points
-            x_smooth = np.linspace(x_values.min(), x_values.max(), len(x_values) * 2)
+            x_smooth = np.linspace(x_values.min(), x_values.max(), min(len(x_values) * 2, DOWNSAMPLE_POINTS))
             y_smooth = spline(x_smooth)
             
             # Map back to datetime for plotting
@@ -207,6 +250,8 @@ def create_trend_analysis(df: pd.DataFrame, date_col: str, value_col: str,
     
     return fig
 
+@traced(cat='chart')
+@cached_figure
 def create_provider_performance_chart(df: pd.DataFrame, title: str = "Provider Performance Analysis"):
     """Create provider performance comparison chart"""
     
@@ -250,6 +295,8 @@ def create_provider_performance_chart(df: pd.DataFrame, title: str = "Provider P
     fig.update_layout(height=800, title_text=title, showlegend=True)
     return fig
 
+@traced(cat='chart')
+@cached_figure
 def create_financial_breakdown(df: pd.DataFrame, amount_cols: List[str], title: str = "Financial Breakdown"):
     """Create financial breakdown visualization"""
     
@@ -275,24 +322,25 @@ def create_financial_breakdown(df: pd.DataFrame, amount_cols: List[str], title:
     
     return fig
 
-def create_anomaly_detection_chart(df: pd.DataFrame, value_col: str, threshold: float = 2.0):
-    """Create anomaly detection visualization using statistical methods"""
-    
-    # Calculate statistical thresholds
-    mean_val = df[value_col].mean()
-    std_val = df[value_col].std()
-    upper_threshold = mean_val + (threshold * std_val)
-    lower_threshold = mean_val - (threshold * std_val)
-    
-    # Identify anomalies
-    df['is_anomaly'] = (df[value_col] > upper_threshold) | (df[value_col] < lower_threshold)
-    
-    # Create scatter plot
-    fig = px.scatter(
+@traced(cat='chart')
+@cached_figure
+def create_anomaly_detection_chart(df: pd.DataFrame, value_col: str, threshold: float = 3.5,
+                                   method: str = 'robust'):
+    """Create anomaly detection visualization; see utils/anomaly.py for the scoring methods"""
+    
+    # Score without touching df (it may be a cached or shared frame)
+    is_anomaly = flag_anomalies(score_anomalies(df, value_col, method), threshold)
+    lower_threshold, center, upper_threshold = anomaly_bounds(df[value_col], method, threshold)
+    rule = f"{threshold}×IQR" if method == 'iqr' else f"{threshold}σ{' robust' if method == 'robust' else ''}"
+    
+    # Create scatter plot (WebGL or a density grid with anomalies on top for large frames)
+    fig = create_scatter(
         df,
         x=df.index,
         y=value_col,
-        color='is_anomaly',
+        highlight=is_anomaly,
+        highlight_name='Anomaly',
+        color=is_anomaly,
         color_discrete_map={True: 'red', False: 'blue'},
         title=f"Anomaly Detection - {value_col.replace('_', ' ').title()}",
         labels={'is_anomaly': 'Anomaly Status'}
@@ -300,15 +348,16 @@ def create_anomaly_detection_chart(df: pd.DataFrame, value_col: str, threshold:
     
     # Add threshold lines
     fig.add_hline(y=upper_threshold, line_dash="dash", line_color="red", 
-                  annotation_text=f"Upper Threshold ({threshold}σ)")
+                  annotation_text=f"Upper Threshold ({rule})")
     fig.add_hline(y=lower_threshold, line_dash="dash", line_color="red",
-                  annotation_text=f"Lower Threshold ({threshold}σ)")
-    fig.add_hline(y=mean_val, line_dash="dot", line_color="green",
-                  annotation_text="Mean")
+                  annotation_text=f"Lower Threshold ({rule})")
+    fig.add_hline(y=center, line_dash="dot", line_color="green",
+                  annotation_text="Mean" if method == 'zscore' else "Median")
     
     fig.update_layout(height=500)
     return fig
 
+@traced(cat='render')
 def display_data_table(df: pd.DataFrame, title: str = "Data Table", max_rows: int = 100):
     """Display data table with formatting and download option"""
     
@@ -330,11 +379,8 @@ def display_data_table(df: pd.DataFrame, title: str = "Data Table", max_rows: in
     display_df = df.head(max_rows)
     st.dataframe(display_df, use_container_width=True)
     
-    # Download button
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download as CSV",
-        data=csv,
-        file_name=f"{title.lower().replace(' ', '_')}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
\ No newline at end of file
+    # Download buttons - each file is generated only when its button is clicked
+    file_stem = f"{title.lower().replace(' ', '_')}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+    for column, fmt in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS):
+        with column:
+            export_button(df, fmt, file_stem, key=f"export_{title}_{fmt}")
\ No newline at end of file